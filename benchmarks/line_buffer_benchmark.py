@@ -0,0 +1,101 @@
+"""Emission cost of the segment based LineBuffer compared to the former (line copying) LineBuffer, for deeply nested
+blocks and for very large namespaces
+
+    python -m benchmarks.line_buffer_benchmark [nesting_depth] [namespace_type_count]
+"""
+from __future__ import annotations
+
+import sys
+import timeit
+
+from code_generator.line_buffer import LineBuffer, IndentedBlock, UNIT_INDENT
+
+
+class LegacyLineBuffer:
+    """Former LineBuffer implementation, kept here as the benchmark baseline"""
+
+    def __init__(self, indent: int, *lines):
+        self._lines = list(lines)
+        self._indent_level = indent
+        self._prefix = UNIT_INDENT * indent
+
+    def indent_up(self, units=1):
+        self._indent_level += units
+        self._prefix = UNIT_INDENT * self._indent_level
+
+    def indent_down(self, units=1):
+        self._indent_level -= units
+        self._prefix = UNIT_INDENT * self._indent_level
+
+    def append(self, line: str):
+        self._lines.append(self._prefix + line)
+
+    def append_buffer(self, buffer: LegacyLineBuffer):
+        self._lines.extend([self._prefix + line for line in buffer._lines])
+
+    def str(self, indent_offset=0):
+        indent_prefix = UNIT_INDENT * indent_offset
+        return '\n'.join([indent_prefix + line for line in self._lines])
+
+
+def deep_nesting(buffer_cls, depth: int) -> str:
+    # each level wraps the previous level in a new struct, like nested inner types
+    inner = buffer_cls(0)
+    for i in range(20):
+        inner.append(f"int32_t member_{i};")
+    for level in range(depth):
+        outer = buffer_cls(0)
+        outer.append(f"struct Level{level}")
+        outer.append("{")
+        with IndentedBlock(outer):
+            outer.append_buffer(inner)
+            outer.append(f"int32_t level_{level};")
+        outer.append("};")
+        inner = outer
+    return inner.str()
+
+
+def large_namespace(buffer_cls, type_count: int) -> str:
+    # shared namespace header aggregating many small type buffers
+    type_buffers = []
+    for i in range(type_count):
+        type_buffer = buffer_cls(0)
+        type_buffer.append(f"enum class Enum{i} : int32_t")
+        type_buffer.append("{")
+        with IndentedBlock(type_buffer):
+            for m in range(5):
+                type_buffer.append(f"member_{m} = {m},")
+        type_buffer.append("};")
+        type_buffers.append(type_buffer)
+
+    buffer = buffer_cls(0)
+    buffer.append("namespace core")
+    buffer.append("{")
+    with IndentedBlock(buffer):
+        for type_buffer in type_buffers:
+            buffer.append_buffer(type_buffer)
+    buffer.append("} // core")
+
+    # header writer wraps the namespace buffer once more
+    final_buffer = buffer_cls(0)
+    final_buffer.append("#pragma once")
+    final_buffer.append_buffer(buffer)
+    return final_buffer.str()
+
+
+def run(name: str, fn, arg: int):
+    assert fn(LegacyLineBuffer, arg) == fn(LineBuffer, arg)
+    for buffer_cls in (LegacyLineBuffer, LineBuffer):
+        seconds = min(timeit.repeat(lambda: fn(buffer_cls, arg), number=1, repeat=3))
+        print(f"{name:>16} ({arg}) {buffer_cls.__name__:>16}: {seconds:.3f}s")
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    type_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    run('deep nesting', deep_nesting, depth)
+    run('large namespace', large_namespace, type_count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Emission time of a single struct with a very large number of members, mixing every member kind (dominated by the
+per member type dispatch of the header and FromJson/ToJson writers)
+
+    python -m benchmarks.member_dispatch_benchmark [member_count]
+"""
+import sys
+import timeit
+
+from code_generator.line_buffer import LineBuffer
+from code_generator.type_generators.cpp_struct import CppStruct
+from schema_parser.reg_key import RegKey
+from schema_parser.schema_parser import SchemaParser
+
+
+def make_schema(member_count: int) -> dict:
+    member_defs = [
+        {'type': 'string'},
+        {'type': 'integer'},
+        {'type': 'array', 'items': {'type': 'number'}},
+        {'type': 'array', 'items': {'$ref': '#/definitions/Number'}},
+        {'$ref': '#/definitions/Number'},
+        {'$ref': '#/definitions/Color'},
+        {'oneOf': [{'type': 'string'}, {'type': 'array', 'items': {'type': 'integer'}}]},
+    ]
+    properties = {f"member{i}": member_defs[i % len(member_defs)] for i in range(member_count)}
+    return {
+        'Number': {'type': 'integer'},
+        'Color': {'enum': ['Red', 'Green', 'Blue']},
+        'Big': {'type': 'object', 'properties': properties},
+    }
+
+
+def emit_struct(struct_def, type_registry) -> int:
+    cpp_struct = CppStruct(struct_def)
+    header = LineBuffer(0)
+    cpp_struct.write_header(header, type_registry)
+    source = LineBuffer(0)
+    cpp_struct.write_source(source, type_registry)
+    return len(header) + len(source)
+
+
+def main():
+    member_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    parser = SchemaParser()
+    parser.parse_root_level('#/definitions', ['bench'], make_schema(member_count))
+    type_registry = parser.type_registry
+    struct_def = type_registry.get(RegKey('#/definitions', 'Big'))
+
+    repeat = 5
+    seconds = min(timeit.repeat(lambda: emit_struct(struct_def, type_registry), number=1, repeat=repeat))
+    print(f"emit struct [{member_count} members]: {seconds:.3f}s (best of {repeat})")
+
+
+if __name__ == '__main__':
+    main()
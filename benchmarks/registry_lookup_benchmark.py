@@ -0,0 +1,62 @@
+"""Registry lookup throughput of the current RegKey compared to the former (MD5 hashed, string compared) RegKey
+
+    python -m benchmarks.registry_lookup_benchmark [entry_count]
+"""
+import hashlib
+import sys
+import timeit
+
+from schema_parser.reg_key import RegKey
+from schema_parser.type_defs.simple_alias import SimpleAlias
+from schema_parser.type_registry import TypeRegistry
+
+
+class LegacyRegKey:
+    """Former RegKey implementation, kept here as the benchmark baseline"""
+
+    @classmethod
+    def from_uri(cls, uri: str):
+        return LegacyRegKey(*uri.split('/'))
+
+    def __init__(self, *path):
+        self._path = list(path)
+
+    def __str__(self):
+        return '/'.join(self._path)
+
+    def __hash__(self):
+        return int(hashlib.md5(str(self).encode()).hexdigest()[:8], 16)
+
+    def __eq__(self, other):
+        return str(self) == str(other)
+
+
+def build_registry(key_cls, entry_count: int) -> TypeRegistry:
+    type_registry = TypeRegistry()
+    for i in range(entry_count):
+        type_def = SimpleAlias(['core'], f'Type{i}', key_cls('#/definitions', f'Type{i}'))
+        type_def.actual_type = 'integer'
+        type_registry.add(type_def)
+    return type_registry
+
+
+def run(key_cls, entry_count: int):
+    type_registry = build_registry(key_cls, entry_count)
+    uris = [f'#/definitions/Type{i}' for i in range(entry_count)]
+
+    def lookup_all():
+        for uri in uris:
+            type_registry.get(key_cls.from_uri(uri))
+
+    seconds = min(timeit.repeat(lookup_all, number=1, repeat=3))
+    print(f"{key_cls.__name__:>14}: {entry_count / seconds:12.0f} lookups/s ({seconds:.3f}s for {entry_count} keys)")
+
+
+def main():
+    entry_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    run(LegacyRegKey, entry_count)
+    run(RegKey, entry_count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Memory held by a large synthetic type registry (all type definition kinds, parsed from schema definitions), measured
+with tracemalloc
+
+    python -m benchmarks.registry_memory_benchmark [definition_count]
+"""
+import gc
+import sys
+import tracemalloc
+
+from schema_parser.schema_parser import SchemaParser
+
+
+def make_schema(definition_count: int) -> dict:
+    definitions = {}
+    for i in range(definition_count):
+        kind = i % 7
+        if kind == 0:
+            definitions[f"Alias{i}"] = {'type': 'string'}
+        elif kind == 1:
+            definitions[f"Array{i}"] = {'type': 'array', 'items': {'type': 'integer'}}
+        elif kind == 2:
+            definitions[f"Variant{i}"] = {'oneOf': [{'type': 'string'}, {'type': 'number'}]}
+        elif kind == 3:
+            definitions[f"Enum{i}"] = {'enum': ['First', 'Second', 'Third']}
+        elif kind == 4:
+            definitions[f"Struct{i}"] = {'type': 'object', 'properties': {
+                'name': {'type': 'string'},
+                'values': {'type': 'array', 'items': {'type': 'number'}},
+                'alias': {'$ref': f"#/definitions/Alias{i - 4}"},
+            }}
+        elif kind == 5:
+            definitions[f"Ref{i}"] = {'$ref': f"#/definitions/Struct{i - 1}"}
+        else:
+            definitions[f"Extended{i}"] = {'type': 'object', '@meta:cpp_type': 'extended_variant', 'properties': {
+                'type': {'enum': ['Text']},
+                'content': {'oneOf': [{'type': 'string'}]},
+            }}
+    return definitions
+
+
+def main():
+    definition_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    schema = make_schema(definition_count)
+
+    gc.collect()
+    tracemalloc.start()
+    parser = SchemaParser()
+    parser.parse_root_level('#/definitions', ['bench', 'memory'], schema)
+    gc.collect()
+    registry_bytes, _peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    registry_size = len(parser.type_registry)
+    print(f"registry [{definition_count} definitions, {registry_size} types]: {registry_bytes / 2 ** 20:.1f}MiB "
+          f"({registry_bytes / registry_size:.0f} bytes per type)")
+
+
+if __name__ == '__main__':
+    main()
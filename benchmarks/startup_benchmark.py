@@ -0,0 +1,49 @@
+"""Import time of the generator entry points, measured with `python -X importtime` in fresh interpreters and checked
+against an import budget (exits with a non-zero status if a module goes over its budget)
+
+    python -m benchmarks.startup_benchmark [runs]
+"""
+import os
+import subprocess
+import sys
+
+# module -> cumulative import time budget [ms], about twice the best of 5 runs on a development machine (25-35ms,
+# mostly the typing module) so that slower machines pass too. Modules only needed by some runs (pathlib, hashlib,
+# pickle, tracemalloc, the dependency graph) are imported where they are used, to stay within the budgets.
+IMPORT_BUDGETS_MS = {
+    'schema_parser.schema_batch_parser': 60,
+    'code_generator.cpp_code_generator': 60,
+    'main': 70,
+}
+
+
+def measure_import_us(module: str) -> int:
+    """Cumulative import time of a module (excluding interpreter startup) in a fresh interpreter"""
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=repo_dir,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        _self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        if name.strip() == module:
+            return int(cumulative_us)
+    raise ValueError(f"No import time reported for module: {module}")
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    over_budget = []
+    for module, budget_ms in IMPORT_BUDGETS_MS.items():
+        # best of several runs, to filter out disk cache and scheduling noise
+        import_ms = min(measure_import_us(module) for _ in range(runs)) / 1000
+        print(f"import {module}: {import_ms:.1f}ms (budget {budget_ms}ms)")
+        if import_ms > budget_ms:
+            over_budget.append(module)
+
+    if over_budget:
+        print(f"Over import budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Iterator, List
 
 from code_generator.line_buffer import LineBuffer
 
@@ -10,13 +10,14 @@ class HeaderCodeWriter:
         self.buffer = buffer
         self.include_headers = []
 
-    def str(self):
-        final_buffer = LineBuffer(0)
-        final_buffer.append('#pragma once')
+    def iter_lines(self) -> Iterator[str]:
+        yield '#pragma once'
         if self.include_headers:
-            final_buffer.new_line()
+            yield ''
             for include in self.include_headers:
-                final_buffer.append(f"#include <{include}>")
-        final_buffer.new_line()
-        final_buffer.append_buffer(self.buffer)
-        return final_buffer.str()
+                yield f"#include <{include}>"
+        yield ''
+        yield from self.buffer.iter_lines()
+
+    def str(self):
+        return '\n'.join(self.iter_lines())
@@ -1,26 +1,22 @@
+from __future__ import annotations
+
 import os
-import pathlib
-from typing import Union, Dict, List, Set
+from typing import TYPE_CHECKING, Union, Dict, Iterable, List, Set, Tuple
 
 from code_generator.code_writers.header_code_writer import HeaderCodeWriter
-from code_generator.line_buffer import LineBuffer, IndentedBlock
-from code_generator.type_generators.cpp_array_alias import CppArrayAlias
-from code_generator.type_generators.cpp_enum import CppEnum
-from code_generator.type_generators.cpp_extended_variant import CppExtendedVariant
-from code_generator.type_generators.cpp_ref_alias import CppRefAlias
-from code_generator.type_generators.cpp_simple_alias import CppSimpleAlias
-from code_generator.type_generators.cpp_struct import CppStruct
-from code_generator.type_generators.cpp_variant_alias import CppVariantAlias
+from code_generator.line_buffer import LineBuffer, IndentedBlock, iter_text_chunks
+from code_generator.type_generators.kind_dispatch import KindDispatch
 from schema_parser.reg_key import RegKey
-from schema_parser.type_defs.array_alias import ArrayAlias
-from schema_parser.type_defs.enum_type import EnumType
-from schema_parser.type_defs.extended_variant import ExtendedVariant
-from schema_parser.type_defs.ref_type import RefType
-from schema_parser.type_defs.simple_alias import SimpleAlias
-from schema_parser.type_defs.struct_type import StructType
-from schema_parser.type_defs.type_def_base import TypeDefBase
-from schema_parser.type_defs.variant_alias import VariantAlias
+from schema_parser.type_defs.type_def_base import TypeDefBase, TypeDefKind
+from schema_parser import configs
 from schema_parser.type_registry import TypeRegistry
+from schema_parser.utils.pipeline_stats import PipelineStats, NULL_STATS
+
+if TYPE_CHECKING:
+    import pathlib
+    from schema_parser.type_defs.struct_type import StructType
+    from code_generator.type_generators.cpp_extended_variant import CppExtendedVariant
+    from code_generator.type_generators.cpp_struct import CppStruct
 
 
 class TypeHeaderWriter:
@@ -37,7 +33,7 @@ class TypeHeaderWriter:
     def _make_ns_key(namespaces: List[str]) -> str:
         return '/'.join(namespaces)
 
-    def add_to_namespace(self, namespaces: List[str], buffer: LineBuffer, headers: Set[str]):
+    def add_to_namespace(self, namespaces: List[str], buffer: LineBuffer, headers: List[str]):
         ns_key = self._make_ns_key(namespaces)
         if ns_key not in self.namespaces:
             self.namespaces[ns_key] = namespaces
@@ -73,6 +69,91 @@ class TypeHeaderWriter:
             raise NameError(f"No namespace type info: {ns_key}")
         return self.include_headers[ns_key]
 
+    def remove_namespace(self, namespaces: List[str]):
+        """Drop the collected type info of a namespace (once its header is written)"""
+        ns_key = self._make_ns_key(namespaces)
+        self.namespaces.pop(ns_key, None)
+        self.buffers.pop(ns_key, None)
+        self.include_headers.pop(ns_key, None)
+
+
+class EmittedType:
+    """Output of emitting a single type; applied to the output directory (in build order) by the code generator
+
+    File contents are kept as code writers (rendered while writing), or as strings once rendered to be sent back from
+    a worker process."""
+    files: List[Tuple[pathlib.Path, Union[str, HeaderCodeWriter, LineBuffer], str]]
+    shared_header: Union[Tuple[List[str], LineBuffer, List[str]], None]
+    dependency_keys: List[RegKey]
+    error: Union[str, None]
+
+    def __init__(self, dependency_keys: List[RegKey]):
+        self.files = []
+        self.shared_header = None
+        self.dependency_keys = dependency_keys
+        self.error = None
+
+    def render(self):
+        self.files = [(file_path, content if isinstance(content, str) else '\n'.join(content.iter_lines()), kind)
+                      for file_path, content, kind in self.files]
+
+
+class OutputSummary:
+    """Counts of output files written, left untouched (content unchanged) and removed (stale) by a run"""
+    written: int
+    unchanged: int
+    removed: int
+
+    def __init__(self):
+        self.written = 0
+        self.unchanged = 0
+        self.removed = 0
+
+    def dict(self):
+        return {
+            'written': self.written,
+            'unchanged': self.unchanged,
+            'removed': self.removed,
+        }
+
+
+GENERATED_FILES_LIST = '.generated_files'
+
+# kinds generated into their own header/source files, others go to the shared namespace header
+OWN_FILE_KINDS = (TypeDefKind.StructType, TypeDefKind.ExtendedVariantType)
+
+# type kind -> C++ type generator, imported on first use of the kind
+CPP_TYPES = KindDispatch(import_paths={
+    TypeDefKind.SimpleAlias: 'code_generator.type_generators.cpp_simple_alias:CppSimpleAlias',
+    TypeDefKind.ArrayAlias: 'code_generator.type_generators.cpp_array_alias:CppArrayAlias',
+    TypeDefKind.VariantAlias: 'code_generator.type_generators.cpp_variant_alias:CppVariantAlias',
+    TypeDefKind.EnumType: 'code_generator.type_generators.cpp_enum:CppEnum',
+    TypeDefKind.StructType: 'code_generator.type_generators.cpp_struct:CppStruct',
+    TypeDefKind.ExtendedVariantType: 'code_generator.type_generators.cpp_extended_variant:CppExtendedVariant',
+    TypeDefKind.RefType: 'code_generator.type_generators.cpp_ref_alias:CppRefAlias',
+})
+
+_worker_code_generator = None
+
+
+def _init_emit_worker(code_generator: CodeGenerator):
+    global _worker_code_generator
+    _worker_code_generator = code_generator
+    # stats of worker processes are collected separately and merged back by the caller
+    if code_generator.stats.enabled:
+        code_generator.stats = PipelineStats(code_generator.stats.track_memory)
+
+
+def _emit_types_in_worker(reg_keys: List[RegKey]) -> Tuple[List[EmittedType], PipelineStats]:
+    code_generator = _worker_code_generator
+    emitted_types = [code_generator.emit_type(code_generator.type_registry.get(key)) for key in reg_keys]
+    for emitted in emitted_types:
+        emitted.render()
+    stats = code_generator.stats
+    if stats.enabled:
+        code_generator.stats = PipelineStats(stats.track_memory)
+    return emitted_types, stats
+
 
 class CodeGenerator:
     type_registry: TypeRegistry
@@ -80,27 +161,185 @@ class CodeGenerator:
     header_dir: str
     cpp_dir: str
     type_header_writer: TypeHeaderWriter
+    stats: PipelineStats
+    # leave output files with identical content untouched (keeps mtimes, so builds don't recompile them)
+    write_if_changed: bool
+    # remove files generated by a previous run that no longer map to any type
+    remove_stale: bool
+    # generate struct FromJson functions dispatching the keys of a single pass over the json object
+    key_dispatch_from_json: bool
+    # generate struct ToJson functions writing the json text directly (plus AppendJson to a caller's string)
+    direct_to_json: bool
+    # generate struct FromJson functions parsing the json text directly, instead of going through a nlohmann::json
+    parse_from_json: bool
+    # generate the struct handlers of a resumable push parser, for json received in chunks
+    push_parser: bool
+    # generate per struct a streaming reader and writer of top-level arrays and newline delimited json (the elements
+    # are decoded with the push parser handlers, which this implies)
+    stream_elements: bool
+    output_summary: OutputSummary
+    _generated_files: Set[str]
+    # output path -> (content hash, registry keys it was generated from)
+    _output_sources: Dict[str, Tuple[str, List[RegKey]]]
+    _namespace_dependency_keys: Dict[str, Dict[RegKey, None]]
+    # generated key -> (namespaces, whether it is in the shared namespace header, its own output files), so that an
+    # incremental run can rewrite or remove the outputs of types that changed namespace, kind, or were removed
+    _key_outputs: Dict[RegKey, Tuple[Tuple[str, ...], bool, List[str]]]
 
     def get_header_file_path(self, namespaces: List[str], file_name_prefix: str) -> pathlib.Path:
+        import pathlib
         return pathlib.Path(
             os.path.join(self.src_root_dir, self.header_dir, *namespaces, f"{file_name_prefix}.h"))
 
     def get_cpp_file_path(self, struct_def: StructType) -> pathlib.Path:
+        import pathlib
         return pathlib.Path(
             os.path.join(self.src_root_dir, self.cpp_dir, *struct_def.namespaces, struct_def.type_name + '.cpp'))
 
-    def __init__(self, type_registry: TypeRegistry, src_root_dir: str, header_dir: str, cpp_dir: str):
+    def __init__(self, type_registry: TypeRegistry, src_root_dir: str, header_dir: str, cpp_dir: str,
+                 stats: Union[PipelineStats, None] = None):
         self.type_registry = type_registry
         self.src_root_dir = src_root_dir
         self.header_dir = header_dir
         self.cpp_dir = cpp_dir
         self.type_header_writer = TypeHeaderWriter()
+        self.stats = stats if stats is not None else NULL_STATS
+        self.write_if_changed = False
+        self.remove_stale = False
+        self.key_dispatch_from_json = False
+        self.direct_to_json = False
+        self.parse_from_json = False
+        self.push_parser = False
+        self.stream_elements = False
+        self.output_summary = OutputSummary()
+        self._generated_files = set()
+        self._output_sources = {}
+        self._namespace_dependency_keys = {}
+        self._key_outputs = {}
+
+    @classmethod
+    def from_snapshot(cls, snapshot_path: str, src_root_dir: str, header_dir: str, cpp_dir: str) -> CodeGenerator:
+        """Create a generator from a registry snapshot saved with TypeRegistry.save_snapshot"""
+        return cls(TypeRegistry.load_snapshot(snapshot_path), src_root_dir, header_dir, cpp_dir)
+
+    def _write_file(self, file_path: pathlib.Path, content: Union[str, HeaderCodeWriter, LineBuffer], kind: str,
+                    dependency_keys: List[RegKey]):
+        """Write a file, streaming the lines of a code writer in chunks instead of joining them into a single string
+
+        The content goes to a temporary file first, which replaces the output file only if it was changed (when
+        write_if_changed is set)."""
+        import hashlib
+        self._generated_files.add(str(file_path))
+        chunks = [content] if isinstance(content, str) else iter_text_chunks(content.iter_lines())
+        content_hash = hashlib.sha256()
+        with self.stats.measure('write_file', kind) as measurement:
+            os.makedirs(file_path.parent, exist_ok=True)
+            temp_path = file_path.with_name(file_path.name + '.tmp')
+            with open(temp_path, 'w') as out_file:
+                for chunk in chunks:
+                    content_hash.update(chunk.encode())
+                    out_file.write(chunk)
+                    measurement.bytes += len(chunk)
+            self._output_sources[str(file_path)] = (content_hash.hexdigest(), dependency_keys)
+            if self.write_if_changed and file_path.exists() and self._is_unchanged(temp_path, file_path):
+                os.remove(temp_path)
+                self.output_summary.unchanged += 1
+                return
+            os.replace(temp_path, file_path)
+            self.output_summary.written += 1
+
+    @staticmethod
+    def _is_unchanged(temp_path: pathlib.Path, file_path: pathlib.Path) -> bool:
+        import filecmp
+        return filecmp.cmp(temp_path, file_path, shallow=False)
+
+    def _remove_stale_files(self):
+        """Remove the files listed by the previous run that this run didn't generate
+
+        The list holds paths relative to src_root_dir, so it doesn't depend on the working directory of the runs.
+        Entries that resolve outside of src_root_dir are never removed."""
+        root_dir = os.path.abspath(self.src_root_dir)
+        real_root_dir = os.path.realpath(root_dir)
+        generated_files = {os.path.relpath(os.path.abspath(file_path), root_dir) for file_path in self._generated_files}
+        generated_list_path = os.path.join(root_dir, GENERATED_FILES_LIST)
+        if os.path.exists(generated_list_path):
+            with open(generated_list_path, 'r') as list_file:
+                prev_generated_files = list_file.read().splitlines()
+            for relative_path in prev_generated_files:
+                if relative_path in generated_files:
+                    continue
+                file_path = os.path.join(root_dir, relative_path)
+                real_path = os.path.realpath(file_path)
+                if real_path == real_root_dir or os.path.commonpath([real_root_dir, real_path]) != real_root_dir:
+                    print(f"Not removing stale file outside of the output root: {file_path}")
+                    continue
+                try:
+                    os.remove(file_path)
+                    self.output_summary.removed += 1
+                except FileNotFoundError:
+                    pass
+
+        os.makedirs(root_dir, exist_ok=True)
+        with open(generated_list_path, 'w') as list_file:
+            list_file.write(''.join(f"{relative_path}\n" for relative_path in sorted(generated_files)))
+
+    def get_json_writer_header_path(self) -> pathlib.Path:
+        from code_generator.type_generators.cpp_struct_utils.to_json_generator import JSON_WRITER_HEADER_NAME
+        return self.get_header_file_path([], JSON_WRITER_HEADER_NAME)
+
+    def get_json_reader_header_path(self) -> pathlib.Path:
+        from code_generator.type_generators.cpp_struct_utils.read_json_generator import JSON_READER_HEADER_NAME
+        return self.get_header_file_path([], JSON_READER_HEADER_NAME)
+
+    def get_json_push_parser_header_path(self) -> pathlib.Path:
+        from code_generator.type_generators.cpp_struct_utils.push_json_generator import JSON_PUSH_PARSER_HEADER_NAME
+        return self.get_header_file_path([], JSON_PUSH_PARSER_HEADER_NAME)
+
+    def get_json_stream_header_path(self) -> pathlib.Path:
+        from code_generator.type_generators.cpp_struct_utils.stream_json_generator import JSON_STREAM_HEADER_NAME
+        return self.get_header_file_path([], JSON_STREAM_HEADER_NAME)
 
-    def _generate_header(self, cpp_type_meta, cpp_type, type_def: TypeDefBase):
-        if cpp_type_meta == CppStruct:
-            cpp_type.add_base_class('ISerializable')
-            cpp_type.add_member_method('[[nodiscard]] std::string ToJson() const override;')
-            cpp_type.add_member_method('void FromJson(const std::string&) override;')
+    def _write_support_files(self):
+        if self.direct_to_json:
+            from code_generator.type_generators.cpp_struct_utils.to_json_generator import JSON_WRITER_HEADER
+            self._write_file(self.get_json_writer_header_path(), JSON_WRITER_HEADER, 'JsonWriter', [])
+        if self.parse_from_json:
+            from code_generator.type_generators.cpp_struct_utils.read_json_generator import JSON_READER_HEADER
+            self._write_file(self.get_json_reader_header_path(), JSON_READER_HEADER, 'JsonReader', [])
+        if self.push_parser or self.stream_elements:
+            from code_generator.type_generators.cpp_struct_utils.push_json_generator import JSON_PUSH_PARSER_HEADER
+            self._write_file(self.get_json_push_parser_header_path(), JSON_PUSH_PARSER_HEADER, 'JsonPushParser', [])
+        if self.stream_elements:
+            from code_generator.type_generators.cpp_struct_utils.stream_json_generator import JSON_STREAM_HEADER
+            content = JSON_STREAM_HEADER.substitute(push_parser_header=self.get_json_push_parser_header_path())
+            self._write_file(self.get_json_stream_header_path(), content, 'JsonStream', [])
+
+    def _add_serializable_methods(self, cpp_type: CppStruct):
+        cpp_type.add_base_class('ISerializable')
+        cpp_type.add_member_method('[[nodiscard]] std::string ToJson() const override;')
+        cpp_type.add_member_method('void FromJson(const std::string&) override;')
+        cpp_type.key_dispatch_from_json = self.key_dispatch_from_json
+        if self.direct_to_json:
+            cpp_type.direct_to_json = True
+            cpp_type.add_member_method('void AppendJson(std::string& out) const;')
+            cpp_type.cpp_includes.add(str(self.get_json_writer_header_path()))
+        if self.parse_from_json:
+            cpp_type.parse_from_json = True
+            cpp_type.add_member_method('void ReadJson(json_reader::Reader& reader);')
+            cpp_type.header_includes.add(str(self.get_json_reader_header_path()))
+        if self.push_parser or self.stream_elements:
+            cpp_type.push_parser = True
+            cpp_type.add_member_method('void PushOpen(json_push::Parser& parser);')
+            cpp_type.add_member_method('json_push::Target PushKey(json_push::Parser& parser, std::string_view key);')
+            cpp_type.add_member_method('void PushClose(json_push::Parser& parser);')
+            cpp_type.header_includes.add(str(self.get_json_push_parser_header_path()))
+        if self.stream_elements:
+            cpp_type.stream_elements = True
+            cpp_type.header_includes.add(str(self.get_json_stream_header_path()))
+
+    def _generate_header(self, cpp_type_meta, cpp_type, type_def: TypeDefBase, emitted: EmittedType):
+        if type_def.kind == TypeDefKind.StructType:
+            self._add_serializable_methods(cpp_type)
 
         header_code = LineBuffer(0)
 
@@ -111,85 +350,281 @@ class CodeGenerator:
             raise
 
         # prepend include headers
-        if cpp_type_meta in (CppStruct, CppExtendedVariant):
+        if type_def.kind in OWN_FILE_KINDS:
             header_writer = HeaderCodeWriter(header_code)
-            header_writer.include_headers.extend(cpp_type.header_includes)
+            header_writer.include_headers.extend(sorted(cpp_type.header_includes))
 
             header_path = self.get_header_file_path(type_def.namespaces, type_def.type_name)
-            pathlib.Path(header_path.parent).mkdir(parents=True, exist_ok=True)
-            with open(header_path, 'w') as header_file:
-                header_file.write(header_writer.str())
+            emitted.files.append((header_path, header_writer, cpp_type_meta.__name__))
         else:
-            self.type_header_writer.add_to_namespace(cpp_type.type_def.namespaces, header_code,
-                                                     cpp_type.header_includes)
+            emitted.shared_header = (cpp_type.type_def.namespaces, header_code, sorted(cpp_type.header_includes))
 
-    def _generate_cpp(self, cpp_type: Union[CppStruct, CppExtendedVariant]):
+    def _generate_cpp(self, cpp_type: Union[CppStruct, CppExtendedVariant], emitted: EmittedType):
         cpp_src_code = LineBuffer(0)
-        if isinstance(cpp_type, CppStruct):
-            cpp_type.add_base_class('ISerializable')
-            cpp_type.add_member_method('[[nodiscard]] std::string ToJson() const override;')
-            cpp_type.add_member_method('void FromJson(const std::string&) override;')
+        if cpp_type.type_def.kind == TypeDefKind.StructType:
+            self._add_serializable_methods(cpp_type)
         cpp_type.write_source(cpp_src_code, self.type_registry)
 
         # prepend include headers
         header_path = self.get_header_file_path(cpp_type.type_def.namespaces, cpp_type.type_def.type_name)
         prepend_lines = [f'#include <{header_path}>']
-        for include in cpp_type.cpp_includes:
+        for include in sorted(cpp_type.cpp_includes):
             prepend_lines.append(f"#include <{include}>")
         prepend_lines.append('')
         cpp_src_code.prepend(*prepend_lines)
 
         cpp_path = self.get_cpp_file_path(cpp_type.type_def)
-        pathlib.Path(cpp_path.parent).mkdir(parents=True, exist_ok=True)
-        with open(cpp_path, 'w') as header_file:
-            header_file.write(cpp_src_code.str())
+        emitted.files.append((cpp_path, cpp_src_code, type(cpp_type).__name__))
 
     @staticmethod
     def get_cpp_type(type_def: TypeDefBase):
-        cpp_type_map = {
-            SimpleAlias: CppSimpleAlias,
-            ArrayAlias: CppArrayAlias,
-            VariantAlias: CppVariantAlias,
-            EnumType: CppEnum,
-            StructType: CppStruct,
-            ExtendedVariant: CppExtendedVariant,
-            RefType: CppRefAlias,
-        }
-        if type(type_def) not in cpp_type_map:
+        cpp_type_meta = CPP_TYPES.get(type_def)
+        if cpp_type_meta is None:
             raise TypeError(f"No supporting cpp type: {type_def}")
-        return cpp_type_map[type(type_def)]
+        return cpp_type_meta
+
+    def emit_type(self, type_def: TypeDefBase) -> EmittedType:
+        """Generate the code of a single type, without touching the output directory"""
+        from schema_parser.utils.type_dependencies import get_dependency_keys
+        emitted = EmittedType(get_dependency_keys(type_def, self.type_registry))
+        try:
+            cpp_type_meta = self.get_cpp_type(type_def)
+            with self.stats.measure('emit', cpp_type_meta.__name__):
+                cpp_type = cpp_type_meta(type_def)
+                self._generate_header(cpp_type_meta, cpp_type, type_def, emitted)
+                if type_def.kind in OWN_FILE_KINDS:
+                    self._generate_cpp(cpp_type, emitted)
+        except Exception as ex:
+            # output produced before the failure is still applied
+            emitted.error = str(ex)
+        return emitted
+
+    def _apply_emitted(self, emitted: EmittedType):
+        for file_path, content, kind in emitted.files:
+            self._write_file(file_path, content, kind, emitted.dependency_keys)
+        if emitted.shared_header:
+            self.type_header_writer.add_to_namespace(*emitted.shared_header)
+            ns_key = TypeHeaderWriter._make_ns_key(emitted.shared_header[0])
+            self._namespace_dependency_keys.setdefault(ns_key, {}).update(dict.fromkeys(emitted.dependency_keys))
 
     def generate_selected(self, uri: str):
+        from schema_parser.utils.type_dependencies import get_dependency_keys
         type_def = self.type_registry.get(RegKey.from_uri(uri))
         cpp_type_meta = self.get_cpp_type(type_def)
         cpp_type = cpp_type_meta(type_def)
-        self._generate_header(cpp_type_meta, cpp_type, type_def)
-        if isinstance(type_def, StructType):
-            self._generate_cpp(cpp_type)
-
-    def generate_code(self):
-        build_order = [EnumType, SimpleAlias, StructType, RefType, ArrayAlias, VariantAlias, ExtendedVariant]
-        for bo in build_order:
-            for type_def in self.type_registry:
-                if not isinstance(type_def, bo):
+        emitted = EmittedType(get_dependency_keys(type_def, self.type_registry))
+        self._write_support_files()
+        try:
+            self._generate_header(cpp_type_meta, cpp_type, type_def, emitted)
+            if type_def.kind == TypeDefKind.StructType:
+                self._generate_cpp(cpp_type, emitted)
+        finally:
+            self._apply_emitted(emitted)
+
+    def _get_build_order(self) -> List[TypeDefBase]:
+        build_order = [TypeDefKind.EnumType, TypeDefKind.SimpleAlias, TypeDefKind.StructType, TypeDefKind.RefType,
+                       TypeDefKind.ArrayAlias, TypeDefKind.VariantAlias, TypeDefKind.ExtendedVariantType]
+        return [type_def for bo in build_order for type_def in self.type_registry.iter_kind(bo)]
+
+    def _emit_parallel(self, type_defs: List[TypeDefBase], workers: int) -> List[EmittedType]:
+        # fork shares the (read-only) registry with the workers and keeps the hash seed, so that the output is
+        # byte-identical to the serial run
+        # only imported for parallel runs, as it is a large share of the startup time
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        mp_context = multiprocessing.get_context('fork') \
+            if 'fork' in multiprocessing.get_all_start_methods() else multiprocessing.get_context()
+        chunk_size = max(1, len(type_defs) // (workers * 4))
+        chunks = [[type_def.reg_key for type_def in type_defs[i:i + chunk_size]]
+                  for i in range(0, len(type_defs), chunk_size)]
+
+        emitted_types = []
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=_init_emit_worker,
+                                 initargs=(self,)) as executor:
+            for chunk_emitted_types, chunk_stats in executor.map(_emit_types_in_worker, chunks):
+                emitted_types.extend(chunk_emitted_types)
+                self.stats.merge(chunk_stats)
+        return emitted_types
+
+    def _select_affected(self, type_defs: List[TypeDefBase], changed_keys: Set[RegKey]) \
+            -> Tuple[List[TypeDefBase], Set[Tuple[str, ...]]]:
+        """Types to regenerate for a set of changed keys, with the shared namespace headers to rewrite"""
+        from schema_parser.dependency_graph import DependencyGraph
+        with self.stats.measure('dependency_graph'):
+            affected = DependencyGraph(self.type_registry).get_affected(changed_keys)
+        # shared namespace headers are always rewritten whole, so they need all of their types. The headers that held
+        # changed keys in the previous run are rewritten too, as the types may have been removed from them
+        shared_namespaces = {tuple(t.namespaces) for t in type_defs
+                             if t.reg_key in affected and t.kind not in OWN_FILE_KINDS}
+        for key in changed_keys:
+            namespaces, is_shared, _files = self._key_outputs.get(key, ((), False, []))
+            if is_shared:
+                shared_namespaces.add(namespaces)
+        selected = [t for t in type_defs if t.reg_key in affected or
+                    (t.kind not in OWN_FILE_KINDS and tuple(t.namespaces) in shared_namespaces)]
+        return selected, shared_namespaces
+
+    def _remove_output(self, file_path: str):
+        self._generated_files.discard(file_path)
+        self._output_sources.pop(file_path, None)
+        try:
+            os.remove(file_path)
+            self.output_summary.removed += 1
+        except FileNotFoundError:
+            pass
+
+    def _remove_dropped_outputs(self, type_defs: List[TypeDefBase], changed_keys: Set[RegKey],
+                                shared_namespaces: Set[Tuple[str, ...]],
+                                prev_key_outputs: Dict[RegKey, Tuple[Tuple[str, ...], bool, List[str]]]):
+        """Remove the outputs of changed keys that an incremental run didn't generate again (removed types, or types
+        moved to another namespace or file), and the shared namespace headers left without types"""
+        generated_keys = {t.reg_key for t in type_defs}
+        for key in changed_keys - generated_keys:
+            self._key_outputs.pop(key, None)
+        live_files = {file_path for _ns, _is_shared, files in self._key_outputs.values() for file_path in files}
+        for _namespaces, _is_shared, files in prev_key_outputs.values():
+            for file_path in files:
+                if file_path not in live_files:
+                    self._remove_output(file_path)
+        written_namespaces = {tuple(t.namespaces) for t in type_defs if t.kind not in OWN_FILE_KINDS}
+        for namespaces in shared_namespaces - written_namespaces:
+            self._remove_output(str(self._get_type_header_path(list(namespaces))))
+
+    def _generate(self, type_defs: List[TypeDefBase], workers: int, is_complete: bool):
+        if is_complete:
+            # outputs of earlier runs of this generator are superseded
+            self._generated_files = set()
+            self._output_sources = {}
+            self._key_outputs = {}
+        self._write_support_files()
+        if workers > 1 and len(type_defs) > 1:
+            emitted_types = iter(self._emit_parallel(type_defs, workers))
+        else:
+            emitted_types = (self.emit_type(type_def) for type_def in type_defs)
+
+        # shared type headers are written as soon as the last type of their namespace is applied, so that their
+        # buffers don't pile up until the end of the run
+        pending_shared_types: Dict[str, int] = {}
+        for type_def in type_defs:
+            if type_def.kind not in OWN_FILE_KINDS:
+                ns_key = TypeHeaderWriter._make_ns_key(type_def.namespaces)
+                pending_shared_types[ns_key] = pending_shared_types.get(ns_key, 0) + 1
+
+        for type_def, emitted in zip(type_defs, emitted_types):
+            self._apply_emitted(emitted)
+            self._key_outputs[type_def.reg_key] = (tuple(type_def.namespaces), type_def.kind not in OWN_FILE_KINDS,
+                                                   [str(file_path) for file_path, _content, _kind in emitted.files])
+            if type_def.kind not in OWN_FILE_KINDS:
+                ns_key = TypeHeaderWriter._make_ns_key(type_def.namespaces)
+                pending_shared_types[ns_key] -= 1
+                if pending_shared_types[ns_key] == 0 and ns_key in self.type_header_writer.namespaces:
+                    self._write_type_header(self.type_header_writer.namespaces[ns_key])
+            if emitted.error is not None:
+                if 'AudioPatchConfigId' in emitted.error:
                     continue
+                print(emitted.error)
 
-                try:
-                    cpp_type_meta = self.get_cpp_type(type_def)
-                    cpp_type = cpp_type_meta(type_def)
-                    self._generate_header(cpp_type_meta, cpp_type, type_def)
-                    if isinstance(type_def, (StructType, ExtendedVariant)):
-                        self._generate_cpp(cpp_type)
-                except Exception as ex:
-                    if 'AudioPatchConfigId' in str(ex):
-                        continue
-                    print(ex)
-
-        # write shared type header
-        for ns_key, namespaces in self.type_header_writer.namespaces.items():
+        if self.remove_stale and is_complete:
+            self._remove_stale_files()
+
+    def _get_type_header_path(self, namespaces: List[str]) -> pathlib.Path:
+        return self.get_header_file_path(namespaces, f'Types{namespaces[-1].capitalize()}')
+
+    def _write_type_header(self, namespaces: List[str]):
+        ns_key = TypeHeaderWriter._make_ns_key(namespaces)
+        with self.stats.measure('emit', TypeHeaderWriter.__name__):
             header_writer = HeaderCodeWriter(self.type_header_writer.get_type_header_buffer(namespaces))
             header_writer.include_headers.extend(self.type_header_writer.get_type_header_includes(namespaces))
-            header_path = self.get_header_file_path(namespaces, f'Types{namespaces[-1].capitalize()}')
-            pathlib.Path(header_path.parent).mkdir(parents=True, exist_ok=True)
-            with open(header_path, 'w') as header_file:
-                header_file.write(header_writer.str())
+            header_path = self._get_type_header_path(namespaces)
+            self._write_file(header_path, header_writer, TypeHeaderWriter.__name__,
+                             list(self._namespace_dependency_keys.get(ns_key, {})))
+        self.type_header_writer.remove_namespace(namespaces)
+
+    def _prepare_generation(self) -> List[TypeDefBase]:
+        self.type_header_writer = TypeHeaderWriter()
+        self._namespace_dependency_keys = {}
+        with self.stats.measure('resolve_refs'):
+            self.type_registry.resolve_refs(strict=False)
+        return self._get_build_order()
+
+    def generate_code(self, workers: int = 1, changed_keys: Union[Iterable[RegKey], None] = None):
+        """Generate all types, or only the types affected by a set of changed registry keys
+
+        When changed keys are given, outputs of unaffected types are left as they are. Outputs of changed keys that
+        are no longer generated (removed types, moved to another namespace or file) are removed if they were generated
+        by an earlier run of this generator; other stale files are not, as the outputs of this run are not the complete
+        set."""
+        type_defs = self._prepare_generation()
+        if changed_keys is None:
+            self._generate(type_defs, workers, True)
+            return
+        changed_keys = set(changed_keys)
+        type_defs, shared_namespaces = self._select_affected(type_defs, changed_keys)
+        prev_key_outputs = {key: self._key_outputs[key] for key in changed_keys if key in self._key_outputs}
+        self._generate(type_defs, workers, False)
+        self._remove_dropped_outputs(type_defs, changed_keys, shared_namespaces, prev_key_outputs)
+
+    def generate_tree(self, root_uris: List[str], workers: int = 1):
+        """Generate only the given root types and the types they depend on (through members, array elements, variant
+        members and references). Shared namespace headers contain just the needed subset."""
+        from schema_parser.dependency_graph import DependencyGraph
+        type_defs = self._prepare_generation()
+        with self.stats.measure('dependency_graph'):
+            required = DependencyGraph(self.type_registry).get_required(RegKey.from_uri(uri) for uri in root_uris)
+        self._generate([t for t in type_defs if t.reg_key in required], workers, True)
+
+    def _get_schema_files(self, dependency_keys: List[RegKey]) -> List[str]:
+        source_files = (self.type_registry.get_source_file(key) for key in dependency_keys if key in self.type_registry)
+        return list(dict.fromkeys(source_file for source_file in source_files if source_file is not None))
+
+    def write_manifest(self, file_path: str):
+        """Write a JSON manifest mapping every generated file to the schema files and registry keys it came from"""
+        import hashlib
+        import json
+
+        outputs = {}
+        schema_files = {}
+        for output_path, (content_hash, dependency_keys) in sorted(self._output_sources.items()):
+            output_schema_files = self._get_schema_files(dependency_keys)
+            outputs[output_path] = {
+                'sha256': content_hash,
+                'reg_keys': [str(key) for key in dependency_keys],
+                'schema_files': output_schema_files,
+            }
+            for schema_file in output_schema_files:
+                if schema_file not in schema_files:
+                    try:
+                        with open(schema_file, 'rb') as s_file:
+                            schema_files[schema_file] = hashlib.sha256(s_file.read()).hexdigest()
+                    except FileNotFoundError:
+                        schema_files[schema_file] = None
+
+        with open(file_path, 'w') as manifest_file:
+            json.dump({
+                'generator_version': configs.GENERATOR_VERSION,
+                'schema_files': schema_files,
+                'outputs': outputs,
+            }, manifest_file, indent=4)
+
+    @staticmethod
+    def _escape_depfile_path(path: str) -> str:
+        return path.replace(' ', '\\ ').replace('#', '\\#').replace('$', '$$')
+
+    def write_depfile(self, file_path: str):
+        """Write a Makefile/Ninja style depfile listing the schema files each generated file depends on"""
+        with open(file_path, 'w') as depfile:
+            for output_path, (_content_hash, dependency_keys) in sorted(self._output_sources.items()):
+                deps = ' '.join(self._escape_depfile_path(schema_file)
+                                for schema_file in self._get_schema_files(dependency_keys))
+                depfile.write(f"{self._escape_depfile_path(output_path)}: {deps}\n")
+
+
+class ParserCodeGenerator(CodeGenerator):
+    """C++ backend generating a dedicated parser per struct for FromJson (see ReadJsonWriter), nlohmann::json is only
+    used for ToJson (the 'cpp' backend stays the nlohmann based fallback)"""
+
+    def __init__(self, type_registry: TypeRegistry, src_root_dir: str, header_dir: str, cpp_dir: str,
+                 stats: Union[PipelineStats, None] = None):
+        super().__init__(type_registry, src_root_dir, header_dir, cpp_dir, stats)
+        self.parse_from_json = True
@@ -1,17 +1,26 @@
 from __future__ import annotations
 
-from typing import List
+from collections import deque
+from typing import Deque, Iterable, Iterator, List, Tuple, Union
 
 UNIT_INDENT = ' ' * 4
 
+# a segment is either a line (with its indentation prefix) or a block of nested segments sharing a prefix
+Segment = Union[str, Tuple[str, tuple]]
+
 
 class LineBuffer:
-    _lines: List[str]
+    """Buffer of code lines
+
+    Lines are stored as segments along with the indentation prefix they were added with. Appended buffers are kept
+    as nested blocks instead of being copied line by line, and prefixes are only resolved once when rendering, so the
+    cost of building nested code is linear in the output size."""
+    _segments: Deque[Segment]
     _indent_level: int
     _prefix: str
 
     def __init__(self, indent: int, *lines):
-        self._lines = list(lines)
+        self._segments = deque(lines)
         self._indent_level = indent
         self._prefix = self.get_indent_prefix(self._indent_level)
 
@@ -34,30 +43,86 @@ class LineBuffer:
         self._prefix = self.get_indent_prefix(self._indent_level)
 
     def prepend(self, *lines):
-        for line in reversed(lines):
-            self._lines.insert(0, line)
+        self._segments.extendleft(reversed(lines))
 
     def append(self, line: str):
-        self._lines.append(self._prefix + line)
+        self._segments.append(self._prefix + line)
+
+    def _pop_last_line(self) -> str:
+        """Remove the last line (with its full prefix), splitting up trailing blocks as needed"""
+        if not self._segments:
+            raise IndexError("pop from empty LineBuffer")
+        item = self._segments.pop()
+        prefix = ''
+        # blocks are shared (immutable), so peel them instead of modifying in place
+        while type(item) is not str:
+            block_prefix, block = item
+            prefix += block_prefix
+            if len(block) > 1:
+                self._segments.append((prefix, block[:-1]))
+            item = block[-1]
+        return prefix + item
 
     def extend_last(self, segment: str):
-        self._lines[-1] += segment
+        self._segments.append(self._pop_last_line() + segment)
 
     def append_buffer(self, buffer: LineBuffer):
-        self._lines.extend([self._prefix + line for line in buffer._lines])
+        # empty buffers are skipped, so that every block holds at least one line
+        if buffer._segments:
+            self._segments.append((self._prefix, tuple(buffer._segments)))
 
     def pop(self):
-        self._lines.pop()
+        self._pop_last_line()
 
     def new_line(self):
-        self._lines.append("")
+        self._segments.append('')
+
+    def iter_lines(self, indent_offset=0) -> Iterator[str]:
+        stack = [(self.get_indent_prefix(indent_offset), iter(self._segments))]
+        while stack:
+            base_prefix, segments = stack[-1]
+            for item in segments:
+                if type(item) is str:
+                    yield base_prefix + item
+                else:
+                    stack.append((base_prefix + item[0], iter(item[1])))
+                    break
+            else:
+                stack.pop()
+
+    def lines(self, indent_offset=0) -> List[str]:
+        return list(self.iter_lines(indent_offset))
 
     def str(self, indent_offset=0):
-        indent_prefix = self.get_indent_prefix(indent_offset)
-        return '\n'.join([indent_prefix + line for line in self._lines])
+        return '\n'.join(self.iter_lines(indent_offset))
 
     def __len__(self):
-        return len(self._lines)
+        count = 0
+        pending = [self._segments]
+        while pending:
+            for item in pending.pop():
+                if type(item) is str:
+                    count += 1
+                else:
+                    pending.append(item[1])
+        return count
+
+    def __bool__(self):
+        return bool(self._segments)
+
+
+def iter_text_chunks(lines: Iterable[str], chunk_lines=1024) -> Iterator[str]:
+    """Join lines with new lines (same as '\\n'.join), yielding the text in chunks of a bounded number of lines"""
+    separator = ''
+    batch: List[str] = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= chunk_lines:
+            yield separator + '\n'.join(batch)
+            separator = '\n'
+            batch = []
+    if batch:
+        yield separator + '\n'.join(batch)
 
 
 class IndentedBlock:
@@ -0,0 +1,48 @@
+import importlib
+from typing import Any, Dict, Hashable, List, Union
+
+
+def load_plugin(import_path: str) -> Any:
+    """Import a 'module:attribute' path"""
+    module_name, _, attribute = import_path.partition(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class PluginRegistry:
+    """Plugins by name, registered either as objects or as 'module:attribute' import paths, which are only imported on
+    first use (keeps startup cheap for runs that need a single plugin)"""
+    _plugins: Dict[Hashable, Any]
+    _pending: Dict[Hashable, str]
+
+    def __init__(self, import_paths: Union[Dict[Hashable, str], None] = None):
+        self._plugins = {}
+        self._pending = dict(import_paths) if import_paths else {}
+
+    def register(self, name: Hashable, plugin: Any):
+        self._plugins[name] = plugin
+        self._pending.pop(name, None)
+
+    def register_lazy(self, name: Hashable, import_path: str):
+        self._plugins.pop(name, None)
+        self._pending[name] = import_path
+
+    def get(self, name: Hashable) -> Any:
+        plugin = self._plugins.get(name)
+        if plugin is None:
+            if name not in self._pending:
+                raise KeyError(f"No such plugin: {name}")
+            plugin = self._plugins[name] = load_plugin(self._pending.pop(name))
+        return plugin
+
+    def names(self) -> List[Hashable]:
+        return list(dict.fromkeys([*self._plugins, *self._pending]))
+
+    def __contains__(self, name: Hashable):
+        return name in self._plugins or name in self._pending
+
+
+# code generation backends
+BACKENDS = PluginRegistry({
+    'cpp': 'code_generator.cpp_code_generator:CodeGenerator',
+    'cpp_parser': 'code_generator.cpp_code_generator:ParserCodeGenerator',
+})
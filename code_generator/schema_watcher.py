@@ -0,0 +1,103 @@
+import hashlib
+import os
+import time
+from typing import Dict, List, Tuple, Union
+
+from code_generator.cpp_code_generator import CodeGenerator, OutputSummary
+from schema_parser.schema_batch_parser import SchemaBatchParser
+
+
+class SchemaWatcher:
+    """Keeps the parsed registry in memory and regenerates the code affected by edited schema files
+
+    Schema files are polled by modification time; a file whose time changed is only re-parsed if its content hash
+    changed too. Outputs are written only if their content changed."""
+    batch_parser: SchemaBatchParser
+    code_generator: CodeGenerator
+    ns_offset: List[str]
+    poll_interval: float
+    _file_mtimes: Dict[str, Union[Tuple[int, int], None]]
+    _file_hashes: Dict[str, Union[str, None]]
+
+    def __init__(self, batch_parser: SchemaBatchParser, code_generator: CodeGenerator, ns_offset: List[str],
+                 poll_interval: float = 0.5):
+        self.batch_parser = batch_parser
+        self.code_generator = code_generator
+        self.ns_offset = ns_offset
+        self.poll_interval = poll_interval
+        self._file_mtimes = {}
+        self._file_hashes = {}
+        self.code_generator.write_if_changed = True
+
+    @staticmethod
+    def _get_mtime(abs_path: str) -> Union[Tuple[int, int], None]:
+        try:
+            stat = os.stat(abs_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _get_hash(abs_path: str) -> Union[str, None]:
+        try:
+            with open(abs_path, 'rb') as schema_file:
+                return hashlib.sha256(schema_file.read()).hexdigest()
+        except FileNotFoundError:
+            return None
+
+    def _get_changed_files(self) -> List[str]:
+        changed_files = []
+        for schema_file_path, abs_path in self.batch_parser.get_schema_file_paths().items():
+            mtime = self._get_mtime(abs_path)
+            if mtime == self._file_mtimes.get(schema_file_path):
+                continue
+            self._file_mtimes[schema_file_path] = mtime
+            if self._get_hash(abs_path) != self._file_hashes.get(schema_file_path):
+                changed_files.append(schema_file_path)
+        return changed_files
+
+    def _mark_parsed(self, schema_files: List[str]):
+        schema_file_paths = self.batch_parser.get_schema_file_paths()
+        for schema_file_path in schema_files:
+            self._file_hashes[schema_file_path] = self._get_hash(schema_file_paths[schema_file_path])
+
+    def start(self):
+        """Parse all schema files and generate all code"""
+        schema_files = list(self.batch_parser.get_schema_file_paths())
+        for schema_file_path, abs_path in self.batch_parser.get_schema_file_paths().items():
+            self._file_mtimes[schema_file_path] = self._get_mtime(abs_path)
+        self.batch_parser.reparse(self.ns_offset, schema_files)
+        self._mark_parsed(schema_files)
+        self.code_generator.output_summary = OutputSummary()
+        self.code_generator.generate_code()
+
+    def poll(self) -> bool:
+        """Regenerate code affected by schema files changed since the last poll. Returns whether anything changed"""
+        changed_files = self._get_changed_files()
+        if not changed_files:
+            return False
+
+        start_time = time.perf_counter()
+        try:
+            changed_keys = self.batch_parser.reparse(self.ns_offset, changed_files)
+        except Exception as ex:
+            # keep the last good state, the file is retried on its next modification
+            print(f"Failed re-parsing schema files {changed_files} [{ex}]", flush=True)
+            return False
+        self._mark_parsed(changed_files)
+
+        self.code_generator.output_summary = OutputSummary()
+        self.code_generator.generate_code(changed_keys=changed_keys)
+        summary = self.code_generator.output_summary
+        print(f"Regenerated for {changed_files} in {time.perf_counter() - start_time:.3f}s "
+              f"[written: {summary.written}, unchanged: {summary.unchanged}, removed: {summary.removed}]", flush=True)
+        return True
+
+    def run(self):
+        self.start()
+        try:
+            while True:
+                time.sleep(self.poll_interval)
+                self.poll()
+        except KeyboardInterrupt:
+            pass
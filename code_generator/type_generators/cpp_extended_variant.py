@@ -1,4 +1,4 @@
-from typing import Set
+from typing import List, Set
 
 from code_generator.line_buffer import LineBuffer, IndentedBlock
 from code_generator.type_generators.cpp_array_alias import CppArrayAlias
@@ -7,34 +7,58 @@ from code_generator.type_generators.cpp_extended_variant_utils.from_json_generat
 from code_generator.type_generators.cpp_extended_variant_utils.to_json_generator import ToJsonWriter
 from code_generator.type_generators.cpp_simple_alias import CppSimpleAlias
 from code_generator.type_generators.cpp_type_base import CppTypeBase
+from code_generator.type_generators.kind_dispatch import KindDispatch
 from schema_parser.type_defs.array_alias import ArrayAlias
 from schema_parser.type_defs.extended_variant import ExtendedVariant
-from schema_parser.type_defs.ref_type import RefType
 from schema_parser.type_defs.simple_alias import SimpleAlias
-from schema_parser.type_defs.struct_type import StructType
+from schema_parser.type_defs.type_def_base import TypeDefBase, TypeDefKind
 from schema_parser.type_registry import TypeRegistry
 
 
+def _simple_member_type(member_type_def: SimpleAlias, _type_registry: TypeRegistry) -> str:
+    return CppSimpleAlias(member_type_def).actual_type()
+
+
+def _array_member_type(member_type_def: ArrayAlias, type_registry: TypeRegistry) -> str:
+    return CppArrayAlias(member_type_def).actual_type(type_registry)
+
+
+def _omitted_member_type(_member_type_def: TypeDefBase, _type_registry: TypeRegistry) -> None:
+    # TODO: struct members (type name) and references (type name of the target) are not generated yet
+    return None
+
+
 class CppExtendedVariant(CppTypeBase):
     type_def: ExtendedVariant
-    base_classes: Set[str]
-    member_methods: Set[str]
+    # in declaration order
+    base_classes: List[str]
+    member_methods: List[str]
     header_includes: Set[str]
     cpp_includes: Set[str]
 
     def __init__(self, type_def: ExtendedVariant):
         super().__init__(type_def)
         self.type_def = type_def
-        self.base_classes = set()
-        self.member_methods = set()
+        self.base_classes = []
+        self.member_methods = []
         self.header_includes = {'variant'}
         self.cpp_includes = {'nlohmann/json.hpp'}
 
     def add_base_class(self, class_name):
-        self.base_classes.add(class_name)
+        if class_name not in self.base_classes:
+            self.base_classes.append(class_name)
 
     def add_member_method(self, method_declaration):
-        self.member_methods.add(method_declaration)
+        if method_declaration not in self.member_methods:
+            self.member_methods.append(method_declaration)
+
+    # variant member kind -> C++ type of the variant member (None to leave the member out)
+    variant_member_types = KindDispatch({
+        TypeDefKind.SimpleAlias: _simple_member_type,
+        TypeDefKind.ArrayAlias: _array_member_type,
+        TypeDefKind.StructType: _omitted_member_type,
+        TypeDefKind.RefType: _omitted_member_type,
+    })
 
     def write_header(self, buffer: LineBuffer, type_registry: TypeRegistry) -> None:
         # generate extended struct
@@ -49,22 +73,12 @@ class CppExtendedVariant(CppTypeBase):
             suffix = ''
         variant_members = ['std::monostate']
         for member_type_def in self.type_def.content_variant.member_type_defs:
-            if isinstance(member_type_def, SimpleAlias):
-                cpp_alias = CppSimpleAlias(member_type_def)
-                variant_members.append(cpp_alias.actual_type())
-            elif isinstance(member_type_def, ArrayAlias):
-                cpp_array = CppArrayAlias(member_type_def)
-                variant_members.append(cpp_array.actual_type(type_registry))
-            elif isinstance(member_type_def, StructType):
-                #     cpp_struct = CppStruct(member_type_def)
-                #     variant_members.append(cpp_struct.type_def.type_name)
-                pass
-            elif isinstance(member_type_def, RefType):
-                #     target_type = type_registry.get_ref_target(member_type_def.target_uri)
-                #     variant_members.append(target_type.type_name)
-                pass
-            else:
+            member_type_fn = self.variant_member_types.get(member_type_def)
+            if member_type_fn is None:
                 raise TypeError(f"Unsupported struct member type: [{member_type_def}]")
+            member_type = member_type_fn(member_type_def, type_registry)
+            if member_type is not None:
+                variant_members.append(member_type)
 
         buffer.append(f"struct {self.type_def.type_name}{suffix} : std::variant<{','.join(variant_members)}>")
         buffer.append("{")
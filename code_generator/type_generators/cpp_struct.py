@@ -1,4 +1,4 @@
-from typing import Set
+from typing import List, Set
 
 from code_generator.line_buffer import LineBuffer, IndentedBlock
 from code_generator.type_generators.cpp_array_alias import CppArrayAlias
@@ -6,9 +6,13 @@ from code_generator.type_generators.cpp_enum import CppEnum
 from code_generator.type_generators.cpp_extended_variant import CppExtendedVariant
 from code_generator.type_generators.cpp_ref_alias import CppRefAlias
 from code_generator.type_generators.cpp_simple_alias import CppSimpleAlias
-from code_generator.type_generators.cpp_struct_utils.from_json_generator import FromJsonWriter
-from code_generator.type_generators.cpp_struct_utils.to_json_generator import ToJsonWriter
+from code_generator.type_generators.cpp_struct_utils.from_json_generator import FromJsonWriter, \
+    KeyDispatchFromJsonWriter
+from code_generator.type_generators.cpp_struct_utils.push_json_generator import PushJsonWriter
+from code_generator.type_generators.cpp_struct_utils.read_json_generator import ReadJsonWriter
+from code_generator.type_generators.cpp_struct_utils.to_json_generator import ToJsonWriter, DirectToJsonWriter
 from code_generator.type_generators.cpp_type_base import CppTypeBase
+from code_generator.type_generators.kind_dispatch import KindDispatch
 from code_generator.type_generators.cpp_variant_alias import CppVariantAlias
 from schema_parser.type_defs.array_alias import ArrayAlias
 from schema_parser.type_defs.enum_type import EnumType
@@ -16,65 +20,111 @@ from schema_parser.type_defs.extended_variant import ExtendedVariant
 from schema_parser.type_defs.ref_type import RefType
 from schema_parser.type_defs.simple_alias import SimpleAlias
 from schema_parser.type_defs.struct_type import StructType
+from schema_parser.type_defs.type_def_base import TypeDefKind
 from schema_parser.type_defs.variant_alias import VariantAlias
 from schema_parser.type_registry import TypeRegistry
 
 
 class CppStruct(CppTypeBase):
     type_def: StructType
-    base_classes: Set[str]
-    member_methods: Set[str]
+    # in declaration order
+    base_classes: List[str]
+    member_methods: List[str]
     cpp_includes: Set[str]
+    # generate FromJson with a single pass over the json object (see KeyDispatchFromJsonWriter)
+    key_dispatch_from_json: bool
+    # generate ToJson writing the json text directly, instead of dumping a nlohmann::json (see DirectToJsonWriter)
+    direct_to_json: bool
+    # generate FromJson parsing the json text directly, instead of going through a nlohmann::json (see ReadJsonWriter)
+    parse_from_json: bool
+    # generate the handlers of the resumable json_push::Parser, for json fed in chunks (see PushJsonWriter)
+    push_parser: bool
+    # declare the json_stream element reader and writer of the struct (see JSON_STREAM_HEADER)
+    stream_elements: bool
 
     def __init__(self, type_def: StructType):
         super().__init__(type_def)
         self.type_def = type_def
-        self.base_classes = set()
-        self.member_methods = set()
+        self.base_classes = []
+        self.member_methods = []
         self.header_includes = set()
         self.cpp_includes = {'nlohmann/json.hpp'}
+        self.key_dispatch_from_json = False
+        self.direct_to_json = False
+        self.parse_from_json = False
+        self.push_parser = False
+        self.stream_elements = False
 
     def add_base_class(self, class_name):
-        self.base_classes.add(class_name)
+        if class_name not in self.base_classes:
+            self.base_classes.append(class_name)
 
     def add_member_method(self, method_declaration):
-        self.member_methods.add(method_declaration)
+        if method_declaration not in self.member_methods:
+            self.member_methods.append(method_declaration)
+
+    def _write_simple_member(self, type_def: SimpleAlias, var_buffer: LineBuffer, _type_buffer: LineBuffer,
+                             type_registry: TypeRegistry):
+        cpp_alias = CppSimpleAlias(type_def)
+        var_buffer.append(f"{cpp_alias.actual_type()} {type_def.type_name};")
+        self.header_includes.update(cpp_alias.get_include_headers(type_registry))
+
+    def _write_array_member(self, type_def: ArrayAlias, var_buffer: LineBuffer, _type_buffer: LineBuffer,
+                            type_registry: TypeRegistry):
+        cpp_array = CppArrayAlias(type_def)
+        var_buffer.append(f"{cpp_array.actual_type(type_registry)} {type_def.type_name};")
+        self.header_includes.update(cpp_array.get_include_headers(type_registry))
+
+    def _write_variant_member(self, type_def: VariantAlias, var_buffer: LineBuffer, _type_buffer: LineBuffer,
+                              type_registry: TypeRegistry):
+        cpp_variant = CppVariantAlias(type_def)
+        var_buffer.append(f"{cpp_variant.actual_type(type_registry)} {type_def.type_name};")
+        self.header_includes.update(cpp_variant.get_include_headers(type_registry))
+
+    def _write_enum_member(self, type_def: EnumType, _var_buffer: LineBuffer, type_buffer: LineBuffer,
+                           type_registry: TypeRegistry):
+        cpp_enum = CppEnum(type_def)
+        cpp_enum.write_header(type_buffer, type_registry)
+        type_buffer.new_line()
+
+    def _write_struct_member(self, type_def: StructType, _var_buffer: LineBuffer, type_buffer: LineBuffer,
+                             type_registry: TypeRegistry):
+        cpp_struct = CppStruct(type_def)
+        cpp_struct.write_header(type_buffer, type_registry)
+        type_buffer.new_line()
+        self.header_includes.update(cpp_struct.header_includes)
+
+    def _write_extended_variant_member(self, type_def: ExtendedVariant, _var_buffer: LineBuffer,
+                                       type_buffer: LineBuffer, type_registry: TypeRegistry):
+        cpp_struct = CppExtendedVariant(type_def)
+        cpp_struct.write_header(type_buffer, type_registry)
+        type_buffer.new_line()
+        self.header_includes.update(cpp_struct.header_includes)
+
+    def _write_ref_member(self, type_def: RefType, var_buffer: LineBuffer, _type_buffer: LineBuffer,
+                          type_registry: TypeRegistry):
+        cpp_ref_alias = CppRefAlias(type_def)
+        var_buffer.append(f"{cpp_ref_alias.target_type(type_registry)} {type_def.type_name};")
+
+    # member kind -> writer of the member variable (or inner type)
+    member_writers = KindDispatch({
+        TypeDefKind.SimpleAlias: _write_simple_member,
+        TypeDefKind.ArrayAlias: _write_array_member,
+        TypeDefKind.VariantAlias: _write_variant_member,
+        TypeDefKind.EnumType: _write_enum_member,
+        TypeDefKind.StructType: _write_struct_member,
+        TypeDefKind.ExtendedVariantType: _write_extended_variant_member,
+        TypeDefKind.RefType: _write_ref_member,
+    })
 
     def write_header(self, buffer: LineBuffer, type_registry: TypeRegistry) -> None:
         var_buffer = LineBuffer(0)
         type_buffer = LineBuffer(0)
         for type_def in self.type_def.members:
-            if isinstance(type_def, SimpleAlias):
-                cpp_alias = CppSimpleAlias(type_def)
-                var_buffer.append(f"{cpp_alias.actual_type()} {type_def.type_name};")
-                self.header_includes.update(cpp_alias.get_include_headers(type_registry))
-            elif isinstance(type_def, ArrayAlias):
-                cpp_array = CppArrayAlias(type_def)
-                var_buffer.append(f"{cpp_array.actual_type(type_registry)} {type_def.type_name};")
-                self.header_includes.update(cpp_array.get_include_headers(type_registry))
-            elif isinstance(type_def, VariantAlias):
-                cpp_variant = CppVariantAlias(type_def)
-                var_buffer.append(f"{cpp_variant.actual_type(type_registry)} {type_def.type_name};")
-                self.header_includes.update(cpp_variant.get_include_headers(type_registry))
-            elif isinstance(type_def, EnumType):
-                cpp_enum = CppEnum(type_def)
-                cpp_enum.write_header(type_buffer, type_registry)
-                type_buffer.new_line()
-            elif isinstance(type_def, StructType):
-                cpp_struct = CppStruct(type_def)
-                cpp_struct.write_header(type_buffer, type_registry)
-                type_buffer.new_line()
-                self.header_includes.update(cpp_struct.header_includes)
-            elif isinstance(type_def, ExtendedVariant):
-                cpp_struct = CppExtendedVariant(type_def)
-                cpp_struct.write_header(type_buffer, type_registry)
-                type_buffer.new_line()
-                self.header_includes.update(cpp_struct.header_includes)
-            elif isinstance(type_def, RefType):
-                cpp_ref_alias = CppRefAlias(type_def)
-                var_buffer.append(f"{cpp_ref_alias.target_type(type_registry)} {type_def.type_name};")
-            else:
+            member_writer = self.member_writers.get(type_def)
+            if member_writer is None:
                 raise TypeError(f"Unsupported struct member type: [{type_def}]")
+            member_writer(self, type_def, var_buffer, type_buffer, type_registry)
 
         # generate struct
         if self.type_def.namespaces:
@@ -107,10 +157,29 @@ class CppStruct(CppTypeBase):
                 buffer.pop()
 
         buffer.append('};')
+        if self.stream_elements:
+            type_name = self.type_def.type_name
+            buffer.new_line()
+            buffer.append(f"using {type_name}StreamReader = json_stream::ElementReader<{type_name}>;")
+            buffer.append(f"using {type_name}StreamWriter = json_stream::ElementWriter<{type_name}>;")
         if self.type_def.namespaces:
             buffer.indent_down()
             buffer.append('}  // namespace ' + '::'.join(self.type_def.namespaces))
 
+    def _write_push_methods(self, buffer: LineBuffer):
+        type_name = self.type_def.type_name
+        for declaration, call in (
+                (f"void {type_name}::PushOpen(json_push::Parser& parser)", 'internal::PushOpen(parser, *this);'),
+                (f"json_push::Target {type_name}::PushKey(json_push::Parser& parser, std::string_view key)",
+                 'return internal::PushKey(parser, *this, key);'),
+                (f"void {type_name}::PushClose(json_push::Parser& parser)", 'internal::PushClose(parser, *this);')):
+            buffer.new_line()
+            buffer.append(declaration)
+            buffer.append("{")
+            with IndentedBlock(buffer):
+                buffer.append(call)
+            buffer.append("}")
+
     def write_source(self, buffer: LineBuffer, type_registry: TypeRegistry):
         if self.type_def.namespaces:
             buffer.append('namespace ' + '::'.join(self.type_def.namespaces))
@@ -122,13 +191,33 @@ class CppStruct(CppTypeBase):
         buffer.append("{")
         with IndentedBlock(buffer):
             # internal ToJson
-            tjw = ToJsonWriter(buffer, type_registry, self.type_def)
+            if self.direct_to_json:
+                tjw = DirectToJsonWriter(buffer, type_registry, self.type_def)
+                self.cpp_includes.add('string')
+            else:
+                tjw = ToJsonWriter(buffer, type_registry, self.type_def)
             tjw.write_function()
 
             # internal FromJson
-            fjw = FromJsonWriter(buffer, type_registry, self.type_def)
+            if self.parse_from_json:
+                fjw = ReadJsonWriter(buffer, type_registry, self.type_def)
+                self.cpp_includes.update(('bitset', 'cstddef', 'stdexcept', 'string', 'string_view'))
+                if self.direct_to_json:
+                    # neither direction goes through a nlohmann::json
+                    self.cpp_includes.discard('nlohmann/json.hpp')
+            elif self.key_dispatch_from_json:
+                fjw = KeyDispatchFromJsonWriter(buffer, type_registry, self.type_def)
+                self.cpp_includes.update(('bitset', 'stdexcept', 'string'))
+            else:
+                fjw = FromJsonWriter(buffer, type_registry, self.type_def)
             fjw.write_function()
 
+            # internal push parser handlers
+            if self.push_parser:
+                buffer.new_line()
+                PushJsonWriter(buffer, type_registry, self.type_def).write_function()
+                self.cpp_includes.update(('stdexcept', 'string', 'string_view'))
+
         buffer.append("}")
         buffer.new_line()
 
@@ -136,17 +225,47 @@ class CppStruct(CppTypeBase):
         buffer.append(f"std::string {self.type_def.type_name}::ToJson() const")
         buffer.append("{")
         with IndentedBlock(buffer):
-            buffer.append('return internal::ToJson(*this).dump();')
+            if self.direct_to_json:
+                buffer.append('std::string out;')
+                buffer.append(f'out.reserve({tjw.size_estimate()});')
+                buffer.append('AppendJson(out);')
+                buffer.append('return out;')
+            else:
+                buffer.append('return internal::ToJson(*this).dump();')
         buffer.append("}")
         buffer.new_line()
 
+        if self.direct_to_json:
+            buffer.append(f"void {self.type_def.type_name}::AppendJson(std::string& out) const")
+            buffer.append("{")
+            with IndentedBlock(buffer):
+                buffer.append('internal::AppendJson(out, *this);')
+            buffer.append("}")
+            buffer.new_line()
+
         # public FromJson
         buffer.append(f"void {self.type_def.type_name}::FromJson(std::string const& js)")
         buffer.append("{")
         with IndentedBlock(buffer):
-            buffer.append('internal::FromJson(*this, nlohmann::json::parse(js));')
+            if self.parse_from_json:
+                buffer.append('json_reader::Reader reader(js);')
+                buffer.append('ReadJson(reader);')
+                buffer.append('reader.ExpectEnd();')
+            else:
+                buffer.append('internal::FromJson(*this, nlohmann::json::parse(js));')
         buffer.append("}")
 
+        if self.parse_from_json:
+            buffer.new_line()
+            buffer.append(f"void {self.type_def.type_name}::ReadJson(json_reader::Reader& reader)")
+            buffer.append("{")
+            with IndentedBlock(buffer):
+                buffer.append('internal::ReadJson(reader, *this);')
+            buffer.append("}")
+
+        if self.push_parser:
+            self._write_push_methods(buffer)
+
         if self.type_def.namespaces:
             buffer.indent_down()
             buffer.append('}  // namespace ' + '::'.join(self.type_def.namespaces))
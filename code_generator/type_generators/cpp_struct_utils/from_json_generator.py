@@ -1,15 +1,15 @@
-from typing import Union
+from typing import Dict, List, Tuple, Union
 
 from code_generator.line_buffer import LineBuffer, IndentedBlock
 from code_generator.type_generators.cpp_array_alias import CppArrayAlias
 from code_generator.type_generators.cpp_simple_alias import CppSimpleAlias
+from code_generator.type_generators.kind_dispatch import KindDispatch
 from schema_parser.type_defs.array_alias import ArrayAlias
 from schema_parser.type_defs.enum_type import EnumType
-from schema_parser.type_defs.extended_variant import ExtendedVariant
 from schema_parser.type_defs.ref_type import RefType
 from schema_parser.type_defs.simple_alias import SimpleAlias
 from schema_parser.type_defs.struct_type import StructType
-from schema_parser.type_defs.type_def_base import TypeDefBase
+from schema_parser.type_defs.type_def_base import TypeDefBase, TypeDefKind
 from schema_parser.type_defs.variant_alias import VariantAlias
 from schema_parser.type_registry import TypeRegistry
 
@@ -18,11 +18,14 @@ class FromJsonWriter:
     buffer: LineBuffer
     type_registry: TypeRegistry
     container_struct: StructType
+    _variant_type_enum: Union[EnumType, None]
 
     def __init__(self, buffer: LineBuffer, type_registry: TypeRegistry, container_struct: StructType):
         self.buffer = buffer
         self.type_registry = type_registry
         self.container_struct = container_struct
+        # looked up once per struct (not per variant case)
+        self._variant_type_enum = self._find_variant_type_enum()
 
     def write_function(self):
         self.buffer.append(f"void FromJson({self.container_struct.type_name}& m, nlohmann::json const& j)")
@@ -31,13 +34,17 @@ class FromJsonWriter:
             self._write_body()
         self.buffer.append("}")
 
-    def _get_variant_type_enum(self) -> Union[EnumType, None]:
-        type_enums = [m for m in self.container_struct.members if isinstance(m, EnumType) and m.type_name == 'Type']
+    def _find_variant_type_enum(self) -> Union[EnumType, None]:
+        type_enums = [m for m in self.container_struct.members
+                      if m.kind == TypeDefKind.EnumType and m.type_name == 'Type']
         if type_enums:
             assert len(type_enums) == 1
             return type_enums[0]
         return None
 
+    def _get_variant_type_enum(self) -> Union[EnumType, None]:
+        return self._variant_type_enum
+
     def _get_variant_case_type_member(self, case_id: int) -> Union[str, int]:
         var_type_enum = self._get_variant_type_enum()
         if not var_type_enum:
@@ -46,28 +53,30 @@ class FromJsonWriter:
 
     def _write_body(self):
         for member_def in self.container_struct.members:
-            if isinstance(member_def, SimpleAlias):
-                self._load_simple_member(member_def.type_name)
-            elif isinstance(member_def, ArrayAlias):
-                self._load_simple_member(member_def.type_name)
-            elif isinstance(member_def, RefType):
-                self._load_ref_member(member_def)
-            elif isinstance(member_def, VariantAlias):
-                self._load_variant_member(member_def)
-            elif isinstance(member_def, (EnumType, StructType, ExtendedVariant)):
-                pass
-            else:
+            member_loader = self.member_loaders.get(member_def)
+            if member_loader is None:
                 raise TypeError(f"Unsupported member type: {member_def}")
+            member_loader(self, member_def)
+
+    def _skip_member(self, _member: TypeDefBase):
+        pass
+
+    def _load_value_member(self, member: TypeDefBase):
+        self._load_simple_member(member.type_name)
+
+    def _json_value(self, key: str) -> str:
+        """Expression of the json value of a (non variant) member"""
+        return f'j.at("{key}")'
 
     def _load_simple_member(self, member_name: str):
-        self.buffer.append(f'm.{member_name} = j.at("{member_name}").get<decltype(m.{member_name})>();')
+        self.buffer.append(f'm.{member_name} = {self._json_value(member_name)}.get<decltype(m.{member_name})>();')
 
     def _load_ref_member(self, member: RefType):
         target_type = self.type_registry.get_ref_target(member.target_uri)
-        if isinstance(target_type, EnumType):
+        if target_type.kind == TypeDefKind.EnumType:
             self._load_simple_member(member.type_name)
-        elif isinstance(target_type, StructType):
-            self.buffer.append(f'internal::FromJson(m.{member.type_name}, j.at("{member.type_name}"))')
+        elif target_type.kind == TypeDefKind.StructType:
+            self.buffer.append(f'internal::FromJson(m.{member.type_name}, {self._json_value(member.type_name)});')
 
     def _load_variant_member(self, variant: VariantAlias):
         var_type_enum = self._get_variant_type_enum()
@@ -96,23 +105,180 @@ class FromJsonWriter:
 
     def _load_ref_variant_member_case(self, variant: VariantAlias, member: RefType):
         target_type = self.type_registry.get_ref_target(member.target_uri)
-        if isinstance(target_type, SimpleAlias):
-            self._load_simple_member(variant.type_name)
-        elif isinstance(target_type, EnumType):
-            self._load_simple_member(variant.type_name)
-        elif isinstance(target_type, StructType):
+        if target_type.kind in (TypeDefKind.SimpleAlias, TypeDefKind.EnumType):
+            self.buffer.append(f'm.{variant.type_name} = j.at("{variant.type_name}")'
+                               f'.get<decltype(m.{variant.type_name})>();')
+        elif target_type.kind == TypeDefKind.StructType:
             self.buffer.append(f'internal::FromJson(m.{variant.type_name}, j.at("{target_type.type_name}"))')
 
+    def _load_simple_variant_member_case(self, variant: VariantAlias, member: SimpleAlias):
+        cpp_simple_alias = CppSimpleAlias(member)
+        self.buffer.append(
+            f'm.{variant.type_name} = j.at("{variant.type_name}").get<{cpp_simple_alias.actual_type()}>();')
+
+    def _load_array_variant_member_case(self, variant: VariantAlias, member: ArrayAlias):
+        cpp_array_alias = CppArrayAlias(member)
+        self.buffer.append(f'm.{variant.type_name} = j.at("{variant.type_name}").'
+                           f'get<{cpp_array_alias.actual_type(self.type_registry)}>();')
+
+    def _load_struct_variant_member_case(self, _variant: VariantAlias, member: StructType):
+        self.buffer.append(f'internal::FromJson(m.{member.type_name}, j.at("{member.type_name}"))')
+
     def _load_variant_member_case(self, variant: VariantAlias, member: TypeDefBase):
-        if isinstance(member, SimpleAlias):
-            cpp_simple_alias = CppSimpleAlias(member)
-            self.buffer.append(
-                f'm.{variant.type_name} = j.at("{variant.type_name}").get<{cpp_simple_alias.actual_type()}>();')
-        elif isinstance(member, ArrayAlias):
-            cpp_array_alias = CppArrayAlias(member)
-            self.buffer.append(f'm.{variant.type_name} = j.at("{variant.type_name}").'
-                               f'get<{cpp_array_alias.actual_type(self.type_registry)}>();')
-        elif isinstance(member, StructType):
-            self.buffer.append(f'internal::FromJson(m.{member.type_name}, j.at("{member.type_name}"))')
-        elif isinstance(member, RefType):
-            self._load_ref_variant_member_case(variant, member)
+        case_loader = self.variant_case_loaders.get(member)
+        if case_loader is not None:
+            case_loader(self, variant, member)
+
+    # member kind -> loader of the member from the json object
+    member_loaders = KindDispatch({
+        TypeDefKind.SimpleAlias: _load_value_member,
+        TypeDefKind.ArrayAlias: _load_value_member,
+        TypeDefKind.RefType: _load_ref_member,
+        TypeDefKind.VariantAlias: _load_variant_member,
+        TypeDefKind.EnumType: _skip_member,
+        TypeDefKind.StructType: _skip_member,
+        TypeDefKind.ExtendedVariantType: _skip_member,
+    })
+
+    # variant member kind -> loader of a variant case (kinds without a loader leave the case empty)
+    variant_case_loaders = KindDispatch({
+        TypeDefKind.SimpleAlias: _load_simple_variant_member_case,
+        TypeDefKind.ArrayAlias: _load_array_variant_member_case,
+        TypeDefKind.StructType: _load_struct_variant_member_case,
+        TypeDefKind.RefType: _load_ref_variant_member_case,
+    })
+
+
+class KeyDispatchFromJsonWriter(FromJsonWriter):
+    """FromJson iterating the json object once and dispatching each key with a switch on its length (and on its first
+    character, where several members have the same length), instead of a j.at lookup per member. Members are
+    required, the ones found are tracked in a bitset and all missing members are reported at once. Unknown keys are
+    ignored.
+
+    Variant members are still looked up after the pass, as how they are loaded depends on other members (type enum)."""
+
+    def _json_value(self, _key: str) -> str:
+        return 'value'
+
+    def _write_body(self):
+        dispatched_members: List[Tuple[str, LineBuffer]] = []
+        variant_members: List[VariantAlias] = []
+        for member_def in self.container_struct.members:
+            member_loader = self.member_loaders.get(member_def)
+            if member_loader is None:
+                raise TypeError(f"Unsupported member type: {member_def}")
+            if member_def.kind == TypeDefKind.VariantAlias:
+                variant_members.append(member_def)
+                continue
+
+            # members without loading code (inner types) are not dispatched
+            container_buffer, self.buffer = self.buffer, LineBuffer(0)
+            try:
+                member_loader(self, member_def)
+                if self.buffer:
+                    dispatched_members.append((member_def.type_name, self.buffer))
+            finally:
+                self.buffer = container_buffer
+
+        if dispatched_members:
+            self._write_key_dispatch(dispatched_members)
+        for variant in variant_members:
+            self._load_variant_member(variant)
+
+    def _write_key_dispatch(self, dispatched_members: List[Tuple[str, LineBuffer]]):
+        member_indexes = {key: i for i, (key, _) in enumerate(dispatched_members)}
+        self.buffer.append('if (!j.is_object())')
+        self.buffer.append('{')
+        with IndentedBlock(self.buffer):
+            self.buffer.append('throw std::runtime_error(std::string() + "Expected a json object: " + j.type_name());')
+        self.buffer.append('}')
+        self.buffer.append(f'std::bitset<{len(dispatched_members)}> found;')
+        self.buffer.append('for (auto it = j.begin(); it != j.end(); ++it)')
+        self.buffer.append('{')
+        with IndentedBlock(self.buffer):
+            self.buffer.append('std::string const& key = it.key();')
+            self.buffer.append('nlohmann::json const& value = it.value();')
+            self._write_key_switch(dispatched_members, member_indexes)
+        self.buffer.append('}')
+        self._write_missing_members_check([key for key, _ in dispatched_members])
+
+    def _write_key_switch(self, dispatched_members: List[Tuple[str, LineBuffer]], member_indexes: Dict[str, int]):
+        """Switch running the load code of the member matching `key` (members without an index in member_indexes
+        are optional, they are not tracked in the `found` bitset)"""
+        members_by_size: Dict[int, List[Tuple[str, LineBuffer]]] = {}
+        for key, load_buffer in dispatched_members:
+            members_by_size.setdefault(len(key.encode()), []).append((key, load_buffer))
+
+        self.buffer.append('switch (key.size())')
+        self.buffer.append('{')
+        with IndentedBlock(self.buffer):
+            for size, members in sorted(members_by_size.items()):
+                self.buffer.append(f'case {size}:')
+                self.buffer.append('{')
+                with IndentedBlock(self.buffer):
+                    self._write_first_char_dispatch(members, member_indexes)
+                    self.buffer.append('break;')
+                self.buffer.append('}')
+        self.buffer.append('}')
+
+    def _write_missing_members_check(self, required_keys: List[str]):
+        self.buffer.append('if (!found.all())')
+        self.buffer.append('{')
+        with IndentedBlock(self.buffer):
+            member_names = ', '.join(f'"{key}"' for key in required_keys)
+            self.buffer.append(f'static char const* const member_names[] = {{{member_names}}};')
+            self.buffer.append(f'std::string missing = "Missing members of {self.container_struct.type_name}:";')
+            self.buffer.append('for (std::size_t i = 0; i < found.size(); ++i)')
+            self.buffer.append('{')
+            with IndentedBlock(self.buffer):
+                self.buffer.append('if (!found.test(i))')
+                self.buffer.append('{')
+                with IndentedBlock(self.buffer):
+                    self.buffer.append('missing = missing + " " + member_names[i];')
+                self.buffer.append('}')
+            self.buffer.append('}')
+            self.buffer.append(self._fail_statement('missing'))
+        self.buffer.append('}')
+
+    @staticmethod
+    def _fail_statement(message: str) -> str:
+        return f'throw std::runtime_error({message});'
+
+    def _write_first_char_dispatch(self, members: List[Tuple[str, LineBuffer]], member_indexes: Dict[str, int]):
+        members_by_char: Dict[int, List[Tuple[str, LineBuffer]]] = {}
+        for key, load_buffer in members:
+            members_by_char.setdefault(key.encode()[0] if key else 0, []).append((key, load_buffer))
+        if len(members_by_char) == 1:
+            self._write_key_compare(members, member_indexes)
+            return
+
+        self.buffer.append('switch (key[0])')
+        self.buffer.append('{')
+        with IndentedBlock(self.buffer):
+            for char_code, char_members in sorted(members_by_char.items()):
+                self.buffer.append(f'case {self._char_literal(char_code)}:')
+                self.buffer.append('{')
+                with IndentedBlock(self.buffer):
+                    self._write_key_compare(char_members, member_indexes)
+                    self.buffer.append('break;')
+                self.buffer.append('}')
+        self.buffer.append('}')
+
+    def _write_key_compare(self, members: List[Tuple[str, LineBuffer]], member_indexes: Dict[str, int]):
+        for i, (key, load_buffer) in enumerate(members):
+            self.buffer.append(f'{"else " if i else ""}if (key == "{key}")')
+            self.buffer.append('{')
+            with IndentedBlock(self.buffer):
+                self.buffer.append_buffer(load_buffer)
+                self._write_key_found(key, member_indexes)
+            self.buffer.append('}')
+
+    def _write_key_found(self, key: str, member_indexes: Dict[str, int]):
+        if key in member_indexes:
+            self.buffer.append(f'found.set({member_indexes[key]});')
+
+    @staticmethod
+    def _char_literal(char_code: int) -> str:
+        if 0x20 <= char_code < 0x7f and chr(char_code) not in "'\\":
+            return f"'{chr(char_code)}'"
+        return f'static_cast<char>({char_code})'
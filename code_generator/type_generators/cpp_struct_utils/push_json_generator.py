@@ -0,0 +1,1026 @@
+from typing import Dict, List, Tuple
+
+from code_generator.line_buffer import LineBuffer, IndentedBlock
+from code_generator.type_generators.cpp_struct_utils.from_json_generator import KeyDispatchFromJsonWriter
+from code_generator.type_generators.inner_type_parser import variant_member_types
+from code_generator.type_generators.kind_dispatch import KindDispatch
+from schema_parser.type_defs.ref_type import RefType
+from schema_parser.type_defs.type_def_base import TypeDefBase, TypeDefKind
+from schema_parser.type_defs.variant_alias import VariantAlias
+
+
+class PushJsonWriter(KeyDispatchFromJsonWriter):
+    """Handlers of a struct for the resumable json_push::Parser (JSON_PUSH_PARSER_HEADER), which is fed the json text
+    in chunks
+
+    PushOpen sizes the member bookkeeping of the object, PushKey returns the member a key's value goes to (dispatched
+    like in KeyDispatchFromJsonWriter), PushClose checks the required members and reads the variant members. Variant
+    members can depend on members that come later in the object (type enum), so the parser keeps the text of their
+    value until the object is closed."""
+    _deferred_keys: Dict[str, int]
+
+    def write_function(self):
+        struct_name = self.container_struct.type_name
+        self._deferred_keys = {}
+        dispatched_members, required_keys = self._get_dispatched_members()
+        # variant cases register the keys they need, so that their values are kept during the pass
+        variant_buffer = LineBuffer(0)
+        container_buffer, self.buffer = self.buffer, variant_buffer
+        try:
+            for member_def in self.container_struct.members:
+                if member_def.kind == TypeDefKind.VariantAlias:
+                    self._load_variant_member(member_def)
+        finally:
+            self.buffer = container_buffer
+        for key, index in self._deferred_keys.items():
+            if key in required_keys:
+                raise TypeError(f"Variant member key is also a member: {struct_name}.{key}")
+            dispatched_members.append((key, LineBuffer(0, f'return parser.Capture({index});')))
+
+        self.buffer.append(f"void PushOpen(json_push::Parser& parser, {struct_name}&)")
+        self.buffer.append("{")
+        with IndentedBlock(self.buffer):
+            self.buffer.append(f'parser.BeginMembers({len(required_keys)}, {len(self._deferred_keys)});')
+        self.buffer.append("}")
+        self.buffer.new_line()
+
+        # parameters are only named when used (unused parameter warnings)
+        parser_param = ' parser' if dispatched_members else ''
+        struct_param = ' m' if required_keys else ''
+        key_param = ' key' if dispatched_members else ''
+        self.buffer.append(f"json_push::Target PushKey(json_push::Parser&{parser_param}, {struct_name}&{struct_param}, "
+                           f"std::string_view{key_param})")
+        self.buffer.append("{")
+        with IndentedBlock(self.buffer):
+            if dispatched_members:
+                self._write_key_switch(dispatched_members, {})
+            self.buffer.append('return json_push::Skip();')
+        self.buffer.append("}")
+        self.buffer.new_line()
+
+        parser_param = ' parser' if required_keys or variant_buffer else ''
+        struct_param = ' m' if variant_buffer else ''
+        self.buffer.append(f"void PushClose(json_push::Parser&{parser_param}, {struct_name}&{struct_param})")
+        self.buffer.append("{")
+        with IndentedBlock(self.buffer):
+            if required_keys:
+                self.buffer.append('json_push::FoundMembers const found = parser.Found();')
+                self._write_missing_members_check(required_keys)
+            self.buffer.append_buffer(variant_buffer)
+        self.buffer.append("}")
+
+    def _get_dispatched_members(self) -> Tuple[List[Tuple[str, LineBuffer]], List[str]]:
+        dispatched_members: List[Tuple[str, LineBuffer]] = []
+        for member_def in self.container_struct.members:
+            member_loader = self.member_loaders.get(member_def)
+            if member_loader is None:
+                raise TypeError(f"Unsupported member type: {member_def}")
+            # members without a target (inner types, variants) are not dispatched
+            container_buffer, self.buffer = self.buffer, LineBuffer(0)
+            try:
+                member_loader(self, member_def)
+                if self.buffer:
+                    dispatched_members.append((member_def.type_name, self.buffer))
+            finally:
+                self.buffer = container_buffer
+
+        # found members are marked when their value starts
+        required_keys = [key for key, _ in dispatched_members]
+        for i, (_key, load_buffer) in enumerate(dispatched_members):
+            load_buffer.prepend(f'parser.MarkFound({i});')
+        return dispatched_members, required_keys
+
+    @staticmethod
+    def _fail_statement(message: str) -> str:
+        return f'parser.Fail({message});'
+
+    def _load_simple_member(self, member_name: str):
+        self.buffer.append(f'return json_push::TargetOf(m.{member_name});')
+
+    def _load_ref_member(self, member: RefType):
+        target_type = self.type_registry.get_ref_target(member.target_uri)
+        # same members as the nlohmann FromJson, other references are skipped like unknown keys
+        if target_type.kind in (TypeDefKind.EnumType, TypeDefKind.StructType):
+            self._load_simple_member(member.type_name)
+
+    def _skip_variant_member(self, _variant: VariantAlias):
+        # read in PushClose, see write_function
+        pass
+
+    def _load_variant_case(self, variant: VariantAlias, member: TypeDefBase):
+        # every case reads the value of the variant key into its alternative
+        index = self._deferred_keys.setdefault(variant.type_name, len(self._deferred_keys))
+        alternative_type = variant_member_types.get(member)(member, self.type_registry)
+        self.buffer.append(f'm.{variant.type_name} = parser.ReadCaptured<{alternative_type}>({index}, '
+                           f'"{variant.type_name}");')
+
+    member_loaders = KeyDispatchFromJsonWriter.member_loaders.copy()
+    member_loaders.register(TypeDefKind.RefType, _load_ref_member)
+    member_loaders.register(TypeDefKind.VariantAlias, _skip_variant_member)
+
+    variant_case_loaders = KindDispatch(dict.fromkeys((
+        TypeDefKind.SimpleAlias, TypeDefKind.ArrayAlias, TypeDefKind.VariantAlias, TypeDefKind.StructType,
+        TypeDefKind.EnumType, TypeDefKind.RefType), _load_variant_case))
+
+
+JSON_PUSH_PARSER_HEADER_NAME = 'JsonPushParser'
+
+# runtime of the generated push handlers, written once to the header root directory
+JSON_PUSH_PARSER_HEADER = r'''#pragma once
+
+#include <charconv>
+#include <cstddef>
+#include <cstdint>
+#include <stdexcept>
+#include <string>
+#include <string_view>
+#include <type_traits>
+#include <vector>
+
+namespace json_push
+{
+    class ParseError : public std::runtime_error
+    {
+    public:
+        ParseError(std::string const& message, std::size_t error_offset, std::size_t error_line,
+                   std::size_t error_column)
+            : std::runtime_error(message + " at line " + std::to_string(error_line) + ", column " +
+                                 std::to_string(error_column) + " (offset " + std::to_string(error_offset) + ")"),
+              offset(error_offset), line(error_line), column(error_column)
+        {
+        }
+
+        std::size_t offset;
+        std::size_t line;
+        std::size_t column;
+    };
+
+    class Parser;
+
+    enum class TokenKind
+    {
+        String,
+        Number,
+        True,
+        False,
+        Null,
+    };
+
+    struct ValueHandler;
+
+    // where a json value goes: no handler skips the value (or keeps its text, see Parser::Capture)
+    struct Target
+    {
+        ValueHandler const* handler;
+        void* value;
+    };
+
+    // type erased handling of the json values of a C++ type
+    struct ValueHandler
+    {
+        void (*on_scalar)(Parser& parser, void* value, TokenKind kind, std::string_view text);
+        void (*on_open)(Parser& parser, void* value, char bracket);
+        Target (*on_key)(Parser& parser, void* value, std::string_view key);
+        Target (*on_element)(Parser& parser, void* value);
+        void (*on_close)(Parser& parser, void* value);
+    };
+
+    template <typename T>
+    ValueHandler const& HandlerFor();
+
+    template <typename T>
+    Target TargetOf(T& value)
+    {
+        return {&HandlerFor<T>(), &value};
+    }
+
+    inline Target Skip()
+    {
+        return {nullptr, nullptr};
+    }
+
+    // required members found in the object being parsed
+    class FoundMembers
+    {
+    public:
+        FoundMembers(std::uint8_t const* bits, std::size_t count) : bits_(bits), count_(count)
+        {
+        }
+
+        std::size_t size() const
+        {
+            return count_;
+        }
+
+        bool test(std::size_t i) const
+        {
+            return bits_[i] != 0;
+        }
+
+        bool all() const
+        {
+            for (std::size_t i = 0; i < count_; ++i)
+            {
+                if (bits_[i] == 0)
+                {
+                    return false;
+                }
+            }
+            return true;
+        }
+
+    private:
+        std::uint8_t const* bits_;
+        std::size_t count_;
+    };
+
+    // resumable json parser, fed the text in chunks of any size; values are handed to the handlers of their targets
+    // as they complete. Memory is bounded by the nesting depth (plus the longest string or number, and the text of
+    // variant members kept until their object is closed), not by the size of the message.
+    class Parser
+    {
+    public:
+        static constexpr std::size_t max_depth = 512;
+
+        template <typename T>
+        explicit Parser(T& value) : root_(TargetOf(value))
+        {
+        }
+
+        // the root value starts inside a larger input, errors report positions in that input
+        template <typename T>
+        Parser(T& value, std::size_t offset, std::size_t line, std::size_t column)
+            : root_(TargetOf(value)), offset_(offset), line_(line), line_begin_(offset - (column - 1))
+        {
+        }
+
+        // consumes bytes up to the end of the root value, returns the count consumed
+        std::size_t Feed(std::string_view chunk)
+        {
+            std::size_t i = 0;
+            while (i < chunk.size() && state_ != State::Done)
+            {
+                char const c = chunk[i];
+                if (!Step(c))
+                {
+                    // the byte ended a number, it is stepped again in the next state
+                    continue;
+                }
+                ++i;
+                ++offset_;
+                if (c == '\n')
+                {
+                    ++line_;
+                    line_begin_ = offset_;
+                }
+            }
+            return i;
+        }
+
+        bool Done() const
+        {
+            return state_ == State::Done;
+        }
+
+        // end of the input, throws if the root value is incomplete
+        void Finish()
+        {
+            if (state_ == State::Number && frames_.empty())
+            {
+                EndNumber();
+            }
+            if (state_ != State::Done)
+            {
+                Fail("Unexpected end of input");
+            }
+        }
+
+        [[noreturn]] void Fail(std::string const& message) const
+        {
+            throw ParseError(message, offset_, line_, offset_ - line_begin_ + 1);
+        }
+
+        // used by the generated handlers of a struct, for the object being parsed
+        void BeginMembers(std::size_t required_count, std::size_t captured_count)
+        {
+            Frame& frame = frames_.back();
+            frame.found_begin = found_.size();
+            frame.found_count = required_count;
+            found_.resize(found_.size() + required_count, 0);
+            frame.captured_begin = captured_.size();
+            captured_.resize(captured_.size() + captured_count);
+        }
+
+        void MarkFound(std::size_t index)
+        {
+            found_[frames_.back().found_begin + index] = 1;
+        }
+
+        FoundMembers Found() const
+        {
+            Frame const& frame = frames_.back();
+            return FoundMembers(found_.data() + frame.found_begin, frame.found_count);
+        }
+
+        // keeps the text of the value, to be read with ReadCaptured once the object is closed
+        Target Capture(std::size_t index)
+        {
+            std::string& text = captured_[frames_.back().captured_begin + index];
+            text.clear();
+            return {nullptr, &text};
+        }
+
+        template <typename T>
+        T ReadCaptured(std::size_t index, char const* member_name)
+        {
+            std::string const& text = captured_[frames_.back().captured_begin + index];
+            if (text.empty())
+            {
+                Fail(std::string("Missing member: ") + member_name);
+            }
+            T value{};
+            try
+            {
+                Parser parser(value);
+                parser.Feed(text);
+                parser.Finish();
+            }
+            catch (ParseError const& ex)
+            {
+                Fail(std::string("Invalid member ") + member_name + ": " + ex.what());
+            }
+            return value;
+        }
+
+    private:
+        enum class State
+        {
+            Value,
+            ValueOrClose,
+            KeyOrClose,
+            Key,
+            Colon,
+            CommaOrClose,
+            String,
+            Number,
+            Literal,
+            Done,
+        };
+
+        struct Frame
+        {
+            Target target;
+            char close;
+            std::size_t items;
+            std::size_t found_begin;
+            std::size_t found_count;
+            std::size_t captured_begin;
+        };
+
+        static bool IsWhitespace(char c)
+        {
+            return c == ' ' || c == '\n' || c == '\r' || c == '\t';
+        }
+
+        static bool IsNumberChar(char c)
+        {
+            return (c >= '0' && c <= '9') || c == '-' || c == '+' || c == '.' || c == 'e' || c == 'E';
+        }
+
+        // processes a byte, false if it was not consumed
+        bool Step(char c)
+        {
+            switch (state_)
+            {
+                case State::String:
+                    StepString(c);
+                    return true;
+                case State::Number:
+                    if (IsNumberChar(c))
+                    {
+                        token_ += c;
+                        return true;
+                    }
+                    EndNumber();
+                    return false;
+                case State::Literal:
+                    if (c != literal_[literal_size_])
+                    {
+                        Fail("Invalid literal");
+                    }
+                    if (literal_[++literal_size_] == '\0')
+                    {
+                        Scalar(literal_kind_, literal_);
+                    }
+                    return true;
+                default:
+                    break;
+            }
+
+            if (IsWhitespace(c))
+            {
+                return true;
+            }
+            switch (state_)
+            {
+                case State::ValueOrClose:
+                    if (c == ']')
+                    {
+                        Close();
+                        return true;
+                    }
+                    BeginValue(c);
+                    return true;
+                case State::Value:
+                    BeginValue(c);
+                    return true;
+                case State::KeyOrClose:
+                    if (c == '}')
+                    {
+                        Close();
+                        return true;
+                    }
+                    [[fallthrough]];
+                case State::Key:
+                    if (c != '"')
+                    {
+                        Fail("Expected a member key");
+                    }
+                    BeginString(true);
+                    return true;
+                case State::Colon:
+                    if (c != ':')
+                    {
+                        Fail("Expected ':'");
+                    }
+                    state_ = State::Value;
+                    return true;
+                case State::CommaOrClose:
+                    if (c == frames_.back().close)
+                    {
+                        Close();
+                    }
+                    else if (c == ',')
+                    {
+                        state_ = frames_.back().close == '}' ? State::Key : State::Value;
+                    }
+                    else
+                    {
+                        Fail(std::string("Expected ',' or '") + frames_.back().close + "'");
+                    }
+                    return true;
+                default:
+                    Fail("Unexpected character");
+            }
+        }
+
+        void BeginValue(char c)
+        {
+            if (frames_.empty())
+            {
+                target_ = root_;
+            }
+            else if (frames_.back().close == ']')
+            {
+                Frame& frame = frames_.back();
+                target_ = frame.target.handler ? frame.target.handler->on_element(*this, frame.target.value) : Skip();
+                if (capture_ && frame.items > 0)
+                {
+                    *capture_ += ',';
+                }
+                ++frame.items;
+            }
+            if (!capture_ && !target_.handler && target_.value)
+            {
+                capture_ = static_cast<std::string*>(target_.value);
+                capture_depth_ = frames_.size();
+            }
+
+            switch (c)
+            {
+                case '{':
+                case '[':
+                    Open(c);
+                    break;
+                case '"':
+                    BeginString(false);
+                    break;
+                case 't':
+                    BeginLiteral("true", TokenKind::True);
+                    break;
+                case 'f':
+                    BeginLiteral("false", TokenKind::False);
+                    break;
+                case 'n':
+                    BeginLiteral("null", TokenKind::Null);
+                    break;
+                default:
+                    if (c != '-' && (c < '0' || c > '9'))
+                    {
+                        Fail("Unexpected character");
+                    }
+                    token_.assign(1, c);
+                    state_ = State::Number;
+            }
+        }
+
+        void Open(char bracket)
+        {
+            if (frames_.size() >= max_depth)
+            {
+                Fail("Nesting too deep");
+            }
+            frames_.push_back({target_, bracket == '{' ? '}' : ']', 0, found_.size(), 0, captured_.size()});
+            if (capture_)
+            {
+                *capture_ += bracket;
+            }
+            if (target_.handler)
+            {
+                target_.handler->on_open(*this, target_.value, bracket);
+            }
+            state_ = bracket == '{' ? State::KeyOrClose : State::ValueOrClose;
+        }
+
+        void Close()
+        {
+            Frame const frame = frames_.back();
+            if (capture_)
+            {
+                *capture_ += frame.close;
+            }
+            if (frame.target.handler)
+            {
+                frame.target.handler->on_close(*this, frame.target.value);
+            }
+            found_.resize(frame.found_begin);
+            captured_.resize(frame.captured_begin);
+            frames_.pop_back();
+            EndValue();
+        }
+
+        void Scalar(TokenKind kind, std::string_view text)
+        {
+            if (capture_)
+            {
+                if (kind == TokenKind::String)
+                {
+                    AppendQuoted(*capture_, text);
+                }
+                else
+                {
+                    *capture_ += text;
+                }
+            }
+            if (target_.handler)
+            {
+                target_.handler->on_scalar(*this, target_.value, kind, text);
+            }
+            EndValue();
+        }
+
+        void EndValue()
+        {
+            if (capture_ && frames_.size() == capture_depth_)
+            {
+                capture_ = nullptr;
+            }
+            state_ = frames_.empty() ? State::Done : State::CommaOrClose;
+        }
+
+        void Key()
+        {
+            Frame& frame = frames_.back();
+            if (capture_)
+            {
+                if (frame.items > 0)
+                {
+                    *capture_ += ',';
+                }
+                AppendQuoted(*capture_, token_);
+                *capture_ += ':';
+            }
+            ++frame.items;
+            target_ = frame.target.handler ? frame.target.handler->on_key(*this, frame.target.value, token_) : Skip();
+            state_ = State::Colon;
+        }
+
+        void BeginLiteral(char const* literal, TokenKind kind)
+        {
+            literal_ = literal;
+            literal_size_ = 1;
+            literal_kind_ = kind;
+            state_ = State::Literal;
+        }
+
+        // json number grammar: -?(0|[1-9][0-9]*)(\.[0-9]+)?([eE][+-]?[0-9]+)?
+        void EndNumber()
+        {
+            std::size_t i = 0;
+            auto const digits = [this, &i]() {
+                std::size_t const begin = i;
+                while (i < token_.size() && token_[i] >= '0' && token_[i] <= '9')
+                {
+                    ++i;
+                }
+                return i - begin;
+            };
+            if (token_[i] == '-')
+            {
+                ++i;
+            }
+            std::size_t const int_begin = i;
+            std::size_t const int_digits = digits();
+            bool valid = int_digits > 0 && (token_[int_begin] != '0' || int_digits == 1);
+            if (valid && i < token_.size() && token_[i] == '.')
+            {
+                ++i;
+                valid = digits() > 0;
+            }
+            if (valid && i < token_.size() && (token_[i] == 'e' || token_[i] == 'E'))
+            {
+                ++i;
+                if (i < token_.size() && (token_[i] == '+' || token_[i] == '-'))
+                {
+                    ++i;
+                }
+                valid = digits() > 0;
+            }
+            if (!valid || i != token_.size())
+            {
+                Fail("Invalid number");
+            }
+            Scalar(TokenKind::Number, token_);
+        }
+
+        void BeginString(bool is_key)
+        {
+            token_.clear();
+            string_is_key_ = is_key;
+            escape_size_ = 0;
+            state_ = State::String;
+        }
+
+        void StepString(char c)
+        {
+            if (escape_size_ == 0)
+            {
+                if (c == '"')
+                {
+                    if (high_surrogate_ != 0)
+                    {
+                        Fail("Missing low surrogate");
+                    }
+                    if (string_is_key_)
+                    {
+                        Key();
+                    }
+                    else
+                    {
+                        Scalar(TokenKind::String, token_);
+                    }
+                }
+                else if (c == '\\')
+                {
+                    escape_size_ = 1;
+                }
+                else if (static_cast<unsigned char>(c) < 0x20)
+                {
+                    Fail("Invalid control character in string");
+                }
+                else if (high_surrogate_ != 0)
+                {
+                    Fail("Missing low surrogate");
+                }
+                else
+                {
+                    token_ += c;
+                }
+                return;
+            }
+
+            if (escape_size_ == 1)
+            {
+                if (c == 'u')
+                {
+                    escape_size_ = 2;
+                    code_unit_ = 0;
+                    return;
+                }
+                if (high_surrogate_ != 0)
+                {
+                    Fail("Missing low surrogate");
+                }
+                switch (c)
+                {
+                    case '"': token_ += '"'; break;
+                    case '\\': token_ += '\\'; break;
+                    case '/': token_ += '/'; break;
+                    case 'b': token_ += '\b'; break;
+                    case 'f': token_ += '\f'; break;
+                    case 'n': token_ += '\n'; break;
+                    case 'r': token_ += '\r'; break;
+                    case 't': token_ += '\t'; break;
+                    default: Fail("Invalid escape sequence");
+                }
+                escape_size_ = 0;
+                return;
+            }
+
+            // \uXXXX digits
+            code_unit_ <<= 4;
+            if (c >= '0' && c <= '9')
+            {
+                code_unit_ |= static_cast<unsigned>(c - '0');
+            }
+            else if (c >= 'a' && c <= 'f')
+            {
+                code_unit_ |= static_cast<unsigned>(c - 'a' + 10);
+            }
+            else if (c >= 'A' && c <= 'F')
+            {
+                code_unit_ |= static_cast<unsigned>(c - 'A' + 10);
+            }
+            else
+            {
+                Fail("Invalid unicode escape");
+            }
+            if (++escape_size_ < 6)
+            {
+                return;
+            }
+            escape_size_ = 0;
+            if (high_surrogate_ != 0)
+            {
+                if (code_unit_ < 0xdc00 || code_unit_ > 0xdfff)
+                {
+                    Fail("Invalid low surrogate");
+                }
+                AppendUtf8(token_, 0x10000 + ((high_surrogate_ - 0xd800) << 10) + (code_unit_ - 0xdc00));
+                high_surrogate_ = 0;
+            }
+            else if (code_unit_ >= 0xd800 && code_unit_ <= 0xdbff)
+            {
+                high_surrogate_ = code_unit_;
+            }
+            else if (code_unit_ >= 0xdc00 && code_unit_ <= 0xdfff)
+            {
+                Fail("Unpaired low surrogate");
+            }
+            else
+            {
+                AppendUtf8(token_, code_unit_);
+            }
+        }
+
+        static void AppendUtf8(std::string& out, unsigned code_point)
+        {
+            if (code_point < 0x80)
+            {
+                out += static_cast<char>(code_point);
+            }
+            else if (code_point < 0x800)
+            {
+                out += static_cast<char>(0xc0 | (code_point >> 6));
+                out += static_cast<char>(0x80 | (code_point & 0x3f));
+            }
+            else if (code_point < 0x10000)
+            {
+                out += static_cast<char>(0xe0 | (code_point >> 12));
+                out += static_cast<char>(0x80 | ((code_point >> 6) & 0x3f));
+                out += static_cast<char>(0x80 | (code_point & 0x3f));
+            }
+            else
+            {
+                out += static_cast<char>(0xf0 | (code_point >> 18));
+                out += static_cast<char>(0x80 | ((code_point >> 12) & 0x3f));
+                out += static_cast<char>(0x80 | ((code_point >> 6) & 0x3f));
+                out += static_cast<char>(0x80 | (code_point & 0x3f));
+            }
+        }
+
+        static void AppendQuoted(std::string& out, std::string_view text)
+        {
+            static char const hex_digits[] = "0123456789abcdef";
+            out += '"';
+            for (char const c : text)
+            {
+                switch (c)
+                {
+                    case '"': out += "\\\""; break;
+                    case '\\': out += "\\\\"; break;
+                    default:
+                        if (static_cast<unsigned char>(c) < 0x20)
+                        {
+                            out += "\\u00";
+                            out += hex_digits[static_cast<unsigned char>(c) >> 4];
+                            out += hex_digits[c & 0xf];
+                        }
+                        else
+                        {
+                            out += c;
+                        }
+                }
+            }
+            out += '"';
+        }
+
+        Target root_;
+        Target target_{nullptr, nullptr};
+        State state_ = State::Value;
+        std::vector<Frame> frames_;
+        std::vector<std::uint8_t> found_;
+        std::vector<std::string> captured_;
+        std::string* capture_ = nullptr;
+        std::size_t capture_depth_ = 0;
+        std::string token_;
+        bool string_is_key_ = false;
+        int escape_size_ = 0;
+        unsigned code_unit_ = 0;
+        unsigned high_surrogate_ = 0;
+        char const* literal_ = nullptr;
+        std::size_t literal_size_ = 0;
+        TokenKind literal_kind_ = TokenKind::Null;
+        std::size_t offset_ = 0;
+        std::size_t line_ = 1;
+        std::size_t line_begin_ = 0;
+    };
+
+    template <typename T>
+    void ScalarValue(Parser& parser, void* value, TokenKind kind, std::string_view text)
+    {
+        T& target = *static_cast<T*>(value);
+        if constexpr (std::is_same_v<T, std::string>)
+        {
+            if (kind != TokenKind::String)
+            {
+                parser.Fail("Expected a string");
+            }
+            target.assign(text);
+        }
+        else if constexpr (std::is_same_v<T, bool>)
+        {
+            if (kind != TokenKind::True && kind != TokenKind::False)
+            {
+                parser.Fail("Expected a boolean");
+            }
+            target = kind == TokenKind::True;
+        }
+        else if constexpr (std::is_floating_point_v<T>)
+        {
+            double number = 0;
+            if (kind != TokenKind::Number ||
+                std::from_chars(text.data(), text.data() + text.size(), number).ec != std::errc())
+            {
+                parser.Fail("Expected a number");
+            }
+            // read as double and narrowed, like nlohmann::json::get
+            target = static_cast<T>(number);
+        }
+        else
+        {
+            using Integer = typename std::conditional_t<std::is_enum_v<T>, std::underlying_type<T>,
+                                                        std::enable_if<true, T>>::type;
+            Integer number{};
+            auto const result = std::from_chars(text.data(), text.data() + text.size(), number);
+            if (kind != TokenKind::Number || result.ec != std::errc() || result.ptr != text.data() + text.size())
+            {
+                parser.Fail(result.ec == std::errc::result_out_of_range ? "Integer out of range" :
+                            "Expected an integer");
+            }
+            target = static_cast<T>(number);
+        }
+    }
+
+    inline void ExpectScalar(Parser& parser, void*, char)
+    {
+        parser.Fail("Expected a scalar value");
+    }
+
+    inline void ExpectObject(Parser& parser, void*, TokenKind, std::string_view)
+    {
+        parser.Fail("Expected an object");
+    }
+
+    inline void ExpectArray(Parser& parser, void*, TokenKind, std::string_view)
+    {
+        parser.Fail("Expected an array");
+    }
+
+    inline Target NoKey(Parser&, void*, std::string_view)
+    {
+        return Skip();
+    }
+
+    inline Target NoElement(Parser&, void*)
+    {
+        return Skip();
+    }
+
+    inline void NoClose(Parser&, void*)
+    {
+    }
+
+    template <typename T>
+    struct HandlerOf
+    {
+        // generated structs
+        static void Open(Parser& parser, void* value, char bracket)
+        {
+            if (bracket != '{')
+            {
+                parser.Fail("Expected an object");
+            }
+            static_cast<T*>(value)->PushOpen(parser);
+        }
+
+        static Target Key(Parser& parser, void* value, std::string_view key)
+        {
+            return static_cast<T*>(value)->PushKey(parser, key);
+        }
+
+        static void Close(Parser& parser, void* value)
+        {
+            static_cast<T*>(value)->PushClose(parser);
+        }
+
+        static ValueHandler const& Get()
+        {
+            if constexpr (std::is_arithmetic_v<T> || std::is_enum_v<T> || std::is_same_v<T, std::string>)
+            {
+                static ValueHandler const handler = {ScalarValue<T>, ExpectScalar, NoKey, NoElement, NoClose};
+                return handler;
+            }
+            else
+            {
+                static ValueHandler const handler = {ExpectObject, Open, Key, NoElement, Close};
+                return handler;
+            }
+        }
+    };
+
+    template <typename T>
+    struct HandlerOf<std::vector<T>>
+    {
+        static void Open(Parser& parser, void* value, char bracket)
+        {
+            if (bracket != '[')
+            {
+                parser.Fail("Expected an array");
+            }
+            static_cast<std::vector<T>*>(value)->clear();
+        }
+
+        // elements are complete before the next one is added, so the address stays valid while it is parsed
+        static Target Element(Parser&, void* value)
+        {
+            return TargetOf(static_cast<std::vector<T>*>(value)->emplace_back());
+        }
+
+        static ValueHandler const& Get()
+        {
+            static ValueHandler const handler = {ExpectArray, Open, NoKey, Element, NoClose};
+            return handler;
+        }
+    };
+
+    template <>
+    struct HandlerOf<std::vector<bool>>
+    {
+        static void Open(Parser& parser, void* value, char bracket)
+        {
+            if (bracket != '[')
+            {
+                parser.Fail("Expected an array");
+            }
+            static_cast<std::vector<bool>*>(value)->clear();
+        }
+
+        // vector<bool> elements have no address, they are appended as they complete
+        static void Append(Parser& parser, void* value, TokenKind kind, std::string_view text)
+        {
+            bool element = false;
+            ScalarValue<bool>(parser, &element, kind, text);
+            static_cast<std::vector<bool>*>(value)->push_back(element);
+        }
+
+        static Target Element(Parser&, void* value)
+        {
+            static ValueHandler const element_handler = {Append, ExpectScalar, NoKey, NoElement, NoClose};
+            return {&element_handler, value};
+        }
+
+        static ValueHandler const& Get()
+        {
+            static ValueHandler const handler = {ExpectArray, Open, NoKey, Element, NoClose};
+            return handler;
+        }
+    };
+
+    template <typename T>
+    ValueHandler const& HandlerFor()
+    {
+        return HandlerOf<T>::Get();
+    }
+}  // namespace json_push
+'''
@@ -0,0 +1,638 @@
+from typing import Dict, List, Tuple
+
+from code_generator.line_buffer import LineBuffer, IndentedBlock
+from code_generator.type_generators.cpp_struct_utils.from_json_generator import KeyDispatchFromJsonWriter
+from code_generator.type_generators.inner_type_parser import variant_member_types
+from code_generator.type_generators.kind_dispatch import KindDispatch
+from schema_parser.type_defs.ref_type import RefType
+from schema_parser.type_defs.type_def_base import TypeDefBase, TypeDefKind
+from schema_parser.type_defs.variant_alias import VariantAlias
+
+
+class ReadJsonWriter(KeyDispatchFromJsonWriter):
+    """ReadJson parsing a struct straight from the json text with a json_reader::Reader (JSON_READER_HEADER), without
+    building a nlohmann::json tree first
+
+    Member keys are dispatched like in KeyDispatchFromJsonWriter, values are read in place with json_reader::Read, and
+    unknown keys are skipped. Variant members can depend on members that come later in the object (type enum), so only
+    the position of their value is recorded during the pass; they are read once the object is closed. Errors are
+    reported as json_reader::ParseError, with the position in the input."""
+    _deferred_keys: Dict[str, int]
+
+    def write_function(self):
+        self.buffer.append(f"void ReadJson(json_reader::Reader& reader, {self.container_struct.type_name}& m)")
+        self.buffer.append("{")
+        with IndentedBlock(self.buffer):
+            self._write_body()
+        self.buffer.append("}")
+
+    def _write_body(self):
+        self._deferred_keys = {}
+        dispatched_members: List[Tuple[str, LineBuffer]] = []
+        for member_def in self.container_struct.members:
+            member_loader = self.member_loaders.get(member_def)
+            if member_loader is None:
+                raise TypeError(f"Unsupported member type: {member_def}")
+            # members without reading code (inner types) are not dispatched
+            container_buffer, self.buffer = self.buffer, LineBuffer(0)
+            try:
+                member_loader(self, member_def)
+                if self.buffer:
+                    dispatched_members.append((member_def.type_name, self.buffer))
+            finally:
+                self.buffer = container_buffer
+
+        # variant cases register the keys they need, so that their positions are recorded during the pass
+        variant_buffer = LineBuffer(0)
+        container_buffer, self.buffer = self.buffer, variant_buffer
+        try:
+            for member_def in self.container_struct.members:
+                if member_def.kind == TypeDefKind.VariantAlias:
+                    self._load_variant_member(member_def)
+        finally:
+            self.buffer = container_buffer
+
+        required_keys = [key for key, _ in dispatched_members]
+        for key, index in self._deferred_keys.items():
+            if key in required_keys:
+                raise TypeError(f"Variant member key is also a member: {self.container_struct.type_name}.{key}")
+            dispatched_members.append((key, LineBuffer(0, f'deferred_positions[{index}] = reader.Position();',
+                                                       'reader.SkipValue();')))
+        self._write_member_loop(dispatched_members, required_keys)
+        self.buffer.append_buffer(variant_buffer)
+
+    def _write_member_loop(self, dispatched_members: List[Tuple[str, LineBuffer]], required_keys: List[str]):
+        member_indexes = {key: i for i, key in enumerate(required_keys)}
+        if required_keys:
+            self.buffer.append(f'std::bitset<{len(required_keys)}> found;')
+        if self._deferred_keys:
+            positions = ', '.join(['json_reader::Reader::npos'] * len(self._deferred_keys))
+            self.buffer.append(f'std::size_t deferred_positions[] = {{{positions}}};')
+        self.buffer.append("reader.Expect('{');")
+        self.buffer.append("for (bool first = true; reader.Next(first, '}');)")
+        self.buffer.append('{')
+        with IndentedBlock(self.buffer):
+            self.buffer.append('std::string_view const key = reader.ReadKey();')
+            if dispatched_members:
+                self._write_key_switch(dispatched_members, member_indexes)
+            self.buffer.append('reader.SkipValue();')
+        self.buffer.append('}')
+        if required_keys:
+            self._write_missing_members_check(required_keys)
+
+    def _write_key_found(self, key: str, member_indexes: Dict[str, int]):
+        super()._write_key_found(key, member_indexes)
+        # matched values are consumed, the rest falls through to SkipValue
+        self.buffer.append('continue;')
+
+    @staticmethod
+    def _fail_statement(message: str) -> str:
+        return f'reader.Fail({message});'
+
+    def _load_simple_member(self, member_name: str):
+        self.buffer.append(f'json_reader::Read(reader, m.{member_name});')
+
+    def _load_ref_member(self, member: RefType):
+        target_type = self.type_registry.get_ref_target(member.target_uri)
+        # same members as the nlohmann FromJson, other references are skipped like unknown keys
+        if target_type.kind in (TypeDefKind.EnumType, TypeDefKind.StructType):
+            self._load_simple_member(member.type_name)
+
+    def _skip_variant_member(self, _variant: VariantAlias):
+        # read after the pass, see _write_body
+        pass
+
+    def _load_variant_case(self, variant: VariantAlias, member: TypeDefBase):
+        # every case reads the value of the variant key into its alternative
+        index = self._deferred_keys.setdefault(variant.type_name, len(self._deferred_keys))
+        alternative_type = variant_member_types.get(member)(member, self.type_registry)
+        self.buffer.append(f'json_reader::Reader value_reader = reader.At(deferred_positions[{index}], '
+                           f'"{variant.type_name}");')
+        self.buffer.append(f'm.{variant.type_name} = json_reader::ReadValue<{alternative_type}>(value_reader);')
+
+    member_loaders = KeyDispatchFromJsonWriter.member_loaders.copy()
+    member_loaders.register(TypeDefKind.RefType, _load_ref_member)
+    member_loaders.register(TypeDefKind.VariantAlias, _skip_variant_member)
+
+    variant_case_loaders = KindDispatch(dict.fromkeys((
+        TypeDefKind.SimpleAlias, TypeDefKind.ArrayAlias, TypeDefKind.VariantAlias, TypeDefKind.StructType,
+        TypeDefKind.EnumType, TypeDefKind.RefType), _load_variant_case))
+
+
+JSON_READER_HEADER_NAME = 'JsonReader'
+
+# runtime of the generated ReadJson functions, written once to the header root directory
+JSON_READER_HEADER = r'''#pragma once
+
+#include <charconv>
+#include <cstddef>
+#include <cstdint>
+#include <stdexcept>
+#include <string>
+#include <string_view>
+#include <type_traits>
+#include <vector>
+
+namespace json_reader
+{
+    class ParseError : public std::runtime_error
+    {
+    public:
+        ParseError(std::string const& message, std::size_t error_offset, std::size_t error_line,
+                   std::size_t error_column)
+            : std::runtime_error(message + " at line " + std::to_string(error_line) + ", column " +
+                                 std::to_string(error_column) + " (offset " + std::to_string(error_offset) + ")"),
+              offset(error_offset), line(error_line), column(error_column)
+        {
+        }
+
+        std::size_t offset;
+        std::size_t line;
+        std::size_t column;
+    };
+
+    // cursor over a json text; values are read in place, strings without escapes are viewed without copying
+    class Reader
+    {
+    public:
+        static constexpr std::size_t npos = std::string_view::npos;
+        static constexpr int max_skip_depth = 512;
+
+        explicit Reader(std::string_view document, std::size_t position = 0)
+            : document_(document), position_(position)
+        {
+        }
+
+        std::size_t Position() const
+        {
+            return position_;
+        }
+
+        // reader positioned on a value recorded earlier in the same document
+        Reader At(std::size_t position, char const* member_name) const
+        {
+            if (position == npos)
+            {
+                Fail(std::string("Missing member: ") + member_name);
+            }
+            return Reader(document_, position);
+        }
+
+        [[noreturn]] void Fail(std::string const& message) const
+        {
+            FailAt(message, position_);
+        }
+
+        [[noreturn]] void FailAt(std::string const& message, std::size_t position) const
+        {
+            // line and column are only computed for errors
+            std::size_t line = 1;
+            std::size_t line_begin = 0;
+            for (std::size_t i = 0; i < position && i < document_.size(); ++i)
+            {
+                if (document_[i] == '\n')
+                {
+                    ++line;
+                    line_begin = i + 1;
+                }
+            }
+            throw ParseError(message, position, line, position - line_begin + 1);
+        }
+
+        char Peek()
+        {
+            while (position_ < document_.size() && IsWhitespace(document_[position_]))
+            {
+                ++position_;
+            }
+            if (position_ == document_.size())
+            {
+                Fail("Unexpected end of input");
+            }
+            return document_[position_];
+        }
+
+        void Expect(char c)
+        {
+            if (Peek() != c)
+            {
+                Fail(std::string("Expected '") + c + "'");
+            }
+            ++position_;
+        }
+
+        void ExpectEnd()
+        {
+            while (position_ < document_.size() && IsWhitespace(document_[position_]))
+            {
+                ++position_;
+            }
+            if (position_ != document_.size())
+            {
+                Fail("Unexpected characters after the json value");
+            }
+        }
+
+        // advances to the next member / element of an object / array (after its opening bracket), false once closed
+        bool Next(bool& first, char close)
+        {
+            char const c = Peek();
+            if (c == close)
+            {
+                ++position_;
+                return false;
+            }
+            if (!first)
+            {
+                if (c != ',')
+                {
+                    Fail(std::string("Expected ',' or '") + close + "'");
+                }
+                ++position_;
+            }
+            first = false;
+            return true;
+        }
+
+        // member key (valid until the next string is read) and its ':' separator
+        std::string_view ReadKey()
+        {
+            std::string_view const key = ReadStringView(key_buffer_);
+            Expect(':');
+            return key;
+        }
+
+        void ReadString(std::string& value)
+        {
+            std::string_view const view = ReadStringView(value);
+            if (view.data() != value.data())
+            {
+                value.assign(view);
+            }
+        }
+
+        bool ReadBool()
+        {
+            if (Peek() == 't' && document_.compare(position_, 4, "true") == 0)
+            {
+                position_ += 4;
+                return true;
+            }
+            if (Peek() == 'f' && document_.compare(position_, 5, "false") == 0)
+            {
+                position_ += 5;
+                return false;
+            }
+            Fail("Expected a boolean");
+        }
+
+        template <typename T>
+        void ReadInteger(T& value)
+        {
+            std::size_t const begin = position_;
+            std::string_view const number = ScanNumber();
+            auto const result = std::from_chars(number.data(), number.data() + number.size(), value);
+            if (result.ec == std::errc::result_out_of_range)
+            {
+                FailAt("Integer out of range", begin);
+            }
+            if (result.ec != std::errc() || result.ptr != number.data() + number.size())
+            {
+                FailAt("Expected an integer", begin);
+            }
+        }
+
+        double ReadDouble()
+        {
+            std::size_t const begin = position_;
+            std::string_view const number = ScanNumber();
+            double value = 0;
+            auto const result = std::from_chars(number.data(), number.data() + number.size(), value);
+            if (result.ec != std::errc())
+            {
+                FailAt("Number out of range", begin);
+            }
+            return value;
+        }
+
+        void SkipValue(int depth = 0)
+        {
+            if (depth > max_skip_depth)
+            {
+                Fail("Nesting too deep");
+            }
+            switch (Peek())
+            {
+                case '{':
+                {
+                    ++position_;
+                    for (bool first = true; Next(first, '}');)
+                    {
+                        ReadKey();
+                        SkipValue(depth + 1);
+                    }
+                    break;
+                }
+                case '[':
+                {
+                    ++position_;
+                    for (bool first = true; Next(first, ']');)
+                    {
+                        SkipValue(depth + 1);
+                    }
+                    break;
+                }
+                case '"':
+                {
+                    ReadStringView(key_buffer_);
+                    break;
+                }
+                case 't':
+                case 'f':
+                {
+                    ReadBool();
+                    break;
+                }
+                case 'n':
+                {
+                    if (document_.compare(position_, 4, "null") != 0)
+                    {
+                        Fail("Invalid literal");
+                    }
+                    position_ += 4;
+                    break;
+                }
+                default:
+                {
+                    ScanNumber();
+                }
+            }
+        }
+
+    private:
+        static bool IsWhitespace(char c)
+        {
+            return c == ' ' || c == '\n' || c == '\r' || c == '\t';
+        }
+
+        bool IsDigit(std::size_t position) const
+        {
+            return position < document_.size() && document_[position] >= '0' && document_[position] <= '9';
+        }
+
+        // json number grammar: -?(0|[1-9][0-9]*)(\.[0-9]+)?([eE][+-]?[0-9]+)?
+        std::string_view ScanNumber()
+        {
+            Peek();
+            std::size_t const begin = position_;
+            std::size_t end = begin;
+            if (end < document_.size() && document_[end] == '-')
+            {
+                ++end;
+            }
+            if (!IsDigit(end))
+            {
+                FailAt("Invalid number", begin);
+            }
+            if (document_[end++] != '0')
+            {
+                while (IsDigit(end))
+                {
+                    ++end;
+                }
+            }
+            if (end < document_.size() && document_[end] == '.')
+            {
+                if (!IsDigit(++end))
+                {
+                    FailAt("Invalid number", begin);
+                }
+                while (IsDigit(end))
+                {
+                    ++end;
+                }
+            }
+            if (end < document_.size() && (document_[end] == 'e' || document_[end] == 'E'))
+            {
+                ++end;
+                if (end < document_.size() && (document_[end] == '+' || document_[end] == '-'))
+                {
+                    ++end;
+                }
+                if (!IsDigit(end))
+                {
+                    FailAt("Invalid number", begin);
+                }
+                while (IsDigit(end))
+                {
+                    ++end;
+                }
+            }
+            position_ = end;
+            return document_.substr(begin, end - begin);
+        }
+
+        unsigned ReadHex4()
+        {
+            unsigned code = 0;
+            for (int i = 0; i < 4; ++i, ++position_)
+            {
+                char const c = position_ < document_.size() ? document_[position_] : '\0';
+                code <<= 4;
+                if (c >= '0' && c <= '9')
+                {
+                    code |= static_cast<unsigned>(c - '0');
+                }
+                else if (c >= 'a' && c <= 'f')
+                {
+                    code |= static_cast<unsigned>(c - 'a' + 10);
+                }
+                else if (c >= 'A' && c <= 'F')
+                {
+                    code |= static_cast<unsigned>(c - 'A' + 10);
+                }
+                else
+                {
+                    Fail("Invalid unicode escape");
+                }
+            }
+            return code;
+        }
+
+        static void AppendUtf8(std::string& out, unsigned code_point)
+        {
+            if (code_point < 0x80)
+            {
+                out += static_cast<char>(code_point);
+            }
+            else if (code_point < 0x800)
+            {
+                out += static_cast<char>(0xc0 | (code_point >> 6));
+                out += static_cast<char>(0x80 | (code_point & 0x3f));
+            }
+            else if (code_point < 0x10000)
+            {
+                out += static_cast<char>(0xe0 | (code_point >> 12));
+                out += static_cast<char>(0x80 | ((code_point >> 6) & 0x3f));
+                out += static_cast<char>(0x80 | (code_point & 0x3f));
+            }
+            else
+            {
+                out += static_cast<char>(0xf0 | (code_point >> 18));
+                out += static_cast<char>(0x80 | ((code_point >> 12) & 0x3f));
+                out += static_cast<char>(0x80 | ((code_point >> 6) & 0x3f));
+                out += static_cast<char>(0x80 | (code_point & 0x3f));
+            }
+        }
+
+        // view of the string in the document, or of its unescaped copy in buffer if it has escapes
+        std::string_view ReadStringView(std::string& buffer)
+        {
+            Expect('"');
+            std::size_t run_begin = position_;
+            bool escaped = false;
+            while (true)
+            {
+                if (position_ == document_.size())
+                {
+                    Fail("Unterminated string");
+                }
+                auto const c = static_cast<unsigned char>(document_[position_]);
+                if (c == '"')
+                {
+                    break;
+                }
+                if (c < 0x20)
+                {
+                    Fail("Invalid control character in string");
+                }
+                if (c != '\\')
+                {
+                    ++position_;
+                    continue;
+                }
+
+                if (!escaped)
+                {
+                    buffer.clear();
+                    escaped = true;
+                }
+                buffer.append(document_.data() + run_begin, position_ - run_begin);
+                ++position_;
+                char const escape = position_ < document_.size() ? document_[position_++] : '\0';
+                switch (escape)
+                {
+                    case '"': buffer += '"'; break;
+                    case '\\': buffer += '\\'; break;
+                    case '/': buffer += '/'; break;
+                    case 'b': buffer += '\b'; break;
+                    case 'f': buffer += '\f'; break;
+                    case 'n': buffer += '\n'; break;
+                    case 'r': buffer += '\r'; break;
+                    case 't': buffer += '\t'; break;
+                    case 'u':
+                    {
+                        unsigned code_point = ReadHex4();
+                        if (code_point >= 0xd800 && code_point <= 0xdbff)
+                        {
+                            if (document_.compare(position_, 2, "\\u") != 0)
+                            {
+                                Fail("Missing low surrogate");
+                            }
+                            position_ += 2;
+                            unsigned const low = ReadHex4();
+                            if (low < 0xdc00 || low > 0xdfff)
+                            {
+                                Fail("Invalid low surrogate");
+                            }
+                            code_point = 0x10000 + ((code_point - 0xd800) << 10) + (low - 0xdc00);
+                        }
+                        else if (code_point >= 0xdc00 && code_point <= 0xdfff)
+                        {
+                            Fail("Unpaired low surrogate");
+                        }
+                        AppendUtf8(buffer, code_point);
+                        break;
+                    }
+                    default:
+                    {
+                        Fail("Invalid escape sequence");
+                    }
+                }
+                run_begin = position_;
+            }
+
+            std::string_view const run = document_.substr(run_begin, position_ - run_begin);
+            ++position_;
+            if (!escaped)
+            {
+                return run;
+            }
+            buffer.append(run.data(), run.size());
+            return buffer;
+        }
+
+        std::string_view document_;
+        std::size_t position_;
+        std::string key_buffer_;
+    };
+
+    template <typename T>
+    void Read(Reader& reader, T& value);
+
+    inline void Read(Reader& reader, std::string& value)
+    {
+        reader.ReadString(value);
+    }
+
+    template <typename T>
+    void Read(Reader& reader, std::vector<T>& values)
+    {
+        values.clear();
+        reader.Expect('[');
+        for (bool first = true; reader.Next(first, ']');)
+        {
+            T value{};
+            Read(reader, value);
+            values.push_back(std::move(value));
+        }
+    }
+
+    template <typename T>
+    void Read(Reader& reader, T& value)
+    {
+        if constexpr (std::is_same_v<T, bool>)
+        {
+            value = reader.ReadBool();
+        }
+        else if constexpr (std::is_integral_v<T>)
+        {
+            reader.ReadInteger(value);
+        }
+        else if constexpr (std::is_floating_point_v<T>)
+        {
+            // read as double and narrowed, like nlohmann::json::get
+            value = static_cast<T>(reader.ReadDouble());
+        }
+        else if constexpr (std::is_enum_v<T>)
+        {
+            std::underlying_type_t<T> raw_value{};
+            reader.ReadInteger(raw_value);
+            value = static_cast<T>(raw_value);
+        }
+        else
+        {
+            // generated structs
+            value.ReadJson(reader);
+        }
+    }
+
+    template <typename T>
+    T ReadValue(Reader& reader)
+    {
+        T value{};
+        Read(reader, value);
+        return value;
+    }
+}  // namespace json_reader
+'''
@@ -0,0 +1,336 @@
+from string import Template
+
+JSON_STREAM_HEADER_NAME = 'JsonStream'
+
+# runtime of the streaming element reader and writer, written once to the header root directory (the elements are
+# decoded with the handlers of the push parser, $push_parser_header is the path of JSON_PUSH_PARSER_HEADER)
+JSON_STREAM_HEADER = Template(r'''#pragma once
+
+#include <algorithm>
+#include <cstddef>
+#include <istream>
+#include <ostream>
+#include <stdexcept>
+#include <string>
+#include <string_view>
+#include <type_traits>
+#include <utility>
+
+#include <$push_parser_header>
+
+namespace json_stream
+{
+    enum class Format
+    {
+        // detected from the first byte of the input, '[' is an Array and anything else is Lines
+        Auto,
+        // a single top-level json array
+        Array,
+        // json values separated by whitespace, newline delimited json (NDJSON) has one per line
+        Lines,
+    };
+
+    // decodes the elements of a top-level json array (or of newline delimited json) one at a time
+    //
+    // The input is a buffer (a file read whole, or memory-mapped) or a stream read in chunks, only the element being
+    // decoded is held in memory. Errors throw json_push::ParseError, with the position in the whole input.
+    template <typename T>
+    class ElementReader
+    {
+    public:
+        static constexpr std::size_t default_chunk_size = 1 << 16;
+
+        explicit ElementReader(std::string_view buffer, Format format = Format::Auto)
+            : format_(format), data_(buffer)
+        {
+        }
+
+        explicit ElementReader(std::istream& input, Format format = Format::Auto,
+                               std::size_t chunk_size = default_chunk_size)
+            : format_(format), input_(&input), chunk_(std::max<std::size_t>(chunk_size, 1), '\0')
+        {
+        }
+
+        // decodes the next element, returns false at the end of the input
+        bool Next(T& element)
+        {
+            if (state_ == State::End)
+            {
+                return false;
+            }
+            if (state_ == State::Start)
+            {
+                Begin();
+            }
+            if (!(state_ == State::Lines ? SkipWhitespace() : NextArrayElement()))
+            {
+                state_ = State::End;
+                return false;
+            }
+            element = T{};
+            Decode(element);
+            ++count_;
+            return true;
+        }
+
+        // elements decoded so far
+        std::size_t Count() const
+        {
+            return count_;
+        }
+
+    private:
+        enum class State
+        {
+            Start,
+            ArrayFirst,
+            ArrayNext,
+            Lines,
+            End,
+        };
+
+        void Begin()
+        {
+            bool const has_data = SkipWhitespace();
+            Format format = format_;
+            if (format == Format::Auto)
+            {
+                format = has_data && data_.front() == '[' ? Format::Array : Format::Lines;
+            }
+            if (format == Format::Lines)
+            {
+                state_ = State::Lines;
+                return;
+            }
+            if (!has_data || data_.front() != '[')
+            {
+                Fail("Expected '['");
+            }
+            Advance(1);
+            state_ = State::ArrayFirst;
+        }
+
+        bool NextArrayElement()
+        {
+            if (!SkipWhitespace())
+            {
+                Fail("Unexpected end of input");
+            }
+            if (data_.front() == ']')
+            {
+                Advance(1);
+                if (SkipWhitespace())
+                {
+                    Fail("Unexpected data after the array");
+                }
+                return false;
+            }
+            if (state_ == State::ArrayNext)
+            {
+                if (data_.front() != ',')
+                {
+                    Fail("Expected ',' or ']'");
+                }
+                Advance(1);
+                if (!SkipWhitespace())
+                {
+                    Fail("Unexpected end of input");
+                }
+            }
+            state_ = State::ArrayNext;
+            return true;
+        }
+
+        void Decode(T& element)
+        {
+            json_push::Parser parser(element, offset_, line_, offset_ - line_begin_ + 1);
+            while (true)
+            {
+                Advance(parser.Feed(data_));
+                if (parser.Done())
+                {
+                    return;
+                }
+                if (!Fill())
+                {
+                    parser.Finish();
+                    return;
+                }
+            }
+        }
+
+        // skips whitespace, refilling the buffer from the stream, returns false at the end of the input
+        bool SkipWhitespace()
+        {
+            while (true)
+            {
+                std::size_t i = 0;
+                while (i < data_.size() && IsWhitespace(data_[i]))
+                {
+                    ++i;
+                }
+                Advance(i);
+                if (!data_.empty())
+                {
+                    return true;
+                }
+                if (!Fill())
+                {
+                    return false;
+                }
+            }
+        }
+
+        // reads the next chunk of the stream, once the buffer is consumed
+        bool Fill()
+        {
+            if (input_ == nullptr)
+            {
+                return false;
+            }
+            input_->read(chunk_.data(), static_cast<std::streamsize>(chunk_.size()));
+            data_ = std::string_view(chunk_.data(), static_cast<std::size_t>(input_->gcount()));
+            return !data_.empty();
+        }
+
+        void Advance(std::size_t count)
+        {
+            std::string_view const consumed = data_.substr(0, count);
+            std::size_t const last_newline = consumed.rfind('\n');
+            if (last_newline != std::string_view::npos)
+            {
+                line_ += static_cast<std::size_t>(std::count(consumed.begin(), consumed.end(), '\n'));
+                line_begin_ = offset_ + last_newline + 1;
+            }
+            offset_ += count;
+            data_.remove_prefix(count);
+        }
+
+        static bool IsWhitespace(char c)
+        {
+            return c == ' ' || c == '\t' || c == '\n' || c == '\r';
+        }
+
+        [[noreturn]] void Fail(std::string const& message) const
+        {
+            throw json_push::ParseError(message, offset_, line_, offset_ - line_begin_ + 1);
+        }
+
+        Format format_;
+        State state_ = State::Start;
+        std::string_view data_;
+        std::istream* input_ = nullptr;
+        std::string chunk_;
+        std::size_t count_ = 0;
+        std::size_t offset_ = 0;
+        std::size_t line_ = 1;
+        std::size_t line_begin_ = 0;
+    };
+
+    template <typename T, typename = void>
+    struct HasAppendJson : std::false_type
+    {
+    };
+
+    template <typename T>
+    struct HasAppendJson<T, std::void_t<decltype(std::declval<T const&>().AppendJson(std::declval<std::string&>()))>>
+        : std::true_type
+    {
+    };
+
+    // writes elements as a top-level json array (or as newline delimited json) one at a time
+    //
+    // The elements are serialized to a buffer, written to the output each time it reaches flush_size. The array is
+    // ended by Close, or by the destructor.
+    template <typename T>
+    class ElementWriter
+    {
+    public:
+        static constexpr std::size_t flush_size = 1 << 16;
+
+        explicit ElementWriter(std::ostream& output, Format format = Format::Array)
+            : output_(output), format_(format == Format::Lines ? Format::Lines : Format::Array)
+        {
+        }
+
+        ElementWriter(ElementWriter const&) = delete;
+        ElementWriter& operator=(ElementWriter const&) = delete;
+
+        ~ElementWriter()
+        {
+            try
+            {
+                Close();
+            }
+            catch (...)
+            {
+            }
+        }
+
+        void Write(T const& element)
+        {
+            if (closed_)
+            {
+                throw std::logic_error("Write after Close");
+            }
+            if (format_ == Format::Array)
+            {
+                buffer_ += count_ == 0 ? '[' : ',';
+            }
+            // serialized in place with the direct serializer, when it is generated
+            if constexpr (HasAppendJson<T>::value)
+            {
+                element.AppendJson(buffer_);
+            }
+            else
+            {
+                buffer_ += element.ToJson();
+            }
+            if (format_ == Format::Lines)
+            {
+                buffer_ += '\n';
+            }
+            ++count_;
+            if (buffer_.size() >= flush_size)
+            {
+                Flush();
+            }
+        }
+
+        // ends the array and flushes the output
+        void Close()
+        {
+            if (closed_)
+            {
+                return;
+            }
+            closed_ = true;
+            if (format_ == Format::Array)
+            {
+                buffer_ += count_ == 0 ? "[]" : "]";
+            }
+            Flush();
+            output_.flush();
+        }
+
+        // elements written so far
+        std::size_t Count() const
+        {
+            return count_;
+        }
+
+    private:
+        void Flush()
+        {
+            output_.write(buffer_.data(), static_cast<std::streamsize>(buffer_.size()));
+            buffer_.clear();
+        }
+
+        std::ostream& output_;
+        Format format_;
+        std::string buffer_;
+        std::size_t count_ = 0;
+        bool closed_ = false;
+    };
+}  // namespace json_stream
+''')
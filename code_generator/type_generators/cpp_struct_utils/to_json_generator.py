@@ -1,11 +1,18 @@
+from typing import List
+
 from code_generator.line_buffer import LineBuffer, IndentedBlock
-from schema_parser.type_defs.enum_type import EnumType
-from schema_parser.type_defs.extended_variant import ExtendedVariant
 from schema_parser.type_defs.struct_type import StructType
-from schema_parser.type_defs.type_def_base import TypeDefBase
+from schema_parser.type_defs.type_def_base import TypeDefBase, TypeDefKind
 from schema_parser.type_registry import TypeRegistry
 
 
+# inner type members, which are not serialized themselves
+INNER_TYPE_KINDS = frozenset((TypeDefKind.EnumType, TypeDefKind.StructType, TypeDefKind.ExtendedVariantType))
+
+# characters with a short escape sequence in json strings
+JSON_ESCAPES = {'"': '\\"', '\\': '\\\\', '\b': '\\b', '\f': '\\f', '\n': '\\n', '\r': '\\r', '\t': '\\t'}
+
+
 class ToJsonWriter:
     buffer: LineBuffer
     type_registry: TypeRegistry
@@ -33,6 +40,275 @@ class ToJsonWriter:
         self.buffer.append('return res;')
 
     def member_to_json(self, member: TypeDefBase):
-        if isinstance(member, (EnumType, StructType, ExtendedVariant)):
+        if member.kind in INNER_TYPE_KINDS:
             return
         self.buffer.append(f'{{ "{member.type_name}", m.{member.type_name} }}')
+
+
+class DirectToJsonWriter(ToJsonWriter):
+    """AppendJson writing the json text of a struct straight into a string, without building a nlohmann::json tree
+
+    Member keys are written as precomputed literals (escaped key with its separators) and values with the
+    json_writer helpers (JSON_WRITER_HEADER), so the text is the same as nlohmann::json::dump() of the ToJson tree:
+    compact, with the members in the sorted key order of a nlohmann object. Floating-point numbers have the layout
+    of dump() with the shortest round-trip digits, which are rarely shorter than nlohmann's (see AppendFloat)."""
+    # bytes reserved per member value, on top of the key literals
+    VALUE_SIZE_ESTIMATE = 8
+
+    def write_function(self):
+        self.buffer.append(f"void AppendJson(std::string& out, {self.container_struct.type_name} const& m)")
+        self.buffer.append("{")
+        with IndentedBlock(self.buffer):
+            self._write_body()
+        self.buffer.append("}")
+        self.buffer.new_line()
+
+    def serialized_members(self) -> List[TypeDefBase]:
+        # nlohmann objects are ordered maps, keys are compared as (utf-8) byte strings
+        members = [member for member in self.container_struct.members if member.kind not in INNER_TYPE_KINDS]
+        return sorted(members, key=lambda member: member.type_name.encode())
+
+    def key_literals(self) -> List[str]:
+        """Text written before each serialized member value"""
+        return [('{' if i == 0 else ',') + self._json_string(member.type_name) + ':'
+                for i, member in enumerate(self.serialized_members())]
+
+    def size_estimate(self) -> int:
+        """Capacity reserved for the json text of the struct"""
+        key_literals = self.key_literals()
+        return sum(len(key.encode()) for key in key_literals) + len(key_literals) * self.VALUE_SIZE_ESTIMATE + 2
+
+    def _write_body(self):
+        members = self.serialized_members()
+        if not members:
+            # an empty initializer list makes a null nlohmann::json
+            self.buffer.append('out += "null";')
+            return
+        for member, key_literal in zip(members, self.key_literals()):
+            self.buffer.append(f'out += {self._cpp_string_literal(key_literal)};')
+            self.buffer.append(f'json_writer::AppendValue(out, m.{member.type_name});')
+        self.buffer.append("out += '}';")
+
+    @staticmethod
+    def _json_string(value: str) -> str:
+        """Json string of a key, escaped the way nlohmann::json::dump() does"""
+        escaped = []
+        for char in value:
+            if char in JSON_ESCAPES:
+                escaped.append(JSON_ESCAPES[char])
+            elif ord(char) < 0x20:
+                escaped.append(f'\\u{ord(char):04x}')
+            else:
+                escaped.append(char)
+        return '"' + ''.join(escaped) + '"'
+
+    @staticmethod
+    def _cpp_string_literal(value: str) -> str:
+        chars = []
+        for byte in value.encode():
+            if chr(byte) in '"\\':
+                chars.append('\\' + chr(byte))
+            elif 0x20 <= byte < 0x7f:
+                chars.append(chr(byte))
+            else:
+                # octal escapes are at most 3 digits long, so they can't swallow the following characters
+                chars.append(f'\\{byte:03o}')
+        return '"' + ''.join(chars) + '"'
+
+
+JSON_WRITER_HEADER_NAME = 'JsonWriter'
+
+# helpers of the generated AppendJson functions, written once to the header root directory
+JSON_WRITER_HEADER = r'''#pragma once
+
+#include <algorithm>
+#include <charconv>
+#include <cmath>
+#include <string>
+#include <string_view>
+#include <type_traits>
+#include <variant>
+#include <vector>
+
+namespace json_writer
+{
+    inline void AppendString(std::string& out, std::string_view value)
+    {
+        static char const hex_digits[] = "0123456789abcdef";
+        out += '"';
+        std::size_t run_begin = 0;
+        for (std::size_t i = 0; i < value.size(); ++i)
+        {
+            auto const c = static_cast<unsigned char>(value[i]);
+            if (c >= 0x20 && c != '"' && c != '\\')
+            {
+                continue;
+            }
+            out.append(value.data() + run_begin, i - run_begin);
+            run_begin = i + 1;
+            switch (c)
+            {
+                case '"': out += "\\\""; break;
+                case '\\': out += "\\\\"; break;
+                case '\b': out += "\\b"; break;
+                case '\f': out += "\\f"; break;
+                case '\n': out += "\\n"; break;
+                case '\r': out += "\\r"; break;
+                case '\t': out += "\\t"; break;
+                default:
+                    out += "\\u00";
+                    out += hex_digits[c >> 4];
+                    out += hex_digits[c & 0xf];
+            }
+        }
+        out.append(value.data() + run_begin, value.size() - run_begin);
+        out += '"';
+    }
+
+    template <typename T>
+    void AppendInteger(std::string& out, T value)
+    {
+        char buffer[24];
+        out.append(buffer, std::to_chars(buffer, buffer + sizeof(buffer), value).ptr);
+    }
+
+    // the number text of nlohmann::json::dump(): a ".0" suffix for integral values and exponent notation (with at
+    // least two exponent digits) out of [1e-5, 1e15). The digits are the shortest that round-trip, from
+    // std::to_chars (which needs a standard library with floating-point to_chars: GCC 11, MSVC 19.24, libc++ 17).
+    // nlohmann's grisu2 digits are not always the shortest or the closest, so about 0.1% of the values have one
+    // digit less than dump() (-506421.1775542541 instead of -506421.17755425413) or another last digit
+    // (570659.1559343575 instead of 570659.1559343576). Both texts parse back to the same double.
+    inline void AppendFloat(std::string& out, double value)
+    {
+        if (!std::isfinite(value))
+        {
+            out += "null";
+            return;
+        }
+        if (value == 0)
+        {
+            out += std::signbit(value) ? "-0.0" : "0.0";
+            return;
+        }
+        // d[.ddd]e(+|-)xx
+        char buffer[32];
+        char const* const end = std::to_chars(buffer, buffer + sizeof(buffer), value, std::chars_format::scientific).ptr;
+        char const* begin = buffer;
+        if (*begin == '-')
+        {
+            out += '-';
+            ++begin;
+        }
+        char const* const exponent_begin = std::find(begin, end, 'e');
+        int exponent = 0;
+        std::from_chars(exponent_begin + (exponent_begin[1] == '+' ? 2 : 1), end, exponent);
+        char digits[20];
+        int digit_count = 0;
+        for (char const* c = begin; c != exponent_begin; ++c)
+        {
+            if (*c != '.')
+            {
+                digits[digit_count++] = *c;
+            }
+        }
+        // digits "ddd" are 0.ddd * 10^point
+        int const point = exponent + 1;
+        if (digit_count <= point && point <= 15)
+        {
+            out.append(digits, static_cast<std::size_t>(digit_count));
+            out.append(static_cast<std::size_t>(point - digit_count), '0');
+            out += ".0";
+        }
+        else if (0 < point && point <= 15)
+        {
+            out.append(digits, static_cast<std::size_t>(point));
+            out += '.';
+            out.append(digits + point, static_cast<std::size_t>(digit_count - point));
+        }
+        else if (-4 < point && point <= 0)
+        {
+            out += "0.";
+            out.append(static_cast<std::size_t>(-point), '0');
+            out.append(digits, static_cast<std::size_t>(digit_count));
+        }
+        else
+        {
+            out += digits[0];
+            if (digit_count > 1)
+            {
+                out += '.';
+                out.append(digits + 1, static_cast<std::size_t>(digit_count - 1));
+            }
+            out += exponent < 0 ? "e-" : "e+";
+            int const magnitude = exponent < 0 ? -exponent : exponent;
+            if (magnitude < 10)
+            {
+                out += '0';
+            }
+            AppendInteger(out, magnitude);
+        }
+    }
+
+    template <typename T>
+    void AppendValue(std::string& out, T const& value);
+
+    inline void AppendValue(std::string& out, std::string const& value)
+    {
+        AppendString(out, value);
+    }
+
+    inline void AppendValue(std::string& out, std::monostate)
+    {
+        out += "null";
+    }
+
+    template <typename T>
+    void AppendValue(std::string& out, std::vector<T> const& values)
+    {
+        out += '[';
+        bool first = true;
+        for (auto const& value : values)
+        {
+            if (!first)
+            {
+                out += ',';
+            }
+            first = false;
+            AppendValue(out, value);
+        }
+        out += ']';
+    }
+
+    template <typename... Ts>
+    void AppendValue(std::string& out, std::variant<Ts...> const& value)
+    {
+        std::visit([&out](auto const& alternative) { AppendValue(out, alternative); }, value);
+    }
+
+    template <typename T>
+    void AppendValue(std::string& out, T const& value)
+    {
+        if constexpr (std::is_same_v<T, bool>)
+        {
+            out += value ? "true" : "false";
+        }
+        else if constexpr (std::is_integral_v<T>)
+        {
+            AppendInteger(out, value);
+        }
+        else if constexpr (std::is_floating_point_v<T>)
+        {
+            AppendFloat(out, static_cast<double>(value));
+        }
+        else if constexpr (std::is_enum_v<T>)
+        {
+            AppendInteger(out, static_cast<std::underlying_type_t<T>>(value));
+        }
+        else
+        {
+            // generated structs
+            value.AppendJson(out);
+        }
+    }
+}  // namespace json_writer
+'''
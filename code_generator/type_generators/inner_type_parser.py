@@ -1,54 +1,90 @@
-from typing import List
+from typing import Callable, List, Union
 
 from code_generator.type_generators.cpp_simple_alias import CppSimpleAlias
+from code_generator.type_generators.kind_dispatch import KindDispatch
 from schema_parser.reg_key import RegKey
 from schema_parser.type_defs.array_alias import ArrayAlias
-from schema_parser.type_defs.enum_type import EnumType
 from schema_parser.type_defs.ref_type import RefType
 from schema_parser.type_defs.simple_alias import SimpleAlias
-from schema_parser.type_defs.struct_type import StructType
-from schema_parser.type_defs.type_def_base import TypeDefBase
+from schema_parser.type_defs.type_def_base import TypeDefBase, TypeDefKind
 from schema_parser.type_defs.variant_alias import VariantAlias
 from schema_parser.type_registry import TypeRegistry
 
+# registry memo of the C++ type spelling of array and variant type definitions, keyed by type definition identity
+CPP_TYPE_MEMO = 'cpp_element_type'
+
+
+def _memoized_type(element_def: Union[ArrayAlias, VariantAlias], type_registry: TypeRegistry,
+                   compute_fn: Callable[[TypeDefBase, TypeRegistry], str]) -> str:
+    memo = type_registry.get_memo(CPP_TYPE_MEMO)
+    entry = memo.get(id(element_def))
+    if entry is None:
+        # the type def is kept in the entry, so that its id can't be reused while memoized
+        entry = memo[id(element_def)] = (element_def, compute_fn(element_def, type_registry))
+    return entry[1]
+
 
 def array_element_type(element_def: TypeDefBase, type_registry: TypeRegistry) -> str:
-    if isinstance(element_def, SimpleAlias):
-        cpp_alias = CppSimpleAlias(element_def)
-        return cpp_alias.actual_type()
-    if isinstance(element_def, ArrayAlias):
-        return f"std::vector<{array_element_type(element_def.element_type_def, type_registry)}>"
-    if isinstance(element_def, VariantAlias):
-        return variant_element_type(element_def, type_registry)
-    if isinstance(element_def, StructType):
-        return element_def.type_name
-    if isinstance(element_def, EnumType):
-        return element_def.type_name
-    if isinstance(element_def, RefType):
-        key = RegKey.from_uri(element_def.target_uri)
-        deref_type = type_registry.get(key)
-        return deref_type.type_name
-    raise TypeError(f"Unsupported array element type: {element_def}")
+    if element_def.kind == TypeDefKind.ArrayAlias:
+        return _memoized_type(element_def, type_registry, _array_element_type)
+    return _array_element_type(element_def, type_registry)
 
 
 def variant_element_type(element_def: VariantAlias, type_registry: TypeRegistry) -> str:
+    return _memoized_type(element_def, type_registry, _variant_element_type)
+
+
+def _simple_type(element_def: SimpleAlias, _type_registry: TypeRegistry) -> str:
+    return CppSimpleAlias(element_def).actual_type()
+
+
+def _named_type(element_def: TypeDefBase, _type_registry: TypeRegistry) -> str:
+    return element_def.type_name
+
+
+def _ref_target_type(element_def: RefType, type_registry: TypeRegistry) -> str:
+    return type_registry.get(RegKey.from_uri(element_def.target_uri)).type_name
+
+
+def _vector_type(element_def: ArrayAlias, type_registry: TypeRegistry) -> str:
+    return f"std::vector<{array_element_type(element_def.element_type_def, type_registry)}>"
+
+
+def _nested_variant_type(element_def: VariantAlias, type_registry: TypeRegistry) -> str:
+    return f"std::variant<{variant_element_type(element_def, type_registry)}>"
+
+
+array_element_types = KindDispatch({
+    TypeDefKind.SimpleAlias: _simple_type,
+    TypeDefKind.ArrayAlias: _vector_type,
+    TypeDefKind.VariantAlias: variant_element_type,
+    TypeDefKind.StructType: _named_type,
+    TypeDefKind.EnumType: _named_type,
+    TypeDefKind.RefType: _ref_target_type,
+})
+
+variant_member_types = KindDispatch({
+    TypeDefKind.SimpleAlias: _simple_type,
+    TypeDefKind.ArrayAlias: array_element_type,
+    TypeDefKind.VariantAlias: _nested_variant_type,
+    TypeDefKind.StructType: _named_type,
+    TypeDefKind.EnumType: _named_type,
+    TypeDefKind.RefType: _ref_target_type,
+})
+
+
+def _array_element_type(element_def: TypeDefBase, type_registry: TypeRegistry) -> str:
+    element_type_fn = array_element_types.get(element_def)
+    if element_type_fn is None:
+        raise TypeError(f"Unsupported array element type: {element_def}")
+    return element_type_fn(element_def, type_registry)
+
+
+def _variant_element_type(element_def: VariantAlias, type_registry: TypeRegistry) -> str:
     mem_types: List[str] = []
     for mem_type_def in element_def.member_type_defs:
-        if isinstance(mem_type_def, SimpleAlias):
-            cpp_alias = CppSimpleAlias(mem_type_def)
-            mem_types.append(cpp_alias.actual_type())
-        elif isinstance(mem_type_def, ArrayAlias):
-            mem_types.append(array_element_type(mem_type_def, type_registry))
-        elif isinstance(mem_type_def, VariantAlias):
-            mem_types.append(f"std::variant<{variant_element_type(mem_type_def, type_registry)}>")
-        elif isinstance(mem_type_def, StructType):
-            mem_types.append(mem_type_def.type_name)
-        elif isinstance(mem_type_def, EnumType):
-            mem_types.append(mem_type_def.type_name)
-        elif isinstance(mem_type_def, RefType):
-            key = RegKey.from_uri(mem_type_def.target_uri)
-            deref_type = type_registry.get(key)
-            mem_types.append(deref_type.type_name)
-        else:
+        mem_type_fn = variant_member_types.get(mem_type_def)
+        if mem_type_fn is None:
             raise TypeError(f"Unsupported variant element type: {mem_type_def}")
+        mem_types.append(mem_type_fn(mem_type_def, type_registry))
     return f"std::variant<{','.join(mem_types)}>"
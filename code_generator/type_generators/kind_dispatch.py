@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Union
+
+from code_generator.plugin_registry import load_plugin
+from schema_parser.type_defs.type_def_base import TypeDefBase, TypeDefKind
+
+
+class KindDispatch:
+    """Handlers keyed on the TypeDefKind of a type definition; a single lookup per type definition instead of an
+    isinstance ladder (isinstance checks against the abstract TypeDefBase hierarchy are comparatively slow)
+
+    Emitters keep one table per ladder. Other backends can copy a table and register their own handlers, without
+    editing the emitter. Handlers can also be registered as 'module:attribute' import paths, imported on first use."""
+    _handlers: Dict[TypeDefKind, Callable]
+    _pending: Dict[TypeDefKind, str]
+
+    def __init__(self, handlers: Union[Dict[TypeDefKind, Callable], None] = None,
+                 import_paths: Union[Dict[TypeDefKind, str], None] = None):
+        self._handlers = dict(handlers) if handlers else {}
+        self._pending = dict(import_paths) if import_paths else {}
+
+    def register(self, kind: TypeDefKind, handler: Callable):
+        self._handlers[kind] = handler
+        self._pending.pop(kind, None)
+
+    def register_lazy(self, kind: TypeDefKind, import_path: str):
+        self._handlers.pop(kind, None)
+        self._pending[kind] = import_path
+
+    def copy(self) -> KindDispatch:
+        return KindDispatch(self._handlers, self._pending)
+
+    def get(self, type_def: TypeDefBase) -> Union[Callable, None]:
+        """Handler of the kind of a type definition, None if the kind is not handled"""
+        handler = self._handlers.get(type_def.kind)
+        if handler is None and type_def.kind in self._pending:
+            handler = self._handlers[type_def.kind] = load_plugin(self._pending.pop(type_def.kind))
+        return handler
+
+    def __contains__(self, kind: TypeDefKind):
+        return kind in self._handlers or kind in self._pending
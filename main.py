@@ -1,8 +1,11 @@
-from code_generator.cpp_code_generator import CodeGenerator
+import sys
+
+from code_generator.plugin_registry import BACKENDS
 from schema_parser.schema_batch_parser import SchemaBatchParser
 
 
-def start():
+def start(watch: bool = False, backend: str = 'cpp'):
+    code_generator_cls = BACKENDS.get(backend)
     batch_parser = SchemaBatchParser()
 
     batch_parser.set_input_dir("example/schemas")
@@ -12,11 +15,17 @@ def start():
     batch_parser.add_schema_file('type_reference.json')
     batch_parser.add_schema_file('extended_variant.json')
 
+    if watch:
+        from code_generator.schema_watcher import SchemaWatcher
+        code_gen = code_generator_cls(batch_parser.type_registry, 'temp_generated', 'include', 'src')
+        SchemaWatcher(batch_parser, code_gen, ['core']).run()
+        return
+
     batch_parser.parse(['core'])
 
-    code_gen = CodeGenerator(batch_parser.type_registry, 'temp_generated', 'include', 'src')
+    code_gen = code_generator_cls(batch_parser.type_registry, 'temp_generated', 'include', 'src')
     code_gen.generate_code()
 
 
 if __name__ == '__main__':
-    start()
+    start('--watch' in sys.argv[1:])
@@ -1 +1,2 @@
 CUSTOM_ATTR_PREFIX = '@meta:'
+GENERATOR_VERSION = '0.1.0'
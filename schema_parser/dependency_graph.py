@@ -0,0 +1,50 @@
+from typing import Dict, Iterable, List, Set
+
+from schema_parser.reg_key import RegKey
+from schema_parser.type_registry import TypeRegistry
+from schema_parser.utils.type_dependencies import get_dependency_keys, get_referenced_uris
+
+
+class DependencyGraph:
+    """Dependencies between registered types (struct members, array elements, variant members and reference
+    targets), with reverse edges"""
+    _dependencies: Dict[RegKey, List[RegKey]]
+    _dependents: Dict[RegKey, List[RegKey]]
+
+    def __init__(self, type_registry: TypeRegistry):
+        self._dependencies = {}
+        self._dependents = {}
+        for type_def in type_registry.iter_all():
+            key = type_def.reg_key
+            deps = dict.fromkeys(get_dependency_keys(type_def, type_registry))
+            # direct reference targets are kept even when not registered (e.g. removed types)
+            deps.update(dict.fromkeys(RegKey.from_uri(uri) for uri in get_referenced_uris(type_def)))
+            deps.pop(key, None)
+            self._dependencies[key] = list(deps)
+            for dep_key in deps:
+                self._dependents.setdefault(dep_key, []).append(key)
+
+    def get_dependencies(self, key: RegKey) -> List[RegKey]:
+        return self._dependencies.get(key, [])
+
+    def get_dependents(self, key: RegKey) -> List[RegKey]:
+        return self._dependents.get(key, [])
+
+    @staticmethod
+    def _closure(keys: Iterable[RegKey], edges: Dict[RegKey, List[RegKey]]) -> Set[RegKey]:
+        closure = set(keys)
+        pending = list(closure)
+        while pending:
+            for next_key in edges.get(pending.pop(), []):
+                if next_key not in closure:
+                    closure.add(next_key)
+                    pending.append(next_key)
+        return closure
+
+    def get_affected(self, changed_keys: Iterable[RegKey]) -> Set[RegKey]:
+        """Changed keys and all their transitive dependents"""
+        return self._closure(changed_keys, self._dependents)
+
+    def get_required(self, root_keys: Iterable[RegKey]) -> Set[RegKey]:
+        """Root keys and all their transitive dependencies"""
+        return self._closure(root_keys, self._dependencies)
@@ -0,0 +1,95 @@
+import os
+from typing import List, Union
+
+from schema_parser import configs
+from schema_parser.type_registry import TypeRegistry
+
+CACHE_FILE_SUFFIX = '.pickle'
+
+
+class ParseCache:
+    """On-disk cache of parsed schema files, keyed by file content and path, namespace offset and generator version"""
+    _cache_dir: str
+    _max_size: int
+
+    def __init__(self, cache_dir: str, max_size: int = 256 * 1024 * 1024):
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+        os.makedirs(self._cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(content: bytes, ns_offset: List[str], source_file: str) -> str:
+        import hashlib
+        # source file is part of the key, as parsed types are attributed to the file they were loaded from
+        hasher = hashlib.sha256()
+        hasher.update(configs.GENERATOR_VERSION.encode())
+        hasher.update(b'\0')
+        hasher.update('::'.join(ns_offset).encode())
+        hasher.update(b'\0')
+        hasher.update(source_file.encode())
+        hasher.update(b'\0')
+        hasher.update(content)
+        return hasher.hexdigest()
+
+    def _get_entry_path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, key + CACHE_FILE_SUFFIX)
+
+    def _get_entry_paths(self) -> List[str]:
+        return [os.path.join(self._cache_dir, f) for f in os.listdir(self._cache_dir) if f.endswith(CACHE_FILE_SUFFIX)]
+
+    def load(self, key: str) -> Union[TypeRegistry, None]:
+        import pickle
+        entry_path = self._get_entry_path(key)
+        try:
+            with open(entry_path, 'rb') as entry_file:
+                type_registry = pickle.load(entry_file)
+        except FileNotFoundError:
+            return None
+        except Exception as ex:
+            print(f"Dropping unreadable parse cache entry [{entry_path}] [{ex}]")
+            self._remove(entry_path)
+            return None
+        # refresh modification time, which is used as the recency for eviction
+        os.utime(entry_path)
+        return type_registry
+
+    def store(self, key: str, type_registry: TypeRegistry):
+        import pickle
+        entry_path = self._get_entry_path(key)
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as entry_file:
+            pickle.dump(type_registry, entry_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, entry_path)
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_size
+
+        Lists the whole cache directory, so it is called once after a batch of stores rather than on each store."""
+        entries = []
+        total_size = 0
+        for entry_path in self._get_entry_paths():
+            try:
+                stat = os.stat(entry_path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+            total_size += stat.st_size
+
+        # drop least recently used entries first
+        entries.sort()
+        for _mtime, size, entry_path in entries:
+            if total_size <= self._max_size:
+                break
+            self._remove(entry_path)
+            total_size -= size
+
+    def invalidate(self):
+        for entry_path in self._get_entry_paths():
+            self._remove(entry_path)
+
+    @staticmethod
+    def _remove(entry_path: str):
+        try:
+            os.remove(entry_path)
+        except FileNotFoundError:
+            pass
@@ -1,31 +1,67 @@
 from __future__ import annotations
 
-import hashlib
-from typing import List
+import sys
+import weakref
+from typing import Tuple
 
 
 class RegKey:
-    _path: List[str]
+    """Immutable, interned registry key
+
+    Path segments are normalized on construction (segments containing '/' are split), so keys that render to the
+    same URI are the same object. Hash is computed once and equality is a tuple comparison."""
+    __slots__ = ('_path', '_hash', '__weakref__')
+    _path: Tuple[str, ...]
+    _hash: int
+
+    _interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def from_uri(cls, uri: str) -> RegKey:
+        return cls._intern(tuple(uri.split('/')))
 
     @classmethod
-    def from_uri(cls, uri: str):
-        return RegKey(*uri.split('/'))
+    def _intern(cls, path: Tuple[str, ...]) -> RegKey:
+        key = cls._interned.get(path)
+        if key is None:
+            # segments are interned too, keys share their common prefixes ('#', 'definitions', ...)
+            path = tuple([sys.intern(segment) for segment in path])
+            key = object.__new__(cls)
+            object.__setattr__(key, '_path', path)
+            object.__setattr__(key, '_hash', hash(path))
+            cls._interned[path] = key
+        return key
 
-    def __init__(self, *path):
-        self._path = list(path)
+    def __new__(cls, *path):
+        return cls._intern(tuple('/'.join(path).split('/')))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"RegKey is immutable: {self}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"RegKey is immutable: {self}")
+
+    def __reduce__(self):
+        return RegKey.from_uri, (str(self),)
 
     def __str__(self):
         return '/'.join(self._path)
 
+    def __repr__(self):
+        return f"RegKey({str(self)!r})"
+
     def __hash__(self):
-        return int(hashlib.md5(str(self).encode()).hexdigest()[:8], 16)
+        return self._hash
 
     def __eq__(self, other):
-        return str(self) == str(other)
+        if self is other:
+            return True
+        if not isinstance(other, RegKey):
+            return NotImplemented
+        return self._hash == other._hash and self._path == other._path
 
     def parent(self) -> RegKey:
-        return RegKey(*self._path[:-1])
+        return self._intern(self._path[:-1] or ('',))
 
     def add_leaf(self, leaf: str) -> RegKey:
-        new_path = self._path + [leaf]
-        return RegKey(*new_path)
+        return self._intern(self._path + tuple(leaf.split('/')))
@@ -1,48 +1,269 @@
+from __future__ import annotations
+
+import contextlib
+import io
 import json
 import os
-from typing import List
+import sys
+from typing import TYPE_CHECKING, Dict, Iterable, List, Set, Tuple, Union
 
 from schema_parser import configs
+from schema_parser.reg_key import RegKey
 from schema_parser.schema_parser import SchemaParser
+from schema_parser.type_registry import TypeRegistry
+from schema_parser.utils.pipeline_stats import PipelineStats, NULL_STATS
+
+if TYPE_CHECKING:
+    from schema_parser.parse_cache import ParseCache
+
+
+def read_schema_file(abs_path: str, stats: PipelineStats = NULL_STATS) -> bytes:
+    with stats.measure('read_file') as measurement:
+        with open(abs_path, 'rb') as j_file:
+            content = j_file.read()
+        measurement.bytes = len(content)
+    return content
+
+
+def load_schema(content: bytes, schema_file_path: str, stats: PipelineStats = NULL_STATS) -> Dict:
+    try:
+        with stats.measure('decode_json') as measurement:
+            measurement.bytes = len(content)
+            return json.loads(content)
+    except:
+        print(f"failed loading file: {schema_file_path}", flush=True)
+        raise
+
+
+def get_schema_namespaces(schema_def: Dict, ns_offset: List[str]) -> List[str]:
+    ns_key = configs.CUSTOM_ATTR_PREFIX + 'namespace'
+    return ns_offset + schema_def[ns_key].split('::') if ns_key in schema_def else ns_offset
+
+
+def parse_schema(parser: SchemaParser, content: bytes, schema_file_path: str, ns_offset: List[str], source_file: str):
+    schema_def = load_schema(content, schema_file_path, parser.stats)
+    namespaces = get_schema_namespaces(schema_def, ns_offset)
+    parser.type_registry.source_file = source_file
+    try:
+        parser.parse_root_level('#/definitions', namespaces, schema_def["definitions"])
+    except Exception as ex:
+        print(f"Failed parsing schema file [{schema_file_path}]")
+        raise
+    finally:
+        parser.type_registry.source_file = None
+
+
+class _IsolatedParseError(Exception):
+    """Failure of a schema file parsed in isolation, with its output and the registry of the definitions parsed
+    before the error (kept as constructor arguments, so that it is pickled whole out of worker processes)"""
+
+    def __init__(self, error: Exception, output: str, partial_registry: TypeRegistry):
+        super().__init__(error, output, partial_registry)
+        self.error = error
+        self.output = output
+        self.partial_registry = partial_registry
+
+    def __str__(self):
+        return f"{type(self.error).__name__}: {self.error}"
+
+
+def _parse_isolated_schema(content: bytes, schema_file_path: str, ns_offset: List[str], source_file: str,
+                           stats: PipelineStats) -> Tuple[TypeRegistry, PipelineStats, str]:
+    """Parse a single schema file into a private registry (may run in a worker process)
+
+    The output of the parse is returned instead of printed, for the caller to print it in build order. Failures raise
+    _IsolatedParseError, so that only the first failing file in build order is reported (see _raise_isolated_error)."""
+    parser = SchemaParser()
+    if stats.enabled:
+        # worker processes can't update the caller's stats, so collect into a fresh one and merge back later
+        stats = PipelineStats(stats.track_memory)
+        parser.stats = stats
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            parse_schema(parser, content, schema_file_path, ns_offset, source_file)
+    except Exception as ex:
+        raise _IsolatedParseError(ex, output.getvalue(), parser.type_registry) from ex
+    return parser.type_registry, stats, output.getvalue()
+
+
+def _print_output(output: str):
+    if output:
+        sys.stdout.write(output)
+        sys.stdout.flush()
+
+
+def _raise_isolated_error(failure: _IsolatedParseError):
+    _print_output(failure.output)
+    if failure.error.__traceback__ is None:
+        # raised in a worker process, the cause holds the text of its traceback
+        raise failure.error from failure.__cause__
+    raise failure.error from None
 
 
 class SchemaBatchParser:
     _build_order: List[str]
     _parser: SchemaParser
     _file_directory_offset: str
+    _cache: Union[ParseCache, None]
+    # per file registries of files parsed in isolation, used to re-parse single files
+    _file_registries: Dict[str, TypeRegistry]
 
     def __init__(self):
         self._build_order = []
         self._parser = SchemaParser()
         self._file_directory_offset = ''
+        self._cache = None
+        self._file_registries = {}
 
     @property
     def type_registry(self):
         return self._parser.type_registry
 
+    @property
+    def stats(self) -> PipelineStats:
+        return self._parser.stats
+
     def add_schema_file(self, file_path: str):
         self._build_order.append(file_path)
 
     def _get_abs_path(self, file_path: str) -> str:
         return os.path.join(self._file_directory_offset, file_path)
 
-    def parse(self, ns_offset: List[str]):
+    def get_schema_file_paths(self) -> Dict[str, str]:
+        """Schema files in build order, mapped to their paths on disk"""
+        return {schema_file_path: self._get_abs_path(schema_file_path) for schema_file_path in self._build_order}
+
+    def parse(self, ns_offset: List[str], workers: int = 1):
+        if self._cache is None and workers <= 1:
+            for schema_file_path in self._build_order:
+                abs_path = self._get_abs_path(schema_file_path)
+                content = read_schema_file(abs_path, self.stats)
+                parse_schema(self._parser, content, schema_file_path, ns_offset, abs_path)
+            return
+
+        # files are parsed independently and merged back in build order, so that the registry and the output are
+        # identical to the serial path: the first failing file is reported and its definitions parsed before the
+        # error are merged, then pending files are cancelled (and the files being parsed are not reported). Files
+        # are read up to the first unreadable one, whose error is raised once the files before it are merged
+        build_order = []
+        abs_paths = []
+        contents = []
+        read_error = None
         for schema_file_path in self._build_order:
-            with open(self._get_abs_path(schema_file_path)) as j_file:
-                try:
-                    schema_def = json.load(j_file)
-                except:
-                    print(f"failed loading file: {schema_file_path}", flush=True)
-                    raise
-                ns_key = configs.CUSTOM_ATTR_PREFIX + 'namespace'
-                namespaces = ns_offset + schema_def[ns_key].split('::') if ns_key in schema_def else ns_offset
-                try:
-                    self._parser.parse_root_level('#/definitions', namespaces, schema_def["definitions"])
-                except Exception as ex:
-                    print(f"Failed parsing schema file [{schema_file_path}]")
-                    raise
+            abs_path = self._get_abs_path(schema_file_path)
+            try:
+                contents.append(read_schema_file(abs_path, self.stats))
+            except Exception as ex:
+                read_error = ex
+                break
+            build_order.append(schema_file_path)
+            abs_paths.append(abs_path)
+        cache_keys = [self._cache.make_key(content, ns_offset, abs_path) if self._cache else None
+                      for content, abs_path in zip(contents, abs_paths)]
+        with self.stats.measure('load_cache'):
+            file_registries = [self._cache.load(cache_key) if self._cache else None for cache_key in cache_keys]
+        if self._cache:
+            hits = sum(1 for file_registry in file_registries if file_registry is not None)
+            self.stats.add('cache_hit', count=hits)
+            self.stats.add('cache_miss', count=len(file_registries) - hits)
+
+        executor = None
+        if workers > 1:
+            # only imported for parallel runs, as it is a large share of the startup time
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(max_workers=workers)
+        futures = {}
+        try:
+            if executor:
+                for i, schema_file_path in enumerate(build_order):
+                    if file_registries[i] is None:
+                        futures[i] = executor.submit(_parse_isolated_schema, contents[i], schema_file_path, ns_offset,
+                                                     abs_paths[i], self.stats)
+
+            for i, schema_file_path in enumerate(build_order):
+                file_registry = file_registries[i]
+                if file_registry is None:
+                    try:
+                        if i in futures:
+                            file_registry, file_stats, output = futures[i].result()
+                        else:
+                            file_registry, file_stats, output = _parse_isolated_schema(
+                                contents[i], schema_file_path, ns_offset, abs_paths[i], self.stats)
+                    except _IsolatedParseError as failure:
+                        with self.stats.measure('merge_registry'):
+                            self.type_registry.merge(failure.partial_registry)
+                        _raise_isolated_error(failure)
+                    _print_output(output)
+                    self.stats.merge(file_stats)
+                    if self._cache:
+                        with self.stats.measure('store_cache'):
+                            self._cache.store(cache_keys[i], file_registry)
+                self._file_registries[schema_file_path] = file_registry
+                with self.stats.measure('merge_registry'):
+                    self.type_registry.merge(file_registry)
+            if read_error is not None:
+                raise read_error
+        finally:
+            for future in futures.values():
+                future.cancel()
+            if executor:
+                executor.shutdown()
+            if self._cache:
+                with self.stats.measure('evict_cache'):
+                    self._cache.evict()
+
+    def reparse(self, ns_offset: List[str], changed_files: Iterable[str]) -> Set[RegKey]:
+        """Re-parse changed schema files (and any file not yet parsed in isolation), then rebuild the registry in
+        build order. Returns the keys defined by the previous and the new versions of the re-parsed files.
+
+        The registry is left untouched if any file fails to parse."""
+        changed_files = set(changed_files)
+        new_file_registries = {}
+        try:
+            for schema_file_path in self._build_order:
+                if schema_file_path in self._file_registries and schema_file_path not in changed_files:
+                    continue
+                abs_path = self._get_abs_path(schema_file_path)
+                content = read_schema_file(abs_path, self.stats)
+                cache_key = self._cache.make_key(content, ns_offset, abs_path) if self._cache else None
+                file_registry = self._cache.load(cache_key) if self._cache else None
+                if file_registry is None:
+                    try:
+                        file_registry, file_stats, output = _parse_isolated_schema(content, schema_file_path,
+                                                                                   ns_offset, abs_path, self.stats)
+                    except _IsolatedParseError as failure:
+                        _raise_isolated_error(failure)
+                    _print_output(output)
+                    self.stats.merge(file_stats)
+                    if self._cache:
+                        self._cache.store(cache_key, file_registry)
+                new_file_registries[schema_file_path] = file_registry
+        finally:
+            if self._cache:
+                with self.stats.measure('evict_cache'):
+                    self._cache.evict()
+
+        changed_keys = set()
+        for schema_file_path, file_registry in new_file_registries.items():
+            if schema_file_path in self._file_registries:
+                changed_keys.update(self._file_registries[schema_file_path].keys())
+            changed_keys.update(file_registry.keys())
+            self._file_registries[schema_file_path] = file_registry
+
+        with self.stats.measure('merge_registry'):
+            self.type_registry.clear()
+            for schema_file_path in self._build_order:
+                self.type_registry.merge(self._file_registries[schema_file_path])
+        return changed_keys
 
     def set_input_dir(self, dir_path: str):
         if not os.path.isdir(dir_path):
             raise FileNotFoundError(f"Schema definition directory does not exist [{dir_path}]")
         self._file_directory_offset = dir_path
+
+    def set_cache(self, cache: Union[ParseCache, None]):
+        self._cache = cache
+
+    def set_stats(self, stats: Union[PipelineStats, None]):
+        self._parser.stats = stats if stats is not None else NULL_STATS
@@ -3,14 +3,17 @@ from typing import Dict, List
 from schema_parser.reg_key import RegKey
 from schema_parser.type_registry import TypeRegistry
 from schema_parser.utils import attribute_reader
+from schema_parser.utils.pipeline_stats import PipelineStats, NULL_STATS
 from schema_parser.utils.type_parser import create_typedef
 
 
 class SchemaParser:
     _type_registry: TypeRegistry
+    stats: PipelineStats
 
     def __init__(self):
         self._type_registry = TypeRegistry()
+        self.stats = NULL_STATS
 
     @property
     def type_registry(self):
@@ -26,7 +29,9 @@ class SchemaParser:
 
             key = RegKey(base_uri, name)
             try:
-                type_defs = create_typedef(key, namespaces, name, definition, self._type_registry)
+                with self.stats.measure('create_typedef') as measurement:
+                    type_defs = create_typedef(key, namespaces, name, definition, self._type_registry)
+                    measurement.kind = type_defs[-1].kind.name
                 for type_def in type_defs:
                     self._type_registry.add(type_def)
             except KeyError as e:
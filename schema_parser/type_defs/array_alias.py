@@ -8,6 +8,7 @@ from schema_parser.utils.attribute_reader import read_custom_attrib
 
 class ArrayAlias(TypeDefBase):
     """Array type alias"""
+    __slots__ = ('element_type_def',)
     element_type_def: TypeDefBase
 
     def __init__(self, namespaces: List[str], type_name: str, reg_key: RegKey):
@@ -8,6 +8,7 @@ from schema_parser.utils.attribute_reader import read_custom_attrib
 
 class EnumType(TypeDefBase):
     """Enum definition"""
+    __slots__ = ('members', 'comments', 'underlying_type')
     members: Dict[str, int]
     comments: Dict[str, str]
     underlying_type: str
@@ -11,6 +11,7 @@ from schema_parser.type_registry import TypeRegistry
 
 
 class ExtendedVariant(TypeDefBase):
+    __slots__ = ('type_enum', 'content_variant')
     type_enum: EnumType
     content_variant: VariantAlias
 
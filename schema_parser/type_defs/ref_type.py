@@ -6,6 +6,7 @@ from schema_parser.type_defs.type_def_base import TypeDefBase, TypeDefKind
 
 class RefType(TypeDefBase):
     """Virtual type holding reference to a concrete type. Used for late reference resolution"""
+    __slots__ = ('target_uri',)
     target_uri: str
 
     def __init__(self, namespaces: List[str], type_name: str, reg_key: RegKey):
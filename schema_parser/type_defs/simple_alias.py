@@ -8,6 +8,7 @@ from schema_parser.utils.attribute_reader import read_custom_attrib
 
 class SimpleAlias(TypeDefBase):
     """Simple type alias"""
+    __slots__ = ('actual_type',)
     actual_type: str
 
     def __init__(self, namespaces: List[str], type_name: str, reg_key: RegKey):
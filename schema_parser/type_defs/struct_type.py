@@ -13,6 +13,7 @@ from schema_parser.utils.attribute_reader import read_custom_attrib
 
 
 class StructType(TypeDefBase):
+    __slots__ = ('members',)
     members: List[TypeDefBase]
 
     def __init__(self, namespaces: List[str], type_name: str, reg_key: RegKey):
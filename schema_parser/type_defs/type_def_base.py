@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 from abc import ABC
 from enum import Enum
-from typing import Dict, Callable, List
+from typing import Dict, Callable, List, Sequence, Tuple
 
 from schema_parser.reg_key import RegKey
 
@@ -18,19 +18,49 @@ class TypeDefKind(Enum):
     RefType = 6
 
 
+# namespaces are shared by many types, so a single tuple is kept per distinct namespace
+_namespace_intern_table: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def intern_namespaces(namespaces: Sequence[str]) -> Tuple[str, ...]:
+    namespaces = tuple(namespaces)
+    return _namespace_intern_table.setdefault(namespaces, namespaces)
+
+
 class TypeDefBase(ABC):
-    """Base class for all type definition classes"""
-    namespaces: List[str]
+    """Base class for all type definition classes
+
+    Type definitions are slotted (registries can hold a very large number of them), subclasses must declare the
+    attributes they set in their own __slots__."""
+    __slots__ = ('namespaces', 'type_name', 'reg_key', 'kind')
+    namespaces: Tuple[str, ...]
     type_name: str
     reg_key: RegKey
     kind: TypeDefKind
 
-    def __init__(self, namespaces: List[str], type_name: str, reg_key: RegKey, kind: TypeDefKind):
-        self.namespaces = namespaces
+    def __init__(self, namespaces: Sequence[str], type_name: str, reg_key: RegKey, kind: TypeDefKind):
+        self.namespaces = intern_namespaces(namespaces)
         self.type_name = type_name
         self.reg_key = reg_key
         self.kind = kind
 
+    @classmethod
+    def _slot_names(cls) -> List[str]:
+        slot_names = cls.__dict__.get('_all_slot_names')
+        if slot_names is None:
+            slot_names = [name for c in reversed(cls.__mro__) for name in c.__dict__.get('__slots__', ())]
+            setattr(cls, '_all_slot_names', slot_names)
+        return slot_names
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self._slot_names() if hasattr(self, name)}
+
+    def __setstate__(self, state):
+        # also accepts the state of type definitions pickled before they were slotted (their __dict__)
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.namespaces = intern_namespaces(self.namespaces)
+
     def parse(self, definition: Dict, creator_fn: Callable, type_registry) -> List[TypeDefBase]:
         raise NotImplementedError
 
@@ -10,6 +10,7 @@ from schema_parser.utils.attribute_reader import read_custom_attrib
 
 class VariantAlias(TypeDefBase):
     """Variant type alias"""
+    __slots__ = ('member_type_defs',)
     member_type_defs: List[TypeDefBase]
 
     def __init__(self, namespaces: List[str], type_name: str, reg_key: RegKey):
@@ -1,40 +1,231 @@
 from __future__ import annotations
 
-from typing import Dict
+import os
+from typing import Dict, Hashable, List, Iterator, Tuple, Union
 
+from schema_parser import configs
 from schema_parser.reg_key import RegKey
 from schema_parser.type_defs.ref_type import RefType
-from schema_parser.type_defs.type_def_base import TypeDefBase
+from schema_parser.type_defs.type_def_base import TypeDefBase, TypeDefKind
 
 
 class RegistryElement:
     type_def: TypeDefBase
     is_private: bool
+    source_file: Union[str, None]
 
-    def __init__(self, type_def: TypeDefBase, is_private: bool):
+    def __init__(self, type_def: TypeDefBase, is_private: bool, source_file: Union[str, None] = None):
         self.type_def = type_def
         self.is_private = is_private
+        self.source_file = source_file
+
+    def index_keys(self) -> Tuple[Tuple[TypeDefKind, bool], Tuple[Tuple[str, ...], bool]]:
+        return (self.type_def.kind, self.is_private), (tuple(self.type_def.namespaces), self.is_private)
+
+
+SNAPSHOT_MAGIC = b'JTSSNAP\n'
+SNAPSHOT_FORMAT_VERSION = 2
 
 
 class TypeRegistry:
     _type_registry: Dict[RegKey, RegistryElement]
+    _resolved_refs: Dict[RegKey, TypeDefBase]
+    # secondary indexes, each slice keeps the insertion order of the main registry
+    _kind_index: Dict[Tuple[TypeDefKind, bool], Dict[RegKey, RegistryElement]]
+    _namespace_index: Dict[Tuple[Tuple[str, ...], bool], Dict[RegKey, RegistryElement]]
+    # named memos of data derived from the registry by its users, dropped (with resolved refs) on any change
+    _memos: Dict[str, Dict]
+    # canonical anonymous inline types by structure, shared by all identical inline definitions parsed into this
+    # registry (not part of the registry contents, so not kept when pickled or merged)
+    _inline_types: Dict[Hashable, TypeDefBase]
+    # schema file that types added from now on are attributed to
+    source_file: Union[str, None]
 
     def __init__(self):
         self._type_registry = {}
+        self._resolved_refs = {}
+        self._kind_index = {}
+        self._namespace_index = {}
+        self._memos = {}
+        self._inline_types = {}
+        self.source_file = None
+
+    def __getstate__(self):
+        return {'_type_registry': self._type_registry}
+
+    def __setstate__(self, state):
+        self._type_registry = state['_type_registry']
+        self._resolved_refs = {}
+        self._memos = {}
+        self._inline_types = {}
+        self.source_file = None
+        self._rebuild_indexes()
 
     def __iter__(self):
         return iter((v.type_def for v in self._type_registry.values() if not v.is_private))
 
+    def keys(self) -> List[RegKey]:
+        return list(self._type_registry)
+
+    def clear(self):
+        self._type_registry = {}
+        self._resolved_refs = {}
+        self._memos = {}
+        self._inline_types = {}
+        self._rebuild_indexes()
+
+    def iter_all(self) -> Iterator[TypeDefBase]:
+        """Iterate both public and private types, in registration order"""
+        return iter([v.type_def for v in self._type_registry.values()])
+
+    def __len__(self):
+        return len(self._type_registry)
+
+    def __contains__(self, key: RegKey):
+        return key in self._type_registry
+
+    def _index(self, key: RegKey, element: RegistryElement):
+        kind_key, ns_key = element.index_keys()
+        self._kind_index.setdefault(kind_key, {})[key] = element
+        self._namespace_index.setdefault(ns_key, {})[key] = element
+
+    def _rebuild_indexes(self):
+        self._kind_index = {}
+        self._namespace_index = {}
+        for key, element in self._type_registry.items():
+            self._index(key, element)
+
+    def _set(self, key: RegKey, element: RegistryElement):
+        prev_element = self._type_registry.get(key)
+        self._type_registry[key] = element
+        if prev_element is None or prev_element.index_keys() == element.index_keys():
+            # new keys go last, replaced keys keep their position (same as the main registry)
+            self._index(key, element)
+        else:
+            # replaced with a different kind/namespace/visibility; rare, so simply re-derive the order
+            self._rebuild_indexes()
+
+    def _drop_memos(self):
+        if self._resolved_refs:
+            self._resolved_refs.clear()
+        if self._memos:
+            self._memos = {}
+
+    def get_memo(self, name: str) -> Dict:
+        """Memo dict for data derived from the registry contents, valid until the registry changes"""
+        memo = self._memos.get(name)
+        if memo is None:
+            memo = self._memos[name] = {}
+        return memo
+
+    def get_inline_type(self, structure_key: Hashable) -> Union[TypeDefBase, None]:
+        return self._inline_types.get(structure_key)
+
+    def add_inline_type(self, structure_key: Hashable, type_def: TypeDefBase):
+        self._inline_types[structure_key] = type_def
+
     def add(self, type_def: TypeDefBase, is_private=False):
-        self._type_registry[type_def.reg_key] = RegistryElement(type_def, is_private)
+        self._set(type_def.reg_key, RegistryElement(type_def, is_private, self.source_file))
+        self._drop_memos()
+
+    def merge(self, other: TypeRegistry):
+        """Add all elements of another registry, in their insertion order"""
+        for key, element in other._type_registry.items():
+            self._set(key, element)
+        self._drop_memos()
+
+    def iter_kind(self, kind: TypeDefKind, is_private=False) -> Iterator[TypeDefBase]:
+        """Iterate public (or private) types of a kind, in registration order"""
+        return iter([v.type_def for v in self._kind_index.get((kind, is_private), {}).values()])
+
+    def iter_namespace(self, namespaces: List[str], is_private=False) -> Iterator[TypeDefBase]:
+        """Iterate public (or private) types of a namespace, in registration order"""
+        return iter([v.type_def for v in self._namespace_index.get((tuple(namespaces), is_private), {}).values()])
+
+    def get_namespaces(self) -> List[List[str]]:
+        return [list(namespaces) for namespaces in dict.fromkeys(ns for ns, _ in self._namespace_index)]
 
     def get(self, key: RegKey) -> TypeDefBase:
-        if key not in self._type_registry:
+        element = self._type_registry.get(key)
+        if element is None:
+            raise KeyError(f"No such key: {key}")
+        return element.type_def
+
+    def get_source_file(self, key: RegKey) -> Union[str, None]:
+        element = self._type_registry.get(key)
+        if element is None:
             raise KeyError(f"No such key: {key}")
-        return self._type_registry[key].type_def
+        return element.source_file
 
     def get_ref_target(self, target_uri: str) -> TypeDefBase:
-        next_target = self.get(RegKey.from_uri(target_uri))
-        while isinstance(next_target, RefType):
-            next_target = self.get(RegKey.from_uri(next_target.target_uri))
-        return next_target
+        """Follow a reference chain to its final (non-reference) target
+
+        Resolved targets are memoized for every key on the chain. The memo is dropped whenever the registry changes."""
+        key = RegKey.from_uri(target_uri)
+        target = self._resolved_refs.get(key)
+        if target is not None:
+            return target
+
+        chain: List[RegKey] = []
+        next_key = key
+        while True:
+            target = self._resolved_refs.get(next_key)
+            if target is not None:
+                break
+            if next_key in chain:
+                cycle = ' -> '.join(str(k) for k in chain[chain.index(next_key):] + [next_key])
+                raise ValueError(f"Cyclic type reference: {cycle}")
+            chain.append(next_key)
+            target = self.get(next_key)
+            if not isinstance(target, RefType):
+                break
+            next_key = RegKey.from_uri(target.target_uri)
+
+        for chain_key in chain:
+            self._resolved_refs[chain_key] = target
+        return target
+
+    def resolve_refs(self, strict=True):
+        """Resolve all references in the registry up-front
+
+        In strict mode dangling or cyclic references raise, otherwise they are left to be reported where used."""
+        for element in self._type_registry.values():
+            if isinstance(element.type_def, RefType):
+                try:
+                    self.get_ref_target(element.type_def.target_uri)
+                except (KeyError, ValueError):
+                    if strict:
+                        raise
+
+    def save_snapshot(self, file_path: str):
+        """Save the registry (including visibility flags and resolved references) as a versioned binary snapshot"""
+        import pickle
+
+        self.resolve_refs(strict=False)
+        header = {
+            'format_version': SNAPSHOT_FORMAT_VERSION,
+            'generator_version': configs.GENERATOR_VERSION,
+        }
+        temp_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as snapshot_file:
+            snapshot_file.write(SNAPSHOT_MAGIC)
+            pickle.dump(header, snapshot_file, pickle.HIGHEST_PROTOCOL)
+            pickle.dump((self._type_registry, self._resolved_refs), snapshot_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, file_path)
+
+    @classmethod
+    def load_snapshot(cls, file_path: str) -> TypeRegistry:
+        import pickle
+        with open(file_path, 'rb') as snapshot_file:
+            if snapshot_file.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                raise ValueError(f"Not a type registry snapshot [{file_path}]")
+            header = pickle.load(snapshot_file)
+            if header.get('format_version') != SNAPSHOT_FORMAT_VERSION or \
+                    header.get('generator_version') != configs.GENERATOR_VERSION:
+                raise ValueError(f"Incompatible type registry snapshot [{file_path}] [{header}]")
+            type_registry, resolved_refs = pickle.load(snapshot_file)
+
+        registry = cls()
+        registry.__setstate__({'_type_registry': type_registry})
+        registry._resolved_refs = resolved_refs
+        return registry
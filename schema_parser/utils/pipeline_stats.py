@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import Dict, List, Union
+
+
+class StageStats:
+    count: int
+    seconds: float
+    bytes: int
+    peak_memory: int
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.peak_memory = 0
+
+    def update(self, count: int, seconds: float, n_bytes: int, peak_memory: int):
+        self.count += count
+        self.seconds += seconds
+        self.bytes += n_bytes
+        self.peak_memory = max(self.peak_memory, peak_memory)
+
+    def merge(self, other: StageStats):
+        self.update(other.count, other.seconds, other.bytes, other.peak_memory)
+
+    def dict(self):
+        return {
+            'count': self.count,
+            'seconds': self.seconds,
+            'bytes': self.bytes,
+            'peak_memory': self.peak_memory,
+        }
+
+
+class Measurement:
+    """Context manager timing (and optionally tracing peak memory of) a single stage run"""
+    stats: PipelineStats
+    stage: str
+    kind: Union[str, None]
+    bytes: int
+    _start: float
+    _child_peak: int
+
+    def __init__(self, stats: PipelineStats, stage: str, kind: Union[str, None]):
+        self.stats = stats
+        self.stage = stage
+        self.kind = kind
+        self.bytes = 0
+        self._child_peak = 0
+
+    def __enter__(self):
+        if self.stats.track_memory:
+            import tracemalloc
+            self.stats.memory_stack.append(self)
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        seconds = time.perf_counter() - self._start
+        peak_memory = 0
+        if self.stats.track_memory:
+            import tracemalloc
+            # the tracer peak is reset by nested measurements, so carry their peaks up to the parent
+            peak_memory = max(self._child_peak, tracemalloc.get_traced_memory()[1])
+            self.stats.memory_stack.pop()
+            if self.stats.memory_stack:
+                parent = self.stats.memory_stack[-1]
+                parent._child_peak = max(parent._child_peak, peak_memory)
+        self.stats.add(self.stage, self.kind, 1, seconds, self.bytes, peak_memory)
+
+
+class _NullMeasurement:
+    kind = None
+    bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_MEASUREMENT = _NullMeasurement()
+
+
+class PipelineStats:
+    """Per stage (and per type kind) wall time, counts, emitted bytes and peak memory of a generator run"""
+    enabled = True
+    track_memory: bool
+    memory_stack: List[Measurement]
+    stages: Dict[str, StageStats]
+    kinds: Dict[str, Dict[str, StageStats]]
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.memory_stack = []
+        self.stages = {}
+        self.kinds = {}
+        if track_memory:
+            # imported on demand, memory tracking is opt-in
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    def __getstate__(self):
+        return {'track_memory': self.track_memory, 'memory_stack': [], 'stages': self.stages, 'kinds': self.kinds}
+
+    def measure(self, stage: str, kind: Union[str, None] = None) -> Measurement:
+        return Measurement(self, stage, kind)
+
+    def add(self, stage: str, kind: Union[str, None] = None, count=1, seconds=0.0, n_bytes=0, peak_memory=0):
+        if stage not in self.stages:
+            self.stages[stage] = StageStats()
+            self.kinds[stage] = {}
+        self.stages[stage].update(count, seconds, n_bytes, peak_memory)
+        if kind is not None:
+            if kind not in self.kinds[stage]:
+                self.kinds[stage][kind] = StageStats()
+            self.kinds[stage][kind].update(count, seconds, n_bytes, peak_memory)
+
+    def merge(self, other: PipelineStats):
+        for stage, stage_stats in other.stages.items():
+            self.add(stage, None, stage_stats.count, stage_stats.seconds, stage_stats.bytes, stage_stats.peak_memory)
+            for kind, kind_stats in other.kinds[stage].items():
+                if kind not in self.kinds[stage]:
+                    self.kinds[stage][kind] = StageStats()
+                self.kinds[stage][kind].merge(kind_stats)
+
+    def dict(self):
+        return {
+            'stages': {
+                stage: {
+                    **stage_stats.dict(),
+                    'kinds': {kind: kind_stats.dict() for kind, kind_stats in self.kinds[stage].items()},
+                } for stage, stage_stats in self.stages.items()
+            },
+        }
+
+    def write_report(self, file_path: str):
+        with open(file_path, 'w') as report_file:
+            json.dump(self.dict(), report_file, indent=4)
+
+
+class NullPipelineStats(PipelineStats):
+    """Disabled stats; every hook is a no-op"""
+    enabled = False
+
+    def __init__(self):
+        super().__init__(False)
+
+    def measure(self, stage: str, kind: Union[str, None] = None) -> Measurement:
+        return _NULL_MEASUREMENT
+
+    def add(self, stage: str, kind: Union[str, None] = None, count=1, seconds=0.0, n_bytes=0, peak_memory=0):
+        pass
+
+    def merge(self, other: PipelineStats):
+        pass
+
+
+NULL_STATS = NullPipelineStats()
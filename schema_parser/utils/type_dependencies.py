@@ -0,0 +1,52 @@
+from typing import Iterator, List
+
+from schema_parser.reg_key import RegKey
+from schema_parser.type_defs.array_alias import ArrayAlias
+from schema_parser.type_defs.extended_variant import ExtendedVariant
+from schema_parser.type_defs.ref_type import RefType
+from schema_parser.type_defs.struct_type import StructType
+from schema_parser.type_defs.type_def_base import TypeDefBase
+from schema_parser.type_defs.variant_alias import VariantAlias
+from schema_parser.type_registry import TypeRegistry
+
+
+def iter_inline_type_defs(type_def: TypeDefBase) -> Iterator[TypeDefBase]:
+    """Iterate a type definition and all type definitions nested in it (members, elements, variant members)"""
+    pending = [type_def]
+    while pending:
+        t_def = pending.pop()
+        yield t_def
+        if isinstance(t_def, StructType):
+            pending.extend(reversed(t_def.members))
+        elif isinstance(t_def, ArrayAlias):
+            pending.append(t_def.element_type_def)
+        elif isinstance(t_def, VariantAlias):
+            pending.extend(reversed(t_def.member_type_defs))
+        elif isinstance(t_def, ExtendedVariant):
+            pending.append(t_def.content_variant)
+            pending.append(t_def.type_enum)
+
+
+def get_referenced_uris(type_def: TypeDefBase) -> List[str]:
+    """Target URIs of all references made by a type definition (directly or by its nested definitions)"""
+    uris = [t_def.target_uri for t_def in iter_inline_type_defs(type_def) if isinstance(t_def, RefType)]
+    return list(dict.fromkeys(uris))
+
+
+def get_dependency_keys(type_def: TypeDefBase, type_registry: TypeRegistry) -> List[RegKey]:
+    """Registry keys a type definition is generated from: its own key, registered nested definitions and every key
+    on the reference chains it uses"""
+    keys = {}
+    for t_def in iter_inline_type_defs(type_def):
+        if t_def.reg_key in type_registry:
+            keys[t_def.reg_key] = None
+
+    for uri in get_referenced_uris(type_def):
+        key = RegKey.from_uri(uri)
+        while key in type_registry and key not in keys:
+            keys[key] = None
+            target = type_registry.get(key)
+            if not isinstance(target, RefType):
+                break
+            key = RegKey.from_uri(target.target_uri)
+    return list(keys)
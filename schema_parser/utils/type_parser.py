@@ -1,16 +1,41 @@
-from typing import Dict, List
+import json
+from typing import Dict, Hashable, List, Union
 
 from schema_parser.reg_key import RegKey
+from schema_parser.type_defs.array_alias import ArrayAlias
+from schema_parser.type_defs.ref_type import RefType
+from schema_parser.type_defs.simple_alias import SimpleAlias
 from schema_parser.type_defs.type_def_base import TypeDefBase
+from schema_parser.type_defs.variant_alias import VariantAlias
 from schema_parser.type_registry import TypeRegistry
 from schema_parser.utils.type_loader import get_object_type
 
 
-def create_typedef(reg_key: RegKey, namespaces: List[str], name: str, definition: Dict, type_registry: TypeRegistry) \
-        -> List[TypeDefBase]:
+# anonymous (array element, variant member) definitions of these types are never renamed or registered, so
+# structurally identical ones can share a single type definition. Inline enums and structs are not shared: they are
+# declared as types of their own, named after their member or parent (A::Color, B::Color) and serialized by the
+# source of that parent, so identical ones stay distinct C++ types, declared once per use (see README)
+SHAREABLE_INLINE_TYPES = (SimpleAlias, ArrayAlias, VariantAlias, RefType)
+
+
+def get_inline_structure_key(obj_type_meta: type, namespaces: List[str], definition: Dict) -> Hashable:
+    return obj_type_meta.__name__, tuple(namespaces), json.dumps(definition, sort_keys=True)
+
+
+def create_typedef(reg_key: RegKey, namespaces: List[str], name: Union[str, None], definition: Dict,
+                   type_registry: TypeRegistry) -> List[TypeDefBase]:
     obj_type_meta = get_object_type(definition)
+    structure_key = None
+    if name is None and obj_type_meta in SHAREABLE_INLINE_TYPES:
+        structure_key = get_inline_structure_key(obj_type_meta, namespaces, definition)
+        shared_def = type_registry.get_inline_type(structure_key)
+        if shared_def is not None:
+            return [shared_def]
+
     t_def = obj_type_meta(namespaces, name, reg_key)
     dependent_types = t_def.parse(definition, create_typedef, type_registry)
+    if structure_key is not None and not dependent_types:
+        type_registry.add_inline_type(structure_key, t_def)
 
     res: List[TypeDefBase] = []
     if dependent_types:
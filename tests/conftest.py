@@ -0,0 +1,40 @@
+import json
+import os
+import pathlib
+from typing import Dict, List
+
+import pytest
+
+from schema_parser.schema_batch_parser import SchemaBatchParser
+from schema_parser.type_registry import TypeRegistry
+
+
+def write_schema(schema_dir: pathlib.Path, file_name: str, definitions: Dict, **attributes):
+    (schema_dir / file_name).write_text(json.dumps(dict(attributes, definitions=definitions)))
+
+
+def make_batch_parser(schema_dir: pathlib.Path, file_names: List[str]) -> SchemaBatchParser:
+    batch_parser = SchemaBatchParser()
+    batch_parser.set_input_dir(str(schema_dir))
+    for file_name in file_names:
+        batch_parser.add_schema_file(file_name)
+    return batch_parser
+
+
+def generated_files(out_dir) -> List[str]:
+    """Paths of the generated files, relative to the output root"""
+    return sorted(os.path.relpath(os.path.join(root, name), out_dir)
+                  for root, _dirs, names in os.walk(out_dir) for name in names if not name.startswith('.'))
+
+
+def registry_contents(type_registry: TypeRegistry) -> List:
+    """Comparable contents of a registry, in insertion order"""
+    return [(str(key), type_registry.get(key).dict(), type_registry.get_source_file(key))
+            for key in type_registry.keys()]
+
+
+@pytest.fixture
+def schema_dir(tmp_path) -> pathlib.Path:
+    path = tmp_path / 'schemas'
+    path.mkdir()
+    return path
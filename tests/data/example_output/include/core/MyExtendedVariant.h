@@ -0,0 +1,25 @@
+#pragma once
+
+#include <variant>
+
+namespace core
+{
+    struct MyExtendedVariant : std::variant<std::monostate,std::int32,std::string,std::vector<float>>
+    {
+        enum class Type : int32_t
+        {
+            int = 1,
+            str = 2,
+            array = 3,
+        };
+        
+        template <Type MemberType, typename T>
+        void SetAs(T value) { emplace<static_cast<int32_t>(MemberType)>(value); }
+
+        template <Type MemberType>
+        [[nodiscard]] auto& GetAs() { return std::get<static_cast<int32_t>(MemberType)>(*this); }
+
+        template <Type MemberType>
+        [[nodiscard]] auto const& GetAs() const { return std::get<static_cast<int32_t>(MemberType)>(*this); }
+    };
+}  // namespace core
\ No newline at end of file
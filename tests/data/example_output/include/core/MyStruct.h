@@ -0,0 +1,13 @@
+#pragma once
+
+namespace core
+{
+    struct MyStruct : ISerializable
+    {
+        MyNumberType number;
+        MyNumberArray numberArray;
+
+        [[nodiscard]] std::string ToJson() const override;
+        void FromJson(const std::string&) override;
+    };
+}  // namespace core
\ No newline at end of file
@@ -0,0 +1,17 @@
+#pragma once
+
+#include <string>
+#include <vector>
+
+namespace core
+{
+    struct Student : ISerializable
+    {
+        std::string name;
+        float age;
+        std::vector<int64_t> scores;
+
+        [[nodiscard]] std::string ToJson() const override;
+        void FromJson(const std::string&) override;
+    };
+}  // namespace core
\ No newline at end of file
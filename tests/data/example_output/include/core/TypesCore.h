@@ -0,0 +1,17 @@
+#pragma once
+
+#include <vector>
+#include <vector>
+
+
+#include <vector>
+#include <vector>
+
+namespace core
+{
+    using MyDefaultInt = std::int32;
+    using MyInt64 = int64_t;
+    using MyNumberType = std::int32;
+    using MyStringArray = std::vector<std::string>;
+    using MyNumberArray = std::vector<MyNumberType>;
+} // core
\ No newline at end of file
@@ -0,0 +1,28 @@
+#include <temp_generated/include/core/MyExtendedVariant.h>
+#include <nlohmann/json.hpp>
+
+namespace core
+{
+    namespace internal
+    {
+        void FromJson(MyExtendedVariant& m, nlohmann::json const& j)
+        {
+            switch(j.at("type").get<MyExtendedVariant::Type>())
+            {
+                // TODO: add missing cases
+                default: throw std::runtime_error(std::string() + "Unexpected member type: " + j.at("type"))
+            }
+        }
+        nlohmann::json ToJson(MyExtendedVariant const& m)
+        {
+            nlohmann::json res {
+                { "type": m.index() },
+            };
+            auto& content = res["content"];
+            // TODO: load content
+            return res;
+        }
+
+    }
+
+}  // namespace core
\ No newline at end of file
@@ -0,0 +1,31 @@
+#include <temp_generated/include/core/MyStruct.h>
+#include <nlohmann/json.hpp>
+
+namespace core
+{
+    namespace internal
+    {
+        nlohmann::json ToJson(MyStruct const& m)
+        {
+            nlohmann::json res {
+                { "number", m.number }
+                { "numberArray", m.numberArray }
+            };
+            return res;
+        }
+
+        void FromJson(MyStruct& m, nlohmann::json const& j)
+        {
+        }
+    }
+
+    std::string MyStruct::ToJson() const
+    {
+        return internal::ToJson(*this).dump();
+    }
+
+    void MyStruct::FromJson(std::string const& js)
+    {
+        internal::FromJson(*this, nlohmann::json::parse(js));
+    }
+}  // namespace core
\ No newline at end of file
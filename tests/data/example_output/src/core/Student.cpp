@@ -0,0 +1,35 @@
+#include <temp_generated/include/core/Student.h>
+#include <nlohmann/json.hpp>
+
+namespace core
+{
+    namespace internal
+    {
+        nlohmann::json ToJson(Student const& m)
+        {
+            nlohmann::json res {
+                { "name", m.name }
+                { "age", m.age }
+                { "scores", m.scores }
+            };
+            return res;
+        }
+
+        void FromJson(Student& m, nlohmann::json const& j)
+        {
+            m.name = j.at("name").get<decltype(m.name)>();
+            m.age = j.at("age").get<decltype(m.age)>();
+            m.scores = j.at("scores").get<decltype(m.scores)>();
+        }
+    }
+
+    std::string Student::ToJson() const
+    {
+        return internal::ToJson(*this).dump();
+    }
+
+    void Student::FromJson(std::string const& js)
+    {
+        internal::FromJson(*this, nlohmann::json::parse(js));
+    }
+}  // namespace core
\ No newline at end of file
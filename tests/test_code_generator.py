@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import pathlib
+
+import pytest
+
+from code_generator.cpp_code_generator import CodeGenerator, GENERATED_FILES_LIST
+from schema_parser.schema_batch_parser import SchemaBatchParser
+from tests.conftest import generated_files, make_batch_parser, write_schema
+
+ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent
+# output of the example schemas (as generated by main.py) before any of the optimizations
+EXAMPLE_OUTPUT_DIR = pathlib.Path(__file__).resolve().parent / 'data' / 'example_output'
+EXAMPLE_SCHEMA_FILES = ['simple_alias.json', 'array_alias.json', 'struct.json', 'type_reference.json',
+                        'extended_variant.json']
+
+
+def generate_examples(workers: int = 1):
+    batch_parser = SchemaBatchParser()
+    batch_parser.set_input_dir(str(ROOT_DIR / 'example' / 'schemas'))
+    for file_name in EXAMPLE_SCHEMA_FILES:
+        batch_parser.add_schema_file(file_name)
+    batch_parser.parse(['core'], workers)
+    CodeGenerator(batch_parser.type_registry, 'temp_generated', 'include', 'src').generate_code(workers)
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_default_output_is_unchanged(tmp_path, monkeypatch, workers):
+    monkeypatch.chdir(tmp_path)
+    generate_examples(workers)
+    out_dir = tmp_path / 'temp_generated'
+    assert generated_files(out_dir) == generated_files(EXAMPLE_OUTPUT_DIR)
+    for file_path in generated_files(EXAMPLE_OUTPUT_DIR):
+        assert (out_dir / file_path).read_bytes() == (EXAMPLE_OUTPUT_DIR / file_path).read_bytes(), file_path
+
+
+def file_sha256(file_path) -> str:
+    return hashlib.sha256(pathlib.Path(file_path).read_bytes()).hexdigest()
+
+
+def make_generator(schema_dir, out_dir, file_names=('types.json',)):
+    batch_parser = make_batch_parser(schema_dir, list(file_names))
+    batch_parser.parse(['core'])
+    return CodeGenerator(batch_parser.type_registry, str(out_dir), 'include', 'src')
+
+
+def write_types(schema_dir, **extra_definitions):
+    write_schema(schema_dir, 'types.json', dict({
+        'Id': {'type': 'integer'},
+        'User': {'type': 'object', 'properties': {'id': {'$ref': '#/definitions/Id'}}},
+    }, **extra_definitions))
+
+
+def test_write_if_changed_keeps_unchanged_files(schema_dir, tmp_path):
+    write_types(schema_dir)
+    out_dir = tmp_path / 'out'
+    make_generator(schema_dir, out_dir).generate_code()
+    user_header = out_dir / 'include' / 'core' / 'User.h'
+    os.utime(user_header, (0, 0))
+
+    code_generator = make_generator(schema_dir, out_dir)
+    code_generator.write_if_changed = True
+    code_generator.generate_code()
+    summary = code_generator.output_summary
+    assert (summary.written, summary.unchanged) == (0, len(generated_files(out_dir)))
+    assert user_header.stat().st_mtime == 0
+    assert not list(out_dir.rglob('*.tmp'))
+
+    write_types(schema_dir, Name={'type': 'string'})
+    code_generator = make_generator(schema_dir, out_dir)
+    code_generator.write_if_changed = True
+    code_generator.generate_code()
+    assert code_generator.output_summary.written == 1
+    assert user_header.stat().st_mtime == 0
+
+
+def test_remove_stale_removes_files_of_removed_types(schema_dir, tmp_path):
+    write_types(schema_dir, Group={'type': 'object', 'properties': {'size': {'type': 'integer'}}})
+    out_dir = tmp_path / 'out'
+    code_generator = make_generator(schema_dir, out_dir)
+    code_generator.remove_stale = True
+    code_generator.generate_code()
+    files = generated_files(out_dir)
+    assert os.path.join('include', 'core', 'Group.h') in files
+    listed = (out_dir / GENERATED_FILES_LIST).read_text().splitlines()
+    assert listed == files
+
+    # a file the previous run didn't generate is left alone
+    (out_dir / 'include' / 'core' / 'Manual.h').write_text('')
+    write_types(schema_dir)
+    code_generator = make_generator(schema_dir, out_dir)
+    code_generator.remove_stale = True
+    code_generator.generate_code()
+    assert code_generator.output_summary.removed == 2
+    assert generated_files(out_dir) == sorted(set(files) - {os.path.join('include', 'core', 'Group.h'),
+                                                            os.path.join('src', 'core', 'Group.cpp')}
+                                              | {os.path.join('include', 'core', 'Manual.h')})
+
+
+def test_remove_stale_keeps_files_outside_of_the_output_root(schema_dir, tmp_path):
+    write_types(schema_dir)
+    out_dir = tmp_path / 'out'
+    outside_file = tmp_path / 'outside.h'
+    outside_file.write_text('')
+    out_dir.mkdir()
+    (out_dir / GENERATED_FILES_LIST).write_text(f"{os.path.join('..', 'outside.h')}\n{outside_file}\n")
+
+    code_generator = make_generator(schema_dir, out_dir)
+    code_generator.remove_stale = True
+    code_generator.generate_code()
+    assert outside_file.exists()
+    assert code_generator.output_summary.removed == 0
+
+
+def test_manifest_and_depfile(schema_dir, tmp_path):
+    write_types(schema_dir)
+    write_schema(schema_dir, 'extra.json', {
+        'Account': {'type': 'object', 'properties': {'user': {'$ref': '#/definitions/User'}}},
+    })
+    out_dir = tmp_path / 'out'
+    code_generator = make_generator(schema_dir, out_dir, ['types.json', 'extra.json'])
+    code_generator.generate_code()
+    manifest_path = tmp_path / 'manifest.json'
+    depfile_path = tmp_path / 'out.d'
+    code_generator.write_manifest(str(manifest_path))
+    code_generator.write_depfile(str(depfile_path))
+
+    types_file = str(schema_dir / 'types.json')
+    extra_file = str(schema_dir / 'extra.json')
+    manifest = json.loads(manifest_path.read_text())
+    assert manifest['schema_files'] == {
+        types_file: file_sha256(types_file),
+        extra_file: file_sha256(extra_file),
+    }
+    outputs = manifest['outputs']
+    assert sorted(os.path.relpath(path, out_dir) for path in outputs) == generated_files(out_dir)
+    for output_path, output in outputs.items():
+        assert output['sha256'] == file_sha256(output_path)
+    account_header = str(out_dir / 'include' / 'core' / 'Account.h')
+    assert outputs[account_header]['schema_files'] == [extra_file, types_file]
+    assert outputs[account_header]['reg_keys'][0] == '#/definitions/Account'
+    user_header = str(out_dir / 'include' / 'core' / 'User.h')
+    assert outputs[user_header]['schema_files'] == [types_file]
+
+    depfile_lines = depfile_path.read_text().splitlines()
+    assert depfile_lines == [f"{path}: {' '.join(output['schema_files'])}" for path, output in sorted(outputs.items())]
@@ -0,0 +1,52 @@
+from schema_parser.dependency_graph import DependencyGraph
+from schema_parser.reg_key import RegKey
+from tests.conftest import make_batch_parser, write_schema
+
+
+def keys(*names):
+    return {RegKey.from_uri(f'#/definitions/{name}') for name in names}
+
+
+def make_graph(schema_dir) -> DependencyGraph:
+    write_schema(schema_dir, 'types.json', {
+        'Id': {'type': 'integer'},
+        'UserId': {'$ref': '#/definitions/Id'},
+        'Name': {'type': 'string'},
+        'User': {'type': 'object', 'properties': {
+            'id': {'$ref': '#/definitions/UserId'},
+            'name': {'$ref': '#/definitions/Name'},
+        }},
+        'Users': {'type': 'array', 'items': {'$ref': '#/definitions/User'}},
+        'Entry': {'oneOf': [{'$ref': '#/definitions/Users'}, {'type': 'string'}]},
+        'Gone': {'$ref': '#/definitions/Removed'},
+        'Other': {'type': 'number'},
+    })
+    batch_parser = make_batch_parser(schema_dir, ['types.json'])
+    batch_parser.parse(['core'])
+    return DependencyGraph(batch_parser.type_registry)
+
+
+def test_affected_is_the_transitive_dependents(schema_dir):
+    graph = make_graph(schema_dir)
+    assert graph.get_affected(keys('Id')) == keys('Id', 'UserId', 'User', 'Users', 'Entry')
+    assert graph.get_affected(keys('Name')) == keys('Name', 'User', 'Users', 'Entry')
+    assert graph.get_affected(keys('Entry')) == keys('Entry')
+    assert graph.get_affected(keys('Other', 'Users')) == keys('Other', 'Users', 'Entry')
+    # dangling references still have dependents, so that removed types affect their users
+    assert graph.get_affected(keys('Removed')) == keys('Removed', 'Gone')
+
+
+def test_required_is_the_transitive_dependencies(schema_dir):
+    graph = make_graph(schema_dir)
+    assert graph.get_required(keys('Entry')) == keys('Entry', 'Users', 'User', 'UserId', 'Id', 'Name')
+    assert graph.get_required(keys('User')) == keys('User', 'UserId', 'Id', 'Name')
+    assert graph.get_required(keys('Other')) == keys('Other')
+    assert graph.get_required([]) == set()
+
+
+def test_direct_edges(schema_dir):
+    graph = make_graph(schema_dir)
+    user_key, = keys('User')
+    assert set(graph.get_dependencies(user_key)) >= keys('UserId', 'Name')
+    assert set(graph.get_dependents(user_key)) == keys('Users')
+    assert graph.get_dependencies(RegKey.from_uri('#/definitions/Unknown')) == []
@@ -0,0 +1,93 @@
+import os
+
+from code_generator.cpp_code_generator import CodeGenerator
+from tests.conftest import generated_files, make_batch_parser, write_schema
+
+
+def make_generator(batch_parser, out_dir):
+    return CodeGenerator(batch_parser.type_registry, str(out_dir), 'include', 'src')
+
+
+def full_generation(schema_dir, file_names, out_dir):
+    batch_parser = make_batch_parser(schema_dir, file_names)
+    batch_parser.parse(['core'])
+    make_generator(batch_parser, out_dir).generate_code()
+
+
+def incremental_setup(schema_dir, tmp_path):
+    write_schema(schema_dir, 'a.json', {'BInt': {'type': 'integer'}})
+    write_schema(schema_dir, 'b.json', {
+        'Name': {'type': 'string'},
+        'User': {'type': 'object', 'properties': {'name': {'$ref': '#/definitions/Name'}}},
+    })
+    batch_parser = make_batch_parser(schema_dir, ['a.json', 'b.json'])
+    batch_parser.reparse(['core'], ['a.json', 'b.json'])
+    out_dir = tmp_path / 'out'
+    code_generator = make_generator(batch_parser, out_dir)
+    code_generator.generate_code()
+    return batch_parser, code_generator, out_dir
+
+
+def assert_same_as_full_generation(schema_dir, tmp_path, out_dir):
+    full_dir = tmp_path / 'full'
+    full_generation(schema_dir, ['a.json', 'b.json'], full_dir)
+    assert generated_files(out_dir) == generated_files(full_dir)
+    for file_path in generated_files(full_dir):
+        # includes are spelled from the output root
+        expected = (full_dir / file_path).read_text().replace(str(full_dir), str(out_dir))
+        assert (out_dir / file_path).read_text() == expected, file_path
+
+
+def test_removed_shared_type_is_dropped_from_its_header(schema_dir, tmp_path):
+    batch_parser, code_generator, out_dir = incremental_setup(schema_dir, tmp_path)
+    types_header = out_dir / 'include' / 'core' / 'TypesCore.h'
+    assert 'BInt' in types_header.read_text()
+
+    write_schema(schema_dir, 'a.json', {'Rec': {'type': 'object', 'properties': {'x': {'type': 'integer'}}}})
+    code_generator.generate_code(changed_keys=batch_parser.reparse(['core'], ['a.json']))
+    assert 'BInt' not in types_header.read_text()
+    assert_same_as_full_generation(schema_dir, tmp_path, out_dir)
+
+
+def test_removed_own_file_type_outputs_are_removed(schema_dir, tmp_path):
+    batch_parser, code_generator, out_dir = incremental_setup(schema_dir, tmp_path)
+    write_schema(schema_dir, 'a.json', {'Rec': {'type': 'object', 'properties': {'x': {'type': 'integer'}}}})
+    code_generator.generate_code(changed_keys=batch_parser.reparse(['core'], ['a.json']))
+    assert (out_dir / 'include' / 'core' / 'Rec.h').exists()
+
+    # struct replaced by an alias of the same name, then removed
+    write_schema(schema_dir, 'a.json', {'Rec': {'type': 'integer'}})
+    code_generator.generate_code(changed_keys=batch_parser.reparse(['core'], ['a.json']))
+    assert not (out_dir / 'include' / 'core' / 'Rec.h').exists()
+    assert not (out_dir / 'src' / 'core' / 'Rec.cpp').exists()
+    assert 'using Rec' in (out_dir / 'include' / 'core' / 'TypesCore.h').read_text()
+    assert_same_as_full_generation(schema_dir, tmp_path, out_dir)
+
+
+def test_emptied_namespace_header_is_removed(schema_dir, tmp_path):
+    batch_parser, code_generator, out_dir = incremental_setup(schema_dir, tmp_path)
+    write_schema(schema_dir, 'c.json', {'Extra': {'type': 'string'}}, **{'@meta:namespace': 'extra'})
+    batch_parser.add_schema_file('c.json')
+    code_generator.generate_code(changed_keys=batch_parser.reparse(['core'], ['c.json']))
+    extra_header = out_dir / 'include' / 'core' / 'extra' / 'TypesExtra.h'
+    assert 'Extra' in extra_header.read_text()
+
+    write_schema(schema_dir, 'c.json', {}, **{'@meta:namespace': 'extra'})
+    summary_before = code_generator.output_summary.removed
+    code_generator.generate_code(changed_keys=batch_parser.reparse(['core'], ['c.json']))
+    assert not extra_header.exists()
+    assert code_generator.output_summary.removed == summary_before + 1
+
+
+def test_unaffected_types_are_not_rewritten(schema_dir, tmp_path):
+    batch_parser, code_generator, out_dir = incremental_setup(schema_dir, tmp_path)
+    write_schema(schema_dir, 'c.json', {'Point': {'type': 'object', 'properties': {'x': {'type': 'number'}}}})
+    batch_parser.add_schema_file('c.json')
+    code_generator.generate_code(changed_keys=batch_parser.reparse(['core'], ['c.json']))
+    user_header = out_dir / 'include' / 'core' / 'User.h'
+    os.utime(user_header, ns=(0, 0))
+
+    write_schema(schema_dir, 'c.json', {'Point': {'type': 'object', 'properties': {'y': {'type': 'number'}}}})
+    code_generator.generate_code(changed_keys=batch_parser.reparse(['core'], ['c.json']))
+    assert user_header.stat().st_mtime_ns == 0
+    assert 'y;' in (out_dir / 'include' / 'core' / 'Point.h').read_text()
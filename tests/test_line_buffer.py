@@ -0,0 +1,123 @@
+import random
+from typing import List
+
+import pytest
+
+from code_generator.line_buffer import LineBuffer, IndentedBlock, iter_text_chunks
+
+
+class ListLineBuffer:
+    """The list of lines LineBuffer used to be, as the reference for its output"""
+    _lines: List[str]
+
+    def __init__(self, indent: int, *lines):
+        self._lines = list(lines)
+        self._prefix = '    ' * indent
+
+    def indent_up(self):
+        self._prefix += '    '
+
+    def indent_down(self):
+        self._prefix = self._prefix[4:]
+
+    def prepend(self, *lines):
+        self._lines[0:0] = lines
+
+    def append(self, line: str):
+        self._lines.append(self._prefix + line)
+
+    def extend_last(self, segment: str):
+        self._lines[-1] += segment
+
+    def append_buffer(self, buffer):
+        self._lines.extend([self._prefix + line for line in buffer._lines])
+
+    def pop(self):
+        self._lines.pop()
+
+    def new_line(self):
+        self._lines.append('')
+
+    def str(self, indent_offset=0):
+        return '\n'.join(['    ' * indent_offset + line for line in self._lines])
+
+    def __len__(self):
+        return len(self._lines)
+
+
+def random_edits(rng: random.Random, buffers, depth: int):
+    """Apply the same random edits to a LineBuffer and to its reference"""
+    buffer, reference = buffers
+    for i in range(rng.randint(1, 30)):
+        op = rng.random()
+        if op < 0.3:
+            buffer.append(f'line{i}')
+            reference.append(f'line{i}')
+        elif op < 0.4:
+            buffer.new_line()
+            reference.new_line()
+        elif op < 0.5:
+            buffer.indent_up()
+            reference.indent_up()
+        elif op < 0.6 and buffer._indent_level > 0:
+            buffer.indent_down()
+            reference.indent_down()
+        elif op < 0.7 and len(reference):
+            buffer.extend_last(f' +{i}')
+            reference.extend_last(f' +{i}')
+        elif op < 0.75 and len(reference):
+            buffer.pop()
+            reference.pop()
+        elif op < 0.8:
+            buffer.prepend(f'first{i}', f'second{i}')
+            reference.prepend(f'first{i}', f'second{i}')
+        elif depth < 3:
+            child = (LineBuffer(rng.randint(0, 1)), ListLineBuffer(0))
+            child[1]._prefix = child[0]._prefix
+            random_edits(rng, child, depth + 1)
+            buffer.append_buffer(child[0])
+            reference.append_buffer(child[1])
+            # later edits of an appended buffer don't show up in the parent
+            child[0].append('late')
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_same_output_as_list_of_lines(seed):
+    rng = random.Random(seed)
+    buffers = (LineBuffer(0), ListLineBuffer(0))
+    random_edits(rng, buffers, 0)
+    buffer, reference = buffers
+    assert len(buffer) == len(reference)
+    assert bool(buffer) == bool(len(reference))
+    assert buffer.str() == reference.str()
+    assert buffer.str(2) == reference.str(2)
+    assert ''.join(iter_text_chunks(buffer.iter_lines(), chunk_lines=3)) == reference.str()
+
+
+def test_nested_blocks():
+    inner = LineBuffer(0, 'a')
+    with IndentedBlock(inner):
+        inner.append('b')
+    outer = LineBuffer(0)
+    outer.append('{')
+    with IndentedBlock(outer):
+        outer.append_buffer(inner)
+        outer.append_buffer(LineBuffer(0))
+    outer.extend_last(';')
+    outer.append('}')
+    assert outer.lines() == ['{', '    a', '        b;', '}']
+    outer.pop()
+    outer.pop()
+    assert outer.lines() == ['{', '    a']
+
+
+def test_pop_from_empty_buffer():
+    with pytest.raises(IndexError):
+        LineBuffer(0).pop()
+
+
+def test_text_chunks_join_lines():
+    lines = [f'line{i}' for i in range(10)]
+    for chunk_lines in (1, 3, 10, 100):
+        assert ''.join(iter_text_chunks(lines, chunk_lines)) == '\n'.join(lines)
+    assert list(iter_text_chunks([])) == []
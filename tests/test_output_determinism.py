@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from tests.conftest import write_schema
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# generates the schema directory in argv[1] to argv[2] with every optional mode, printing the number of written files
+GENERATE_SCRIPT = '''
+import sys
+from code_generator.cpp_code_generator import CodeGenerator
+from tests.conftest import make_batch_parser
+
+batch_parser = make_batch_parser(sys.argv[1], ['types.json'])
+batch_parser.parse(['core'])
+code_generator = CodeGenerator(batch_parser.type_registry, sys.argv[2], 'include', 'src')
+code_generator.write_if_changed = True
+code_generator.direct_to_json = True
+code_generator.parse_from_json = True
+code_generator.push_parser = True
+code_generator.stream_elements = True
+code_generator.generate_code()
+print(code_generator.output_summary.written)
+'''
+
+
+def generate(schema_dir, out_dir, hash_seed) -> int:
+    env = dict(os.environ, PYTHONHASHSEED=str(hash_seed))
+    result = subprocess.run([sys.executable, '-c', GENERATE_SCRIPT, str(schema_dir), str(out_dir)],
+                            cwd=ROOT_DIR, env=env, check=True, stdout=subprocess.PIPE, universal_newlines=True)
+    return int(result.stdout.split()[-1])
+
+
+@pytest.mark.parametrize('hash_seed', [1, 2, 3])
+def test_rerun_with_another_hash_seed_writes_nothing(schema_dir, tmp_path, hash_seed):
+    write_schema(schema_dir, 'types.json', {
+        'Tags': {'type': 'array', 'items': {'type': 'string'}},
+        'Value': {'oneOf': [{'type': 'integer'}, {'type': 'string'}]},
+        'Record': {'type': 'object', 'properties': {
+            'name': {'type': 'string'},
+            'tags': {'$ref': '#/definitions/Tags'},
+            'value': {'$ref': '#/definitions/Value'},
+            'scores': {'type': 'array', 'items': {'type': 'number'}},
+        }},
+    })
+    out_dir = tmp_path / 'out'
+    assert generate(schema_dir, out_dir, 0) > 0
+    assert generate(schema_dir, out_dir, hash_seed) == 0
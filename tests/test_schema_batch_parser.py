@@ -0,0 +1,117 @@
+import pytest
+
+from schema_parser.parse_cache import ParseCache
+from tests.conftest import make_batch_parser, registry_contents, write_schema
+
+
+def struct_schema(index: int):
+    return {
+        f"T{index}": {'type': 'integer'},
+        f"S{index}": {'type': 'object', 'properties': {'value': {'$ref': f"#/definitions/T{index}"}}},
+    }
+
+
+def parse_contents(schema_dir, file_names, workers=1, cache_dir=None):
+    """Registry contents after parsing, with the exception raised (if any)"""
+    batch_parser = make_batch_parser(schema_dir, file_names)
+    if cache_dir is not None:
+        batch_parser.set_cache(ParseCache(str(cache_dir)))
+    error = None
+    try:
+        batch_parser.parse(['core'], workers)
+    except Exception as ex:
+        error = ex
+    return registry_contents(batch_parser.type_registry), error
+
+
+@pytest.fixture
+def isolated_modes(tmp_path):
+    # (workers, cache dir) of the paths parsing files in isolation
+    return [(2, None), (1, tmp_path / 'cache'), (2, tmp_path / 'cache_parallel')]
+
+
+def test_isolated_parse_matches_serial(schema_dir, isolated_modes):
+    file_names = []
+    for i in range(4):
+        write_schema(schema_dir, f"f{i}.json", struct_schema(i))
+        file_names.append(f"f{i}.json")
+    serial, error = parse_contents(schema_dir, file_names)
+    assert error is None
+    assert len(serial) == 8
+    for workers, cache_dir in isolated_modes:
+        assert parse_contents(schema_dir, file_names, workers, cache_dir) == (serial, None)
+        if cache_dir is not None:
+            # second run loads every file from the cache
+            assert parse_contents(schema_dir, file_names, workers, cache_dir) == (serial, None)
+
+
+def test_missing_file_keeps_earlier_files(schema_dir, isolated_modes):
+    for i in range(3):
+        write_schema(schema_dir, f"f{i}.json", struct_schema(i))
+    file_names = ['f0.json', 'f1.json', 'missing.json', 'f2.json']
+    serial, error = parse_contents(schema_dir, file_names)
+    assert isinstance(error, FileNotFoundError)
+    assert [key for key, _type_def, _source in serial] == \
+           ['#/definitions/T0', '#/definitions/S0', '#/definitions/T1', '#/definitions/S1']
+    for workers, cache_dir in isolated_modes:
+        contents, isolated_error = parse_contents(schema_dir, file_names, workers, cache_dir)
+        assert contents == serial
+        assert isinstance(isolated_error, FileNotFoundError)
+
+
+def test_parse_error_merges_definitions_before_it(schema_dir, isolated_modes, capsys):
+    write_schema(schema_dir, 'f0.json', struct_schema(0))
+    write_schema(schema_dir, 'f1.json', {'Before': {'type': 'string'}, 'Bad': {'type': 'bogus'},
+                                         'After': {'type': 'string'}})
+    write_schema(schema_dir, 'f2.json', {'AlsoBad': {'type': 'bogus'}})
+    (schema_dir / 'f3.json').write_text('{broken')
+    file_names = ['f0.json', 'f1.json', 'f2.json', 'f3.json']
+    serial, error = parse_contents(schema_dir, file_names)
+    serial_output = capsys.readouterr().out
+    assert isinstance(error, TypeError)
+    assert [key for key, _type_def, _source in serial][-1] == '#/definitions/Before'
+    assert 'f1.json' in serial_output and 'f2.json' not in serial_output
+    for workers, cache_dir in isolated_modes:
+        contents, isolated_error = parse_contents(schema_dir, file_names, workers, cache_dir)
+        assert contents == serial
+        assert type(isolated_error) is type(error) and str(isolated_error) == str(error)
+        # files after the first failing one are not reported
+        assert capsys.readouterr().out == serial_output
+
+
+def test_decode_error_is_raised_like_serial(schema_dir, isolated_modes, capsys):
+    write_schema(schema_dir, 'f0.json', struct_schema(0))
+    (schema_dir / 'f1.json').write_text('{broken')
+    file_names = ['f0.json', 'f1.json']
+    serial, error = parse_contents(schema_dir, file_names)
+    serial_output = capsys.readouterr().out
+    assert 'failed loading file: f1.json' in serial_output
+    for workers, cache_dir in isolated_modes:
+        contents, isolated_error = parse_contents(schema_dir, file_names, workers, cache_dir)
+        assert contents == serial
+        assert type(isolated_error) is type(error)
+        assert capsys.readouterr().out == serial_output
+
+
+def test_reparse_leaves_registry_untouched_on_error(schema_dir):
+    for i in range(2):
+        write_schema(schema_dir, f"f{i}.json", struct_schema(i))
+    batch_parser = make_batch_parser(schema_dir, ['f0.json', 'f1.json'])
+    batch_parser.parse(['core'], 2)
+    before = registry_contents(batch_parser.type_registry)
+    write_schema(schema_dir, 'f1.json', {'Bad': {'type': 'bogus'}})
+    with pytest.raises(TypeError):
+        batch_parser.reparse(['core'], ['f1.json'])
+    assert registry_contents(batch_parser.type_registry) == before
+
+
+def test_reparse_reports_changed_keys(schema_dir):
+    for i in range(2):
+        write_schema(schema_dir, f"f{i}.json", struct_schema(i))
+    batch_parser = make_batch_parser(schema_dir, ['f0.json', 'f1.json'])
+    batch_parser.parse(['core'], 2)
+    write_schema(schema_dir, 'f1.json', {'U1': {'type': 'string'}})
+    changed_keys = batch_parser.reparse(['core'], ['f1.json'])
+    assert sorted(map(str, changed_keys)) == ['#/definitions/S1', '#/definitions/T1', '#/definitions/U1']
+    assert [str(key) for key in batch_parser.type_registry.keys()] == \
+           ['#/definitions/T0', '#/definitions/S0', '#/definitions/U1']
@@ -0,0 +1,55 @@
+from code_generator.cpp_code_generator import CodeGenerator
+from code_generator.schema_watcher import SchemaWatcher
+from tests.conftest import make_batch_parser, write_schema
+
+
+def make_watcher(schema_dir, out_dir):
+    write_schema(schema_dir, 'a.json', {'BInt': {'type': 'integer'}})
+    write_schema(schema_dir, 'b.json', {'User': {'type': 'object', 'properties': {'age': {'type': 'integer'}}}})
+    batch_parser = make_batch_parser(schema_dir, ['a.json', 'b.json'])
+    code_generator = CodeGenerator(batch_parser.type_registry, str(out_dir), 'include', 'src')
+    watcher = SchemaWatcher(batch_parser, code_generator, ['core'])
+    watcher.start()
+    return watcher
+
+
+def test_poll_without_changes(schema_dir, tmp_path):
+    watcher = make_watcher(schema_dir, tmp_path / 'out')
+    assert not watcher.poll()
+
+
+def test_renamed_shared_type_is_dropped_from_its_header(schema_dir, tmp_path, capsys):
+    out_dir = tmp_path / 'out'
+    watcher = make_watcher(schema_dir, out_dir)
+    types_header = out_dir / 'include' / 'core' / 'TypesCore.h'
+    assert 'using BInt' in types_header.read_text()
+
+    write_schema(schema_dir, 'a.json', {'BigInt': {'type': 'integer'}})
+    assert watcher.poll()
+    header = types_header.read_text()
+    assert 'using BigInt' in header and 'BInt' not in header
+
+
+def test_removed_shared_type_removes_its_header(schema_dir, tmp_path, capsys):
+    out_dir = tmp_path / 'out'
+    watcher = make_watcher(schema_dir, out_dir)
+    user_header = out_dir / 'include' / 'core' / 'User.h'
+    user_content = user_header.read_text()
+
+    write_schema(schema_dir, 'a.json', {})
+    assert watcher.poll()
+    assert not (out_dir / 'include' / 'core' / 'TypesCore.h').exists()
+    assert user_header.read_text() == user_content
+    assert 'removed: 1' in capsys.readouterr().out
+
+
+def test_parse_error_keeps_last_good_state(schema_dir, tmp_path, capsys):
+    out_dir = tmp_path / 'out'
+    watcher = make_watcher(schema_dir, out_dir)
+    types_header = out_dir / 'include' / 'core' / 'TypesCore.h'
+    header = types_header.read_text()
+
+    write_schema(schema_dir, 'a.json', {'BInt': {'type': 'bogus'}})
+    assert not watcher.poll()
+    assert 'Failed re-parsing schema files' in capsys.readouterr().out
+    assert types_header.read_text() == header
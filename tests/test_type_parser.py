@@ -0,0 +1,42 @@
+from schema_parser.type_defs.type_def_base import TypeDefKind
+from tests.conftest import make_batch_parser, write_schema
+
+
+def parse_types(schema_dir, definitions):
+    write_schema(schema_dir, 'types.json', definitions)
+    batch_parser = make_batch_parser(schema_dir, ['types.json'])
+    batch_parser.parse(['core'])
+    return {type_def.type_name: type_def for type_def in batch_parser.type_registry.iter_all()}
+
+
+def members_by_name(struct_def):
+    return {member.type_name: member for member in struct_def.members}
+
+
+def test_identical_anonymous_definitions_are_shared(schema_dir):
+    types = parse_types(schema_dir, {
+        'A': {'type': 'object', 'properties': {
+            'ids': {'type': 'array', 'items': {'type': 'integer'}},
+            'value': {'oneOf': [{'type': 'string'}, {'type': 'array', 'items': {'type': 'integer'}}]},
+        }},
+        'B': {'type': 'object', 'properties': {
+            'ids': {'type': 'array', 'items': {'type': 'integer'}},
+        }},
+    })
+    a_members = members_by_name(types['A'])
+    b_members = members_by_name(types['B'])
+    assert a_members['ids'] is not b_members['ids']
+    assert a_members['ids'].element_type_def is b_members['ids'].element_type_def
+    assert a_members['value'].member_type_defs[1].element_type_def is a_members['ids'].element_type_def
+
+
+def test_identical_inline_enums_stay_distinct_types(schema_dir):
+    types = parse_types(schema_dir, {
+        'A': {'type': 'object', 'properties': {'color': {'enum': ['red', 'green']}}},
+        'B': {'type': 'object', 'properties': {'shade': {'enum': ['red', 'green']}}},
+    })
+    color = members_by_name(types['A'])['Color']
+    shade = members_by_name(types['B'])['Shade']
+    assert color.kind == shade.kind == TypeDefKind.EnumType
+    assert color is not shade
+    assert color.members == shade.members
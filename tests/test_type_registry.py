@@ -0,0 +1,67 @@
+import pytest
+
+from code_generator.cpp_code_generator import CodeGenerator
+from schema_parser.reg_key import RegKey
+from schema_parser.type_defs.type_def_base import TypeDefKind
+from schema_parser.type_registry import TypeRegistry
+from tests.conftest import generated_files, make_batch_parser, registry_contents, write_schema
+
+
+@pytest.fixture
+def type_registry(schema_dir) -> TypeRegistry:
+    write_schema(schema_dir, 'types.json', {
+        'Id': {'type': 'integer'},
+        'UserId': {'$ref': '#/definitions/Id'},
+        'User': {'type': 'object', 'properties': {
+            'id': {'$ref': '#/definitions/UserId'},
+            'role': {'enum': ['admin', 'guest']},
+        }},
+    })
+    batch_parser = make_batch_parser(schema_dir, ['types.json'])
+    batch_parser.parse(['core'])
+    return batch_parser.type_registry
+
+
+def private_keys(type_registry: TypeRegistry):
+    return {kind: [str(t_def.reg_key) for t_def in type_registry.iter_kind(kind, True)] for kind in TypeDefKind}
+
+
+def test_snapshot_round_trip(type_registry, tmp_path):
+    snapshot_path = str(tmp_path / 'types.snapshot')
+    type_registry.save_snapshot(snapshot_path)
+    loaded = TypeRegistry.load_snapshot(snapshot_path)
+
+    assert registry_contents(loaded) == registry_contents(type_registry)
+    assert private_keys(loaded) == private_keys(type_registry)
+    assert private_keys(loaded)[TypeDefKind.EnumType] == ['#/definitions/role']
+    # resolved references are kept, and point to the loaded definitions
+    target = loaded.get_ref_target('#/definitions/UserId')
+    assert target is loaded.get(RegKey.from_uri('#/definitions/Id'))
+
+
+def test_generation_from_snapshot(type_registry, tmp_path):
+    snapshot_path = str(tmp_path / 'types.snapshot')
+    type_registry.save_snapshot(snapshot_path)
+    CodeGenerator(type_registry, str(tmp_path / 'direct'), 'include', 'src').generate_code()
+    CodeGenerator.from_snapshot(snapshot_path, str(tmp_path / 'snapshot'), 'include', 'src').generate_code()
+
+    files = generated_files(tmp_path / 'direct')
+    assert generated_files(tmp_path / 'snapshot') == files
+    for file_path in files:
+        direct = (tmp_path / 'direct' / file_path).read_text()
+        assert (tmp_path / 'snapshot' / file_path).read_text() == direct.replace('direct', 'snapshot')
+
+
+def test_load_rejects_other_files(tmp_path):
+    file_path = tmp_path / 'types.snapshot'
+    file_path.write_bytes(b'not a snapshot')
+    with pytest.raises(ValueError, match='Not a type registry snapshot'):
+        TypeRegistry.load_snapshot(str(file_path))
+
+
+def test_load_rejects_other_versions(type_registry, tmp_path, monkeypatch):
+    snapshot_path = str(tmp_path / 'types.snapshot')
+    type_registry.save_snapshot(snapshot_path)
+    monkeypatch.setattr('schema_parser.type_registry.SNAPSHOT_FORMAT_VERSION', -1)
+    with pytest.raises(ValueError, match='Incompatible type registry snapshot'):
+        TypeRegistry.load_snapshot(snapshot_path)